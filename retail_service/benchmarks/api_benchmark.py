@@ -0,0 +1,181 @@
+"""
+Нагрузочный прогон API через реальные HTTP-маршруты.
+
+Клиенты входят через /login/ под пользователями, созданными командой generate_data
+(<email-prefix><N>@example.com с общим паролем), и параллельно выполняют сценарий из
+ENDPOINTS. Сервер запускается с настройками benchmarks.settings, где троттлинг отключён.
+Сценарий включает запись: добавление в корзину и подтверждение заказа на контакт
+пользователя (каждый клиент проходит шаги по порядку). Подтверждение ставит задачи
+в брокер Celery, поэтому Redis должен быть запущен; --read-only оставляет только чтение.
+Отчёт содержит пропускную способность и p50/p95/p99 по каждому эндпоинту,
+а также хеш коммита, чтобы результаты можно было сравнивать между версиями.
+
+Пример:
+    python manage.py generate_data --users 64
+    DJANGO_SETTINGS_MODULE=benchmarks.settings python manage.py runserver --noreload
+    python -m benchmarks.api_benchmark --base-url http://127.0.0.1:8000 --concurrency 32 --output api.json
+"""
+import argparse
+import json
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import BASE_DIR, summarize, write_report
+
+
+def cart_items(state):
+    state['offer'] = (state['offer'] + 1) % len(state['offers'])
+    return {'items': [{'product_id': state['offers'][state['offer']], 'quantity': 1}]}
+
+
+def confirm_order(state):
+    # Корзина известна из предыдущего шага GET /cart/
+    if state.get('cart') is None:
+        return None
+    return {'order_id': state.pop('cart'), 'contact_id': state['contact']}
+
+
+# Сценарий одного клиента: метод, путь, тело запроса (или функция от состояния клиента,
+# None — шаг пропускается) и признак записи
+ENDPOINTS = [
+    ('GET', '/products/', None, False),
+    ('GET', '/products/?search=Product 1', None, False),
+    ('POST', '/cart/', cart_items, True),
+    ('GET', '/cart/', None, False),
+    ('POST', '/confirm-order/', confirm_order, True),
+    ('GET', '/orders/', None, False),
+    ('GET', '/contacts/', None, False),
+]
+
+
+def request(base_url, method, path, token=None, body=None):
+    headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Token {token}'
+    data = json.dumps(body).encode() if body is not None else None
+    url = base_url.rstrip('/') + urllib.parse.quote(path, safe='/?=&')
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data, headers, method=method)) as response:
+            payload = response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        payload = error.read()
+        status = error.code
+    return status, payload, time.perf_counter() - started
+
+
+def login(base_url, email, password):
+    status, payload, _ = request(base_url, 'POST', '/login/', body={'email': email, 'password': password})
+    if status != 200:
+        raise SystemExit(f'Не удалось войти как {email}: {status} {payload[:200]!r}')
+    return json.loads(payload)['Token']
+
+
+def get_json(base_url, path, token):
+    status, payload, _ = request(base_url, 'GET', path, token)
+    if status != 200:
+        raise SystemExit(f'Ошибка запроса {path}: {status} {payload[:200]!r}')
+    return json.loads(payload)
+
+
+def client_state(base_url, token, offers):
+    """
+    Данные для шагов записи: контакт пользователя и предложения для корзины.
+    """
+    contacts = get_json(base_url, '/contacts/', token)
+    if not contacts:
+        raise SystemExit('У пользователя нет контактов: создайте данные командой generate_data')
+    return {'contact': contacts[0]['id'], 'offers': offers, 'offer': 0, 'cart': None}
+
+
+def commit_hash():
+    try:
+        output = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def run(base_url, tokens, states, total, endpoints):
+    results = {f'{method} {path}': [] for method, path, _, _ in endpoints}
+    errors = {}
+    lock = threading.Lock()
+
+    def client(index):
+        token, state = tokens[index], states[index]
+        count = len(range(index, total, len(tokens)))
+        # Клиенты начинают с разных шагов, но каждый проходит сценарий по порядку
+        for step in range(index, index + count):
+            method, path, body, _ = endpoints[step % len(endpoints)]
+            if callable(body):
+                body = body(state)
+                if body is None:
+                    continue
+            status, payload, elapsed = request(base_url, method, path, token, body)
+            if path == '/cart/' and method == 'GET':
+                state['cart'] = json.loads(payload)['id'] if status == 200 else None
+            name = f'{method} {path}'
+            with lock:
+                # 404 корзины — штатный ответ для пользователя без корзины
+                if status < 400 or (path == '/cart/' and status == 404):
+                    results[name].append(elapsed)
+                else:
+                    errors[f'{name} {status}'] = errors.get(f'{name} {status}', 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(tokens)) as executor:
+        list(executor.map(client, range(len(tokens))))
+    return results, errors, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=16, help='Число одновременных клиентов')
+    parser.add_argument('--requests', type=int, default=2000, help='Общее число запросов')
+    parser.add_argument('--warmup', type=int, default=50, help='Запросов на прогрев (не учитываются)')
+    parser.add_argument('--email-prefix', default='loadtest')
+    parser.add_argument('--password', default='loadtest')
+    parser.add_argument('--read-only', action='store_true', help='Без добавления в корзину и подтверждения заказов')
+    parser.add_argument('--output', help='Файл для JSON-отчёта')
+    args = parser.parse_args()
+
+    tokens = [
+        login(args.base_url, f'{args.email_prefix}{index}@example.com', args.password)
+        for index in range(args.concurrency)
+    ]
+    endpoints = [endpoint for endpoint in ENDPOINTS if not (args.read_only and endpoint[3])]
+    states = [{} for _ in tokens]
+    if not args.read_only:
+        products = get_json(args.base_url, '/products/?fields=product_infos.id&expand=product_infos', tokens[0])
+        offers = [offer['id'] for product in products for offer in product['product_infos']]
+        if not offers:
+            raise SystemExit('В каталоге нет предложений: создайте данные командой generate_data')
+        states = [client_state(args.base_url, token, offers) for token in tokens]
+
+    run(args.base_url, tokens, states, args.warmup, endpoints)
+    results, errors, elapsed = run(args.base_url, tokens, states, args.requests, endpoints)
+
+    all_latencies = [latency for latencies in results.values() for latency in latencies]
+    write_report({
+        'commit': commit_hash(),
+        'base_url': args.base_url,
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'read_only': args.read_only,
+        'total': summarize(all_latencies, elapsed),
+        'errors': errors,
+        'endpoints': {name: summarize(latencies, elapsed) for name, latencies in results.items()},
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
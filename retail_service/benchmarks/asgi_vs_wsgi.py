@@ -0,0 +1,231 @@
+"""
+Сравнение WSGI и ASGI на эндпоинтах чтения при конкурентных клиентах.
+
+Запросы подаются напрямую в retail_service.wsgi.application и retail_service.asgi.application,
+без сетевого сервера, поэтому измеряется только стоимость стека Django/DRF.
+Каждый режим запускается в отдельном процессе со своей временной базой данных:
+
+- wsgi-sync   — синхронные представления через WSGI (пул потоков);
+- asgi-sync   — синхронные представления через ASGI;
+- asgi-async  — асинхронные представления (ASYNC_VIEWS) через ASGI.
+
+Пример:
+    python -m benchmarks.asgi_vs_wsgi --concurrency 32 --requests 2000 --output asgi.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import BASE_DIR, setup_django, test_database, summarize, write_report
+
+MODES = {
+    'wsgi-sync': '',
+    'asgi-sync': '',
+    'asgi-async': 'product-list,cart,order-list',
+}
+ENDPOINTS = ['/products/', '/cart/', '/orders/']
+
+
+def seed(clients, products):
+    """
+    Каталог из `products` товаров и по пользователю с корзиной и историей на каждого клиента.
+    """
+    from rest_framework.authtoken.models import Token
+    from orders.models import (
+        User, Shop, Category, Product, ProductInfo, Parameter, ProductParameter, Order, OrderItem,
+    )
+
+    shop = Shop.objects.create(name='Benchmark Shop')
+    category = Category.objects.create(name='Benchmark Category')
+    parameter = Parameter.objects.create(name='Color')
+    product_infos = []
+    for index in range(products):
+        product = Product.objects.create(name=f'Product {index}', category=category)
+        product_info = ProductInfo.objects.create(
+            product=product, shop=shop, name=f'Model {index}', quantity=10,
+            price=100, price_rrc=120, external_id=index + 1,
+        )
+        ProductParameter.objects.create(product_info=product_info, parameter=parameter, value='Black')
+        product_infos.append(product_info)
+
+    tokens = []
+    for index in range(clients):
+        user = User.objects.create_user(email=f'bench{index}@example.com', password='benchmark')
+        tokens.append(Token.objects.create(user=user).key)
+        for status in ('basket', 'new', 'delivered'):
+            order = Order.objects.create(user=user, status=status)
+            OrderItem.objects.bulk_create(
+                OrderItem(order=order, product=product_info, quantity=1) for product_info in product_infos[:5]
+            )
+    return tokens
+
+
+def wsgi_request(application, path, token):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'HTTP_AUTHORIZATION': f'Token {token}',
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'wsgi.version': (1, 0),
+    }
+    statuses = []
+    result = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        b''.join(result)
+    finally:
+        result.close()
+    return int(statuses[0].split()[0])
+
+
+async def asgi_request(application, path, token):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'headers': [(b'host', b'localhost'), (b'authorization', f'Token {token}'.encode())],
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 0),
+    }
+    finished = asyncio.Event()
+    received = []
+    messages = []
+
+    async def receive():
+        if not received:
+            received.append(True)
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Отключение клиента сообщается только после получения ответа
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+        if message['type'] == 'http.response.body' and not message.get('more_body'):
+            finished.set()
+
+    await application(scope, receive, send)
+    return messages[0]['status']
+
+
+def run_wsgi(tokens, total):
+    from retail_service.wsgi import application
+
+    results = {path: [] for path in ENDPOINTS}
+    errors = []
+    lock = threading.Lock()
+
+    def client(index):
+        token = tokens[index]
+        for number in range(index, total, len(tokens)):
+            path = ENDPOINTS[number % len(ENDPOINTS)]
+            started = time.perf_counter()
+            status = wsgi_request(application, path, token)
+            elapsed = time.perf_counter() - started
+            with lock:
+                (results[path] if status < 400 else errors).append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(tokens)) as executor:
+        list(executor.map(client, range(len(tokens))))
+    return results, errors, time.perf_counter() - started
+
+
+def run_asgi(tokens, total):
+    from retail_service.asgi import application
+
+    results = {path: [] for path in ENDPOINTS}
+    errors = []
+
+    async def client(index):
+        token = tokens[index]
+        for number in range(index, total, len(tokens)):
+            path = ENDPOINTS[number % len(ENDPOINTS)]
+            started = time.perf_counter()
+            status = await asgi_request(application, path, token)
+            elapsed = time.perf_counter() - started
+            (results[path] if status < 400 else errors).append(elapsed)
+
+    async def main():
+        await asyncio.gather(*(client(index) for index in range(len(tokens))))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return results, errors, time.perf_counter() - started
+
+
+def run_mode(mode, args):
+    setup_django()
+    with test_database():
+        tokens = seed(args.concurrency, args.products)
+        runner = run_wsgi if mode.startswith('wsgi') else run_asgi
+        # Прогрев: первые запросы загружают маршруты и заполняют кэши
+        runner(tokens[:1], len(ENDPOINTS))
+        results, errors, elapsed = runner(tokens, args.requests)
+
+    all_latencies = [latency for latencies in results.values() for latency in latencies]
+    return {
+        'mode': mode,
+        'total': summarize(all_latencies, elapsed),
+        'errors': len(errors),
+        'endpoints': {path: summarize(latencies, elapsed) for path, latencies in results.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=16, help='Число одновременных клиентов')
+    parser.add_argument('--requests', type=int, default=1200, help='Число запросов в каждом режиме')
+    parser.add_argument('--products', type=int, default=50, help='Размер каталога')
+    parser.add_argument('--modes', default=','.join(MODES), help='Режимы через запятую')
+    parser.add_argument('--output', help='Файл для JSON-отчёта')
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Дочерний процесс: один режим, результат в stdout
+        print(json.dumps(run_mode(args.mode, args)))
+        return
+
+    report = {
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'products': args.products,
+        'modes': [],
+    }
+    for mode in args.modes.split(','):
+        env = {**os.environ, 'ASYNC_VIEWS': MODES[mode]}
+        command = [
+            sys.executable, '-m', 'benchmarks.asgi_vs_wsgi', '--mode', mode,
+            '--concurrency', str(args.concurrency), '--requests', str(args.requests),
+            '--products', str(args.products),
+        ]
+        output = subprocess.run(command, env=env, cwd=BASE_DIR, check=True, capture_output=True, text=True)
+        report['modes'].append(json.loads(output.stdout.strip().splitlines()[-1]))
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
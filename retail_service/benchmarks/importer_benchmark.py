@@ -0,0 +1,170 @@
+"""
+Бенчмарк импорта прайс-листов поставщика (shop.importer).
+
+Для каждого размера генерируются два YAML-прайса одного магазина: предыдущий и текущий,
+который совпадает с предыдущим на долю --overlap товаров (те же id и названия, новые цены).
+Оба прогоняются через shop.importer во временной базе; по каждому этапу (parse, shop,
+categories, goods, cleanup) текущего импорта записываются время, число SQL-запросов,
+число записанных строк (INSERT/UPDATE/DELETE) и пиковый RSS процесса.
+
+Пример:
+    python -m benchmarks.importer_benchmark --sizes 10000,100000 --parameters 8 --overlap 0.9 --output import.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from .common import BASE_DIR, setup_django, test_database, write_report
+
+CATEGORIES = 50
+
+
+def write_feed(path, size, parameters, overlap, seed, previous=False):
+    """
+    YAML-прайс из `size` товаров с `parameters` параметрами у каждого.
+
+    Товары текущего прайса с номерами меньше overlap * size совпадают с предыдущим.
+    Файл пишется построчно: yaml.dump на миллионе товаров не помещается в память.
+    """
+    rng = random.Random(seed + previous)
+    shared = int(size * overlap)
+    with open(path, 'w') as file:
+        file.write('shop: Benchmark Shop\ncategories:\n')
+        for index in range(1, CATEGORIES + 1):
+            file.write(f'- id: {index}\n  name: Category {index}\n')
+        file.write('goods:\n')
+        for index in range(size):
+            # Отличающиеся товары получают номера за пределами предыдущего прайса
+            number = index if previous or index < shared else index + size
+            price = rng.randint(100, 100000)
+            file.write(
+                f'- id: {number + 1}\n'
+                f'  category: {number % CATEGORIES + 1}\n'
+                f'  model: Model {number}\n'
+                f'  name: Product {number}\n'
+                f'  price: {price}\n'
+                f'  price_rrc: {price + price // 5}\n'
+                f'  quantity: {rng.randint(0, 100)}\n'
+                f'  parameters:\n'
+            )
+            for parameter in range(parameters):
+                file.write(f'    Parameter {parameter}: Value {rng.randint(0, 20)}\n')
+
+
+def peak_rss_mb():
+    # ru_maxrss в Linux — килобайты
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class PhaseRecorder:
+    """
+    Счётчик этапов импорта: подставляется в import_price_list вместо timed_section.
+    """
+
+    WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+    def __init__(self):
+        self.phases = {}
+        self.current = None
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        if self.current is not None:
+            self.current['queries'] += 1
+            statement = sql.lstrip()[:6].upper()
+            if statement == 'INSERT':
+                # У INSERT ... RETURNING rowcount неизвестен до чтения результата
+                self.current['rows_written'] += len(params) if many else sql.count('), (') + 1
+            elif statement in self.WRITE_STATEMENTS:
+                self.current['rows_written'] += max(context['cursor'].rowcount, 0)
+        return result
+
+    @contextmanager
+    def __call__(self, name):
+        self.current = stats = {'queries': 0, 'rows_written': 0}
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats['seconds'] = round(time.perf_counter() - started, 3)
+            stats['peak_rss_mb'] = peak_rss_mb()
+            self.phases[name.removeprefix('import.')] = stats
+            self.current = None
+
+
+def import_feed(path, user_id, recorder=None):
+    from django.db import connection
+    from shop.importer import load_price_list, import_price_list
+
+    recorder = recorder or PhaseRecorder()
+    started = time.perf_counter()
+    # Без общей транзакции, как в PartnerUpdate
+    with connection.execute_wrapper(recorder.execute_wrapper):
+        with recorder('import.parse'):
+            with open(path, 'rb') as file:
+                data = load_price_list(file.read())
+        import_price_list(data, user_id, phase=recorder)
+    return {'seconds': round(time.perf_counter() - started, 3), 'phases': recorder.phases}
+
+
+def run_size(args):
+    setup_django()
+    from orders.models import User
+
+    with tempfile.TemporaryDirectory() as directory, test_database():
+        previous = os.path.join(directory, 'previous.yaml')
+        current = os.path.join(directory, 'current.yaml')
+        write_feed(previous, args.size, args.parameters, args.overlap, args.seed, previous=True)
+        write_feed(current, args.size, args.parameters, args.overlap, args.seed)
+
+        user = User.objects.create_user(email='importer@example.com', type='shop')
+        # Предыдущий импорт заполняет каталог, измеряется повторный
+        previous_result = import_feed(previous, user.id)
+        current_result = import_feed(current, user.id)
+        feed_mb = round(os.path.getsize(current) / 2 ** 20, 2)
+
+    return {
+        'size': args.size,
+        'feed_mb': feed_mb,
+        'previous_import_seconds': previous_result['seconds'],
+        'seconds': current_result['seconds'],
+        'goods_per_second': round(args.size / current_result['seconds'], 1),
+        'phases': current_result['phases'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000', help='Размеры прайса (число товаров) через запятую')
+    parser.add_argument('--parameters', type=int, default=5, help='Параметров у каждого товара')
+    parser.add_argument('--overlap', type=float, default=0.9, help='Доля товаров, совпадающих с предыдущим прайсом')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Файл для JSON-отчёта')
+    parser.add_argument('--size', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.size:
+        # Дочерний процесс: один размер, чтобы пиковый RSS не накапливался между прогонами
+        print(json.dumps(run_size(args)))
+        return
+
+    report = {'parameters': args.parameters, 'overlap': args.overlap, 'runs': []}
+    for size in args.sizes.split(','):
+        command = [
+            sys.executable, '-m', 'benchmarks.importer_benchmark', '--size', size,
+            '--parameters', str(args.parameters), '--overlap', str(args.overlap), '--seed', str(args.seed),
+        ]
+        output = subprocess.run(command, cwd=BASE_DIR, check=True, capture_output=True, text=True)
+        report['runs'].append(json.loads(output.stdout.strip().splitlines()[-1]))
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Бенчмарк рендереров ответа: JSONRenderer DRF, ORJSONRenderer и MessagePackRenderer.
+
+Во временной базе командой generate_data создаётся каталог и история заказов, затем
+ProductSerializer и OrderSerializer (many=True) один раз готовят данные ответа —
+ровно то, что получает рендерер в /products/ и /orders/. Каждый рендерер кодирует
+одни и те же данные --repeat раз; в отчёте медиана и p95 времени рендеринга, размер
+ответа, ускорение относительно JSONRenderer и совпадение вывода orjson с ним.
+Время сериализации приводится для сравнения: какую долю запроса составляет рендеринг.
+
+Пример:
+    python -m benchmarks.renderer_benchmark --products 2000 --orders 500 --repeat 20 --output renderers.json
+"""
+import argparse
+import io
+import statistics
+import time
+
+from .common import setup_django, test_database, percentile, write_report
+
+RENDERERS = {
+    'drf-json': 'rest_framework.renderers.JSONRenderer',
+    'orjson': 'orders.renderers.ORJSONRenderer',
+    'msgpack': 'orders.renderers.MessagePackRenderer',
+}
+
+
+def payloads(args):
+    """
+    Данные ответов /products/ и /orders/ после сериализации; время сериализации в секундах.
+    """
+    from django.core.management import call_command
+    from orders.api_views import PRODUCT_PREFETCH, ORDER_PREFETCH
+    from orders.models import Product, Order
+    from orders.serializers import ProductSerializer, OrderSerializer
+
+    call_command(
+        'generate_data', shops=10, products=args.products, users=max(1, args.orders // 5), orders_per_user=5,
+        items_per_order=args.items_per_order, seed=args.seed, verbosity=0, stdout=io.StringIO(),
+    )
+    querysets = {
+        'products': (ProductSerializer, Product.objects.select_related('category').prefetch_related(*PRODUCT_PREFETCH)),
+        'orders': (OrderSerializer, Order.objects.exclude(status='basket').prefetch_related(*ORDER_PREFETCH)[:args.orders]),
+    }
+    result = {}
+    for name, (serializer_class, queryset) in querysets.items():
+        instances = list(queryset)
+        started = time.perf_counter()
+        data = serializer_class(instances, many=True).data
+        result[name] = (data, len(instances), time.perf_counter() - started)
+    return result
+
+
+def measure(renderer, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        content = renderer.render(data, renderer.media_type, {})
+        timings.append(time.perf_counter() - started)
+    return content, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=2000, help='Товаров в каталоге')
+    parser.add_argument('--orders', type=int, default=500, help='Заказов в истории')
+    parser.add_argument('--items-per-order', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=20, help='Повторов рендеринга')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Файл для JSON-отчёта')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.utils.module_loading import import_string
+
+    report = {'repeat': args.repeat, 'payloads': []}
+    with test_database():
+        for name, (data, objects, serialize_seconds) in payloads(args).items():
+            results, contents = {}, {}
+            for renderer_name, path in RENDERERS.items():
+                content, timings = measure(import_string(path)(), data, args.repeat)
+                contents[renderer_name] = content
+                results[renderer_name] = {
+                    'median_ms': round(statistics.median(timings) * 1000, 3),
+                    'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+                    'bytes': len(content),
+                }
+            baseline = results['drf-json']['median_ms']
+            for result in results.values():
+                result['speedup'] = round(baseline / result['median_ms'], 2) if result['median_ms'] else None
+            report['payloads'].append({
+                'payload': name,
+                'objects': objects,
+                'serialize_ms': round(serialize_seconds * 1000, 3),
+                # orjson обязан отдавать те же байты, что и JSONRenderer
+                'orjson_identical': contents['orjson'] == contents['drf-json'],
+                'renderers': results,
+            })
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
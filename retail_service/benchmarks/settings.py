@@ -0,0 +1,28 @@
+"""
+Настройки для запуска бенчмарков.
+
+Отключают троттлинг и режим отладки (накопление connection.queries),
+а ключи кэша изолируют от рабочих данных префиксом.
+"""
+import tempfile
+
+from retail_service.settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+# Локальный сервер для api_benchmark
+ALLOWED_HOSTS = ['localhost', '127.0.0.1']
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {scope: None for scope in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']},
+}
+
+for alias in CACHES:
+    CACHES[alias] = {**CACHES[alias], 'KEY_PREFIX': 'bench'}
+
+# Своя временная база, отдельная от базы тестов
+DATABASES = {
+    alias: {**database, 'TEST': {'NAME': os.path.join(tempfile.gettempdir(), f'benchmark_{alias}.sqlite3')}}
+    for alias, database in DATABASES.items()
+}
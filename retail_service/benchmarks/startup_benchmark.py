@@ -0,0 +1,110 @@
+"""
+Время запуска и память процесса для профилей настроек api, worker и admin.
+
+Каждый замер — отдельный процесс интерпретатора, который загружает Django так же,
+как рабочий процесс своей роли:
+
+- api, admin — django.setup(), WSGI-приложение с middleware и все маршруты;
+- worker     — приложение Celery с автообнаружением задач и django.setup().
+
+В отчёте медианы по --repeat запускам: время импорта и инициализации внутри процесса,
+полное время процесса (вместе со стартом интерпретатора), пиковый RSS и число модулей.
+
+Пример:
+    python -m benchmarks.startup_benchmark --repeat 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from .common import BASE_DIR, write_report
+
+ROLES = {
+    'api': 'retail_service.settings_api',
+    'worker': 'retail_service.settings_worker',
+    'admin': 'retail_service.settings_admin',
+}
+
+
+def start_role(role):
+    """
+    Запуск роли в текущем процессе; возвращает показатели после инициализации.
+    """
+    started = time.perf_counter()
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ['DJANGO_SETTINGS_MODULE'] = ROLES[role]
+
+    if role == 'worker':
+        from retail_service.celery import app
+
+        app.loader.import_default_modules()
+    else:
+        from django.core.wsgi import get_wsgi_application
+        from django.urls import get_resolver
+
+        get_wsgi_application()
+        # Маршруты загружаются при первом запросе
+        get_resolver().url_patterns
+
+    from django.apps import apps
+
+    return {
+        'import_seconds': time.perf_counter() - started,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'modules': len(sys.modules),
+        'apps': len(apps.get_app_configs()),
+    }
+
+
+def measure(role, repeat):
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.startup_benchmark', '--role', role],
+            cwd=BASE_DIR, check=True, capture_output=True, text=True,
+        )
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        result['process_seconds'] = time.perf_counter() - started
+        runs.append(result)
+
+    def median(name, digits=3):
+        return round(statistics.median(run[name] for run in runs), digits)
+
+    return {
+        'role': role,
+        'settings': ROLES[role],
+        'import_ms': round(median('import_seconds', 6) * 1000, 1),
+        'process_ms': round(median('process_seconds', 6) * 1000, 1),
+        'peak_rss_mb': median('peak_rss_mb', 1),
+        'modules': median('modules', 0),
+        'apps': runs[0]['apps'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--roles', default=','.join(ROLES), help='Роли через запятую')
+    parser.add_argument('--repeat', type=int, default=5, help='Запусков на роль')
+    parser.add_argument('--output', help='Файл для JSON-отчёта')
+    parser.add_argument('--role', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.role:
+        # Дочерний процесс: одна роль, результат в stdout
+        print(json.dumps(start_role(args.role)))
+        return
+
+    write_report({
+        'repeat': args.repeat,
+        'roles': [measure(role, args.repeat) for role in args.roles.split(',')],
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
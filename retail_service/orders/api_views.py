@@ -1,16 +1,39 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, generics, filters
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, SAFE_METHODS
 from rest_framework.authtoken.models import Token
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.filters import SearchFilter
-from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth import authenticate
-from .serializers import UserSerializer, ProductSerializer, OrderSerializer, ContactSerializer
-from .models import Product, Order, Contact, ProductInfo, OrderItem, User, Shop
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.conf import settings
+from .serializers import UserSerializer, ProductSerializer, OrderSerializer, ContactSerializer, ProductInfoChangeSerializer
+from .models import Product, Order, Contact, ProductInfo, ProductInfoChange, OrderItem, User, Shop
 from .tasks import send_welcome_email, send_order_confirmation_email, process_order
+from .throttling import ScopedTokenBucketThrottle
+from .fieldsets import SparseFieldsetViewMixin, SparseFieldsetListMixin
+from .batch import parse_operations, execute
+from .idempotency import idempotent
+from .offers import parse_ids, get_offers
+from .snapshot import read_snapshot_meta, snapshot_path, parse_range, iter_file_range
+from retail_service.routers import ReplicaReadMixin, pin_to_primary, replica_enabled
+
+
+# Предзагрузка связей, которые читают сериализаторы: число запросов не зависит от размера выдачи
+PRODUCT_PREFETCH = (
+    Prefetch('product_infos', queryset=ProductInfo.objects.select_related('shop')),
+    'product_infos__product_parameters__parameter',
+)
+ORDER_PREFETCH = (
+    Prefetch('ordered_items', queryset=OrderItem.objects.select_related('product__shop')),
+    'ordered_items__product__product_parameters__parameter',
+)
 
 
 # Вход пользователя
@@ -22,6 +45,9 @@ class LoginView(APIView):
     Возвращает токен аутентификации при успешном входе.
     """
 
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'login'
+
     permission_classes = [AllowAny]
     authentication_classes = []
 
@@ -64,9 +90,11 @@ class RegisterView(APIView):
     Отправляет приветственное письмо после успешной регистрации.
     """
 
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'register'
+
     permission_classes = [AllowAny]
     authentication_classes = []
-        
 
     def post(self, request):
         """
@@ -82,11 +110,6 @@ class RegisterView(APIView):
         - `201 Created`: Успешная регистрация, возвращает токен.
         - `400 Bad Request`: Ошибки валидации данных.
         """
-        
-        throttle_classes = AnonRateThrottle
-        throttle_scope = 'register'
-        
-
         serializer = UserSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             user = serializer.save()
@@ -130,17 +153,20 @@ class LogoutView(APIView):
 
 
 # Список продуктов с фильтрацией и поиском
-class ProductListView(generics.ListAPIView):
+class ProductListView(ReplicaReadMixin, SparseFieldsetListMixin, generics.ListAPIView):
     """
     Список доступных продуктов.
 
     Позволяет просматривать список продуктов с возможностью фильтрации по магазинам и категориям,
     а также осуществлять поиск по названию продукта и имени магазина.
+    Поля ответа выбираются параметрами `fields` и `expand`.
+    При включённой реплике список читается из неё.
     """
 
-    throttle_classes = [UserRateThrottle]
+    throttle_classes = [ScopedTokenBucketThrottle]
     throttle_scope = 'products'
 
+    # Связи загружаются по плану выбранных полей (get_queryset)
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]  # Требует аутентификации
@@ -161,10 +187,14 @@ class ProductListView(generics.ListAPIView):
         - `shop_id` (int): ID магазина для фильтрации продуктов.
         - `category_id` (int): ID категории для фильтрации продуктов.
 
+        **Выбор полей:**
+        - `fields` (str): Поля через запятую, вложенные — через точку (`id,name,product_infos.price`).
+        - `expand` (str): Раскрываемые связи (`product_infos,product_infos.shop`), остальные — идентификаторами.
+
         **Возвращает:**
         - Отфильтрованный набор продуктов.
         """
-        queryset = super().get_queryset()
+        queryset = self.fieldset_queryset(super().get_queryset(), self.get_serializer_class())
 
         # Дополнительная фильтрация, если требуется
         shop_id = self.request.query_params.get('shop_id')
@@ -178,15 +208,197 @@ class ProductListView(generics.ListAPIView):
         return queryset
 
 
+# Предложения магазинов по списку идентификаторов
+class ProductBatchView(APIView):
+    """
+    Предложения магазинов по идентификаторам за один запрос.
+
+    Для корзин, списков избранного и недавно просмотренного, где известны конкретные
+    предложения: вместо всей выдачи /products/ или запроса на каждое предложение.
+    Предложения кэшируются поштучно с версией каталога (orders.offers), из базы
+    выбираются только отсутствующие в кэше.
+    """
+
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'products'
+
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [TokenAuthentication]
+
+    def get(self, request):
+        """
+        Получение предложений.
+
+        **Параметры запроса:**
+        - `ids` (str): Идентификаторы предложений через запятую, не больше PRODUCT_BATCH_MAX_IDS.
+
+        **Ответы:**
+        - `200 OK`: Предложения в порядке `ids` и список `missing` отсутствующих в каталоге.
+        - `400 Bad Request`: Не указаны или некорректны `ids`.
+        """
+        return self.batch_response(request.query_params.get('ids'))
+
+    def post(self, request):
+        """
+        То же для длинных списков: идентификаторы в теле запроса.
+
+        **Параметры запроса:**
+        - `ids` (list[int]): Идентификаторы предложений, не больше PRODUCT_BATCH_MAX_IDS.
+
+        **Ответы:**
+        - `200 OK`: Предложения в порядке `ids` и список `missing` отсутствующих в каталоге.
+        - `400 Bad Request`: Не указаны или некорректны `ids`.
+        """
+        return self.batch_response(request.data.get('ids'))
+
+    def batch_response(self, value):
+        try:
+            ids = parse_ids(value or [])
+        except (TypeError, ValueError):
+            return Response({'Status': False, 'Error': 'ids должны быть положительными целыми числами'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return Response({'Status': False, 'Error': 'Не указаны ids'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > settings.PRODUCT_BATCH_MAX_IDS:
+            return Response({'Status': False, 'Error': f'Не больше {settings.PRODUCT_BATCH_MAX_IDS} ids за запрос'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        offers = get_offers(ids)
+        return Response({
+            'results': [offers[product_info_id] for product_info_id in ids if product_info_id in offers],
+            'missing': [product_info_id for product_info_id in ids if product_info_id not in offers],
+        })
+
+
+# Журнал изменений каталога для инкрементальной синхронизации
+class CatalogChangesView(APIView):
+    """
+    Изменения предложений магазинов после заданной версии каталога.
+
+    Потребители (поиск, цены, офлайн-каталог) хранят последнюю полученную версию и
+    запрашивают только то, что изменилось после неё, вместо полной выгрузки /products/.
+    Страницы строятся по ключу (version > since), поэтому стоимость запроса зависит
+    только от числа изменений, а не от размера каталога.
+    """
+
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'catalog'
+
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [TokenAuthentication]
+
+    def get(self, request):
+        """
+        Получение страницы изменений.
+
+        **Параметры запроса:**
+        - `since` (int): Последняя полученная версия, по умолчанию 0 — весь журнал.
+        - `limit` (int): Размер страницы, не больше CATALOG_CHANGES_MAX_PAGE_SIZE.
+
+        **Ответы:**
+        - `200 OK`: Изменения по возрастанию версии, `next_since` для следующего запроса
+          и признак `has_more`.
+        - `400 Bad Request`: Некорректные `since` или `limit`.
+        """
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = int(request.query_params.get('limit', settings.CATALOG_CHANGES_PAGE_SIZE))
+        except ValueError:
+            return Response({'Status': False, 'Error': 'since и limit должны быть целыми числами'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if since < 0 or limit < 1:
+            return Response({'Status': False, 'Error': 'since и limit должны быть положительными'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, settings.CATALOG_CHANGES_MAX_PAGE_SIZE)
+
+        # Лишняя запись показывает, есть ли следующая страница, без отдельного COUNT
+        changes = list(ProductInfoChange.objects.filter(id__gt=since).order_by('id')[:limit + 1])
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        return Response({
+            'changes': ProductInfoChangeSerializer(changes, many=True).data,
+            'next_since': changes[-1].id if changes else since,
+            'has_more': has_more,
+        })
+
+
+# Скачивание снимка всего каталога
+class CatalogSnapshotView(APIView):
+    """
+    Снимок всего каталога: gzip-файл NDJSON, по товару на строку.
+
+    Файл собирается после каждой загрузки прайса и отдаётся как есть, без сериализации
+    на каждый запрос. Поддерживаются ETag (If-None-Match, If-Range) и докачка по Range.
+    Заголовок X-Catalog-Version — версия журнала /catalog/changes/, с которой снимок
+    согласован: после загрузки снимка синхронизацию можно продолжить с `since` этой версии.
+    """
+
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'catalog'
+
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [TokenAuthentication]
+
+    def get(self, request):
+        """
+        Скачивание снимка каталога.
+
+        **Параметры запроса:**
+        - Заголовок `Range` (`bytes=start-end`): часть файла.
+
+        **Ответы:**
+        - `200 OK`: Весь файл.
+        - `206 Partial Content`: Запрошенный диапазон.
+        - `304 Not Modified`: Снимок не изменился (If-None-Match).
+        - `404 Not Found`: Снимок ещё не собран.
+        - `416 Range Not Satisfiable`: Диапазон за пределами файла.
+        """
+        meta = read_snapshot_meta()
+        if meta is None or not snapshot_path(meta).exists():
+            return Response({'Status': False, 'Error': 'Снимок каталога ещё не собран'}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = quote_etag(meta['etag'])
+        response = get_conditional_response(request, etag=etag) or self.file_response(request, meta, etag)
+        response['ETag'] = etag
+        response['Accept-Ranges'] = 'bytes'
+        response['X-Catalog-Version'] = meta['catalog_version']
+        response['Content-Disposition'] = 'attachment; filename="catalog.ndjson.gz"'
+        return response
+
+    def file_response(self, request, meta, etag):
+        # Range применяется, только если клиент докачивает ту же версию снимка
+        byte_range = None
+        if request.headers.get('If-Range', etag) == etag:
+            try:
+                byte_range = parse_range(request.headers.get('Range'), meta['size'])
+            except ValueError:
+                response = Response(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f"bytes */{meta['size']}"
+                return response
+
+        file = open(snapshot_path(meta), 'rb')
+        if byte_range is None:
+            return FileResponse(file, content_type='application/gzip')
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            iter_file_range(file, start, end - start + 1), status=status.HTTP_206_PARTIAL_CONTENT,
+            content_type='application/gzip',
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f"bytes {start}-{end}/{meta['size']}"
+        return response
+
+
 # Работа с корзиной
-class CartView(APIView):
+class CartView(SparseFieldsetViewMixin, APIView):
     """
     Управление корзиной пользователя.
 
     Позволяет пользователю просматривать содержимое корзины, добавлять товары и удалять их.
+    Поля корзины выбираются параметрами `fields` и `expand`, как у списка продуктов.
     """
     
-    throttle_classes = [UserRateThrottle]
+    throttle_classes = [ScopedTokenBucketThrottle]
     throttle_scope = 'cart'
 
     permission_classes = [IsAuthenticated]
@@ -196,27 +408,40 @@ class CartView(APIView):
         """
         Получение содержимого корзины.
 
+        **Параметры запроса:**
+        - `fields` (str): Поля корзины через запятую, вложенные — через точку (`items.quantity`).
+        - `expand` (str): Раскрываемые связи (`items,items.product_info`), остальные — идентификаторами.
+
         **Ответы:**
         - `200 OK`: Возвращает данные корзины.
+        - `400 Bad Request`: Неизвестное поле в `fields`.
         - `404 Not Found`: Корзина пуста.
         """
-        cart = Order.objects.filter(user=request.user, status='basket').first()
+        queryset = self.fieldset_queryset(Order.objects.filter(user=request.user, status='basket'), OrderSerializer)
+        cart = queryset.first()
         if cart:
-            serializer = OrderSerializer(cart)
+            serializer = self.fieldset_serializer(OrderSerializer, cart)
             return Response(serializer.data, status=status.HTTP_200_OK)
         # Корзина пуста
         return Response({'Status': False, 'Error': 'Cart is empty'}, status=status.HTTP_404_NOT_FOUND)
 
+    # Запись корзины одной транзакцией (BEGIN IMMEDIATE): блокировка берётся один раз на запрос.
+    # Ответ сохраняется для Idempotency-Key только после фиксации транзакции
+    @idempotent
+    @transaction.atomic
     def post(self, request):
         """
         Добавление товаров в корзину.
 
         **Параметры запроса:**
         - `items` (list): Список товаров для добавления. Каждый элемент должен содержать `product_id` и `quantity`.
+        - Заголовок `Idempotency-Key` (str): Повтор с тем же ключом получает сохранённый ответ без повторного добавления.
 
         **Ответы:**
         - `201 Created`: Успешное добавление товаров.
         - `400 Bad Request`: Отсутствуют товары или неверный формат данных.
+        - `409 Conflict`: Запрос с тем же ключом ещё выполняется.
+        - `422 Unprocessable Entity`: Ключ уже использован с другим телом запроса.
         """
         items = request.data.get('items')
 
@@ -224,8 +449,7 @@ class CartView(APIView):
             # Необходимо указать товары для добавления
             return Response({'Status': False, 'Error': 'You must specify items to add'}, status=status.HTTP_400_BAD_REQUEST)
 
-        cart, created = Order.objects.get_or_create(user=request.user, status='basket')
-
+        positions = []
         for index, item in enumerate(items):
 
             if not isinstance(item, dict):
@@ -237,12 +461,25 @@ class CartView(APIView):
 
             if not product_id:
                 continue  # Или вернуть ошибку
-
             try:
-                product_info = ProductInfo.objects.get(id=product_id)
-                OrderItem.objects.create(order=cart, product=product_info, quantity=quantity)
-            except ProductInfo.DoesNotExist:
-                continue
+                positions.append((int(product_id), quantity))
+            except (TypeError, ValueError):
+                return Response({'Status': False, 'Error': f'Invalid data format for item {index}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Предложения всех позиций одним запросом, позиции — одной вставкой; несуществующие товары пропускаются
+        product_infos = ProductInfo.objects.in_bulk([product_id for product_id, _ in positions])
+        positions = [(product_id, quantity) for product_id, quantity in positions if product_id in product_infos]
+
+        # Корзина создаётся и обновляется только после проверки всех позиций
+        if positions:
+            cart, created = Order.objects.get_or_create(user=request.user, status='basket')
+            if not created:
+                # Время последней записи: по нему очистка отличает брошенную корзину от активной
+                cart.save(update_fields=['updated'])
+            OrderItem.objects.bulk_create(
+                OrderItem(order=cart, product=product_infos[product_id], quantity=quantity)
+                for product_id, quantity in positions
+            )
 
         # Успешное добавление товаров в корзину
         return Response({'Status': True}, status=status.HTTP_201_CREATED)
@@ -281,6 +518,7 @@ class CartView(APIView):
         deleted_items = cart.ordered_items.filter(product_id__in=product_ids).delete()
 
         if deleted_items[0] > 0:
+            cart.save(update_fields=['updated'])
             # Успешное удаление товаров из корзины
             return Response({'Status': True, 'Message': f'{deleted_items[0]} items removed from cart'}, status=204)
         else:
@@ -296,7 +534,7 @@ class ContactView(APIView):
     Позволяет пользователю просматривать, добавлять и удалять контактные данные.
     """
     
-    throttle_classes = [UserRateThrottle]
+    throttle_classes = [ScopedTokenBucketThrottle]
     throttle_scope = 'contacts'
 
     permission_classes = [IsAuthenticated]
@@ -372,12 +610,13 @@ class OrderConfirmView(APIView):
     При подтверждении заказа изменяет статус заказа и запускает асинхронные задачи.
     """
     
-    throttle_classes = [UserRateThrottle]
+    throttle_classes = [ScopedTokenBucketThrottle]
     throttle_scope = 'orders'
 
     permission_classes = [IsAuthenticated]
     authentication_classes = [TokenAuthentication]
 
+    @idempotent
     def post(self, request):
         """
         Обработка POST-запроса для подтверждения заказа.
@@ -385,11 +624,15 @@ class OrderConfirmView(APIView):
         **Параметры запроса:**
         - `order_id` (int): Идентификатор заказа.
         - `contact_id` (int): Идентификатор контактных данных.
+        - Заголовок `Idempotency-Key` (str): Повтор с тем же ключом получает сохранённый ответ,
+          задачи Celery повторно не ставятся.
 
         **Ответы:**
         - `200 OK`: Успешное подтверждение заказа.
         - `400 Bad Request`: Отсутствуют `order_id` или `contact_id`.
         - `404 Not Found`: Заказ или контакт не найдены.
+        - `409 Conflict`: Запрос с тем же ключом ещё выполняется.
+        - `422 Unprocessable Entity`: Ключ уже использован с другим телом запроса.
         """
         order_id = request.data.get('order_id')
         contact_id = request.data.get('contact_id')
@@ -399,15 +642,16 @@ class OrderConfirmView(APIView):
             return Response({'Status': False, 'Error': 'You must specify order_id and contact_id'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            order = Order.objects.get(id=order_id, user=request.user, status='basket')
-            contact = Contact.objects.get(id=contact_id, user=request.user)
-            order.status = 'new'
-            order.contact = contact
-            order.save()
+            with transaction.atomic():
+                order = Order.objects.get(id=order_id, user=request.user, status='basket')
+                contact = Contact.objects.get(id=contact_id, user=request.user)
+                order.status = 'new'
+                order.contact = contact
+                order.save()
 
-            # Вызов задач Celery для отправки email и обработки заказа
-            send_order_confirmation_email.delay(order_id)
-            process_order.delay(order_id)
+                # Вызов задач Celery для отправки email и обработки заказа после фиксации транзакции
+                transaction.on_commit(lambda: send_order_confirmation_email.delay(order_id))
+                transaction.on_commit(lambda: process_order.delay(order_id))
 
             # Успешное подтверждение заказа
             return Response({'Status': True}, status=status.HTTP_200_OK)
@@ -420,14 +664,16 @@ class OrderConfirmView(APIView):
 
 
 # История заказов
-class OrderListView(generics.ListAPIView):
+class OrderListView(ReplicaReadMixin, SparseFieldsetListMixin, generics.ListAPIView):
     """
     Просмотр истории заказов пользователя.
 
     Позволяет пользователю просматривать все свои заказы, исключая корзину.
+    Поля ответа выбираются параметрами `fields` и `expand`.
+    При включённой реплике история читается из неё, кроме нескольких секунд после записи.
     """
     
-    throttle_classes = [UserRateThrottle]
+    throttle_classes = [ScopedTokenBucketThrottle]
     throttle_scope = 'orders'
 
     serializer_class = OrderSerializer
@@ -439,7 +685,72 @@ class OrderListView(generics.ListAPIView):
         Получение набора запросов для истории заказов.
 
         **Возвращает:**
-        - Все заказы пользователя, кроме тех, у которых статус 'basket'.
+        - Все заказы пользователя, кроме тех, у которых статус 'basket', со связями выбранных полей.
         """
         # Получаем все заказы пользователя, кроме корзины
-        return Order.objects.filter(user=self.request.user).exclude(status='basket')
+        queryset = Order.objects.filter(user=self.request.user).exclude(status='basket')
+        return self.fieldset_queryset(queryset, self.get_serializer_class())
+
+
+# Несколько операций за один запрос
+class BatchView(APIView):
+    """
+    Пакет операций над API в одной транзакции.
+
+    Например, оформление заказа с мобильного клиента: добавление в корзину, новый контакт,
+    получение корзины и подтверждение заказа — один HTTP-запрос вместо четырёх.
+    Аутентификация выполняется один раз; операции ссылаются на ответы предыдущих (orders.batch).
+    """
+
+    # Лимиты проверяют представления каждой операции
+    throttle_classes = []
+
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [TokenAuthentication]
+
+    @idempotent
+    def post(self, request):
+        """
+        Выполнение пакета операций.
+
+        **Параметры запроса:**
+        - `operations` (list): Операции по порядку, не больше BATCH_MAX_OPERATIONS. Каждая содержит
+          `method`, `path` (например, `/cart/`), необязательные `body` и `name`. В `path` и `body`
+          допустимы ссылки на ответы предыдущих операций: `{{name.поле}}` или `{{номер.поле}}`.
+        - Заголовок `Idempotency-Key` (str): Повтор пакета с тем же ключом получает сохранённый ответ.
+
+        **Ответы:**
+        - `200 OK`: Все операции выполнены; `results` — код и данные ответа каждой.
+        - `400 Bad Request`: Некорректный пакет или ссылка.
+        - Код ответа операции, завершившейся ошибкой: изменения всех операций отменены,
+          в `results` — ответы до неё включительно.
+        """
+        try:
+            operations = parse_operations(request.data.get('operations'), settings.BATCH_MAX_OPERATIONS)
+        except ValueError as exc:
+            return Response({'Status': False, 'Error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Чтения после записей в пакете должны видеть незафиксированные изменения
+        if replica_enabled() and any(operation['method'].upper() not in SAFE_METHODS for operation in operations):
+            pin_to_primary(request.user.pk)
+
+        results, responses = {}, []
+        with transaction.atomic():
+            for index, operation in enumerate(operations):
+                try:
+                    status_code, data = execute(request, operation, results)
+                except ValueError as exc:
+                    transaction.set_rollback(True)
+                    return Response({'Status': False, 'Error': f'Операция {index}: {exc}', 'results': responses},
+                                    status=status.HTTP_400_BAD_REQUEST)
+
+                responses.append({'name': operation.get('name'), 'status': status_code, 'body': data})
+                if status_code >= 400:
+                    transaction.set_rollback(True)
+                    return Response({'Status': False, 'Error': f'Операция {index} завершилась с кодом {status_code}',
+                                     'results': responses}, status=status_code)
+                results[str(index)] = data
+                if operation.get('name'):
+                    results[operation['name']] = data
+
+        return Response({'Status': True, 'results': responses})
@@ -0,0 +1,167 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from .api_views import ProductListView, CartView, OrderListView
+from .fieldsets import SparseFieldsetViewMixin
+from .models import Order
+from .renderers import ORJSONRenderer
+from .serializers import OrderSerializer
+from .throttling import ScopedTokenBucketThrottle
+
+
+def api_response(data, status=200, headers=None):
+    """
+    Ответ в том же формате, что и JSON-рендерер синхронных представлений.
+    """
+    return HttpResponse(
+        ORJSONRenderer().render(data), status=status, headers=headers, content_type=ORJSONRenderer.media_type,
+    )
+
+
+class AsyncAPIView(View):
+    """
+    Базовое асинхронное представление для эндпоинтов только на чтение.
+
+    Повторяет поведение TokenAuthentication и троттлинга синхронных представлений,
+    но обращается к базе через асинхронный API Django, а к корзинам токенов — через redis.asyncio.
+    """
+
+    throttle_scope = None
+    # Синхронное представление того же маршрута (для операций /batch/)
+    sync_view = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # Аутентификация по токену, CSRF не нужен — как и у APIView
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = await self.authenticate(request)
+            await self.check_throttles(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            headers = {}
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                headers['WWW-Authenticate'] = 'Token'
+            if getattr(exc, 'wait', None) is not None:
+                headers['Retry-After'] = '%d' % exc.wait
+            # Ошибки валидации — как у DRF: детали без обёртки
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            return api_response(data, status=exc.status_code, headers=headers)
+
+    async def authenticate(self, request):
+        """
+        Асинхронный аналог TokenAuthentication.
+        """
+        auth = request.headers.get('Authorization', '').split()
+        if not auth or auth[0].lower() != 'token':
+            raise exceptions.NotAuthenticated()
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        try:
+            token = await Token.objects.select_related('user').aget(key=auth[1])
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return token.user
+
+    async def check_throttles(self, request):
+        """
+        Те же лимиты по throttle_scope, что и у синхронных представлений.
+        """
+        throttle = ScopedTokenBucketThrottle()
+        if not await throttle.aallow_request(request, self):
+            raise exceptions.Throttled(throttle.wait())
+
+
+# Асинхронный список продуктов
+class AsyncProductListView(AsyncAPIView):
+    """
+    Асинхронный вариант ProductListView.
+
+    Фильтрация и поиск выполняются теми же бэкендами, что и в синхронном представлении.
+    Ответ не кэшируется, как и у ProductListView: ASYNC_VIEWS не меняет свежесть данных.
+    """
+
+    throttle_scope = 'products'
+    sync_view = staticmethod(ProductListView.as_view())
+
+    async def get(self, request):
+        """
+        Получение списка продуктов.
+
+        **Ответы:**
+        - `200 OK`: Возвращает список продуктов.
+        - `400 Bad Request`: Некорректные параметры фильтрации.
+        """
+        view = ProductListView(request=Request(request), format_kwarg=None, args=(), kwargs={})
+        # Валидация фильтров обращается к базе, поэтому выполняется синхронно
+        queryset = await sync_to_async(view.filter_queryset)(view.get_queryset())
+
+        products = [product async for product in queryset]
+        return api_response(view.get_serializer(products, many=True).data)
+
+
+# Асинхронная корзина
+class AsyncCartView(SparseFieldsetViewMixin, AsyncAPIView):
+    """
+    Асинхронный вариант CartView.
+
+    Просмотр корзины выполняется асинхронно, изменение корзины
+    передаётся синхронному CartView.
+    """
+
+    throttle_scope = 'cart'
+    sync_view = staticmethod(CartView.as_view())
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def get(self, request):
+        """
+        Получение содержимого корзины.
+
+        **Ответы:**
+        - `200 OK`: Возвращает данные корзины.
+        - `404 Not Found`: Корзина пуста.
+        """
+        queryset = self.fieldset_queryset(Order.objects.filter(user=request.user, status='basket'), OrderSerializer)
+        cart = await queryset.afirst()
+        if cart:
+            return api_response(self.fieldset_serializer(OrderSerializer, cart).data)
+        # Корзина пуста
+        return api_response({'Status': False, 'Error': 'Cart is empty'}, status=404)
+
+
+# Асинхронная история заказов
+class AsyncOrderListView(SparseFieldsetViewMixin, AsyncAPIView):
+    """
+    Асинхронный вариант OrderListView.
+    """
+
+    throttle_scope = 'orders'
+    sync_view = staticmethod(OrderListView.as_view())
+
+    async def get(self, request):
+        """
+        Получение истории заказов, кроме корзины.
+
+        **Ответы:**
+        - `200 OK`: Возвращает список заказов.
+        """
+        queryset = self.fieldset_queryset(
+            Order.objects.filter(user=request.user).exclude(status='basket'), OrderSerializer,
+        )
+        orders = [order async for order in queryset]
+        return api_response(self.fieldset_serializer(OrderSerializer, orders, many=True).data)
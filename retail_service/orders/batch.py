@@ -0,0 +1,131 @@
+"""
+Пакет операций: несколько запросов к API за один HTTP-запрос (/batch/).
+
+Операции выполняются по порядку существующими представлениями DRF в одной транзакции:
+ошибка любой из них откатывает весь пакет. Пользователь аутентифицируется один раз —
+представления операций получают его без повторной проверки токена; лимиты троттлинга
+по-прежнему проверяются для каждой операции.
+
+Тело, путь и параметры операции могут ссылаться на ответы предыдущих операций:
+«{{contact.Contact.id}}» — поле ответа операции с именем contact, «{{0.id}}» — по номеру.
+Ссылка, занимающая всю строку, подставляется с исходным типом значения.
+"""
+import io
+import json
+import re
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import Resolver404, resolve
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.utils.encoders import JSONEncoder
+
+METHODS = {'GET', 'POST', 'PUT', 'PATCH', 'DELETE'}
+REFERENCE = re.compile(r'\{\{\s*([\w.-]+)\s*\}\}')
+
+
+def parse_operations(value, max_operations):
+    """
+    Проверка списка операций; ValueError с описанием ошибки.
+    """
+    if not isinstance(value, list) or not value:
+        raise ValueError('Укажите список операций operations')
+    if len(value) > max_operations:
+        raise ValueError(f'Не больше {max_operations} операций за запрос')
+    names = set()
+    for index, operation in enumerate(value):
+        if not isinstance(operation, dict):
+            raise ValueError(f'Операция {index}: ожидается объект')
+        if str(operation.get('method', '')).upper() not in METHODS:
+            raise ValueError(f'Операция {index}: метод должен быть одним из {", ".join(sorted(METHODS))}')
+        if not isinstance(operation.get('path'), str) or not operation['path'].startswith('/'):
+            raise ValueError(f'Операция {index}: путь должен начинаться с /')
+        name = operation.get('name')
+        if name is not None and (not isinstance(name, str) or name.isdigit() or name in names):
+            raise ValueError(f'Операция {index}: имя должно быть уникальной строкой, не числом')
+        names.add(name)
+    return value
+
+
+def lookup(results, path):
+    name, *keys = path.split('.')
+    if name not in results:
+        raise ValueError(f'Нет результата операции {name}')
+    value = results[name]
+    for key in keys:
+        try:
+            value = value[int(key)] if isinstance(value, list) else value[key]
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise ValueError(f'В ответе нет значения {path}')
+    return value
+
+
+def resolve_references(value, results):
+    """
+    Подстановка ответов предыдущих операций вместо ссылок {{...}}.
+    """
+    if isinstance(value, dict):
+        return {key: resolve_references(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(item, results) for item in value]
+    if isinstance(value, str):
+        match = REFERENCE.fullmatch(value)
+        if match:
+            return lookup(results, match.group(1))
+        return REFERENCE.sub(lambda match: str(lookup(results, match.group(1))), value)
+    return value
+
+
+def build_request(request, method, path, body):
+    """
+    Запрос операции с окружением исходного запроса и JSON-телом.
+    """
+    path, _, query = path.partition('?')
+    content = json.dumps(body, cls=JSONEncoder).encode() if body is not None else b''
+    environ = dict(request.META)
+    # Ключ идемпотентности относится к пакету целиком, а не к его операциям
+    environ.pop('HTTP_IDEMPOTENCY_KEY', None)
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(content)),
+        'wsgi.input': io.BytesIO(content),
+        'wsgi.url_scheme': request.scheme,
+    })
+    sub_request = WSGIRequest(environ)
+    # Пользователь уже аутентифицирован запросом пакета (ForcedAuthentication DRF)
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    return sub_request
+
+
+def execute(request, operation, results):
+    """
+    Выполнение операции: (код ответа, данные ответа).
+    """
+    method = operation['method'].upper()
+    path = resolve_references(operation['path'], results)
+    body = resolve_references(operation.get('body'), results)
+    sub_request = build_request(request, method, path, body)
+    try:
+        match = resolve(sub_request.path_info)
+    except Resolver404:
+        raise ValueError(f'Неизвестный путь {path}')
+    if match.url_name == 'batch':
+        raise ValueError('Пакет не может содержать /batch/')
+
+    view = match.func
+    # Асинхронные варианты (ASYNC_VIEWS) не выполняются внутри транзакции пакета
+    sync_view = getattr(getattr(view, 'view_class', None), 'sync_view', None)
+    if sync_view is not None:
+        view = sync_view
+    # Операции выполняются без middleware: пользователя получают только представления DRF
+    view_class = getattr(view, 'view_class', None)
+    if view_class is None or not issubclass(view_class, APIView):
+        raise ValueError(f'Путь {path} недоступен в пакете')
+    sub_request.resolver_match = match
+    response = view(sub_request, *match.args, **match.kwargs)
+    # Файлы и потоковые ответы в пакете не передаются
+    return response.status_code, response.data if isinstance(response, Response) else None
@@ -0,0 +1,68 @@
+"""
+Очистка устаревших строк: брошенные корзины, токены подтверждения email и сброса пароля.
+
+Токены авторизации (DRF Token) не истекают по времени: при использовании они не
+обновляются, поэтому по дате создания нельзя отличить брошенный токен от активного.
+Токен удаляется при выходе (/logout/).
+
+Строки удаляются порциями по CLEANUP_CHUNK_SIZE, каждая порция — отдельная короткая
+транзакция с паузой CLEANUP_CHUNK_PAUSE: запись в SQLite не блокируется надолго.
+Порции выбираются по возрастанию ключа, устаревшие строки — самые старые, поэтому
+выборка останавливается на первых подходящих строках. Срок хранения задаётся для
+каждого вида строк в CLEANUP_RETENTION.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from django_rest_passwordreset.models import ResetPasswordToken
+from retail_service.task_metrics import record
+from .models import Order, ConfirmEmailToken
+
+logger = logging.getLogger('retail_service.cleanup')
+
+# Вид строк → устаревшие строки до момента cutoff
+CLEANUP_JOBS = {
+    # Корзина брошена, если в неё давно не писали (Order.updated); позиции удаляются каскадно
+    'baskets': lambda cutoff: Order.objects.filter(status='basket', updated__lt=cutoff).order_by('pk'),
+    'confirm_tokens': lambda cutoff: ConfirmEmailToken.objects.filter(created_at__lt=cutoff).order_by('pk'),
+    'reset_tokens': lambda cutoff: ResetPasswordToken.objects.filter(created_at__lt=cutoff).order_by('pk'),
+}
+
+
+def run_cleanup(job, chunk_size=None, dry_run=False):
+    """
+    Удаление устаревших строк одного вида; отчёт с числом строк, порций и длительностью.
+    """
+    queryset = CLEANUP_JOBS[job](timezone.now() - settings.CLEANUP_RETENTION[job])
+    chunk_size = chunk_size or settings.CLEANUP_CHUNK_SIZE
+    started = time.perf_counter()
+    deleted = chunks = 0
+    if dry_run:
+        deleted = queryset.count()
+    else:
+        model = queryset.model
+        while True:
+            pks = list(queryset.values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+            # В отчёте строки самой модели, без каскадно удалённых позиций корзин
+            deleted += model.objects.filter(pk__in=pks).delete()[1].get(model._meta.label, 0)
+            chunks += 1
+            if len(pks) < chunk_size:
+                break
+            time.sleep(settings.CLEANUP_CHUNK_PAUSE)
+
+    report = {
+        'job': job,
+        'deleted': deleted,
+        'chunks': chunks,
+        'seconds': round(time.perf_counter() - started, 3),
+        'dry_run': dry_run,
+    }
+    if not dry_run:
+        logger.info('Cleanup %(job)s: %(deleted)d rows in %(chunks)d chunks, %(seconds).3fs', report)
+        record('inc', 'cleanup_rows_deleted_total', deleted, job=job)
+        record('observe', 'cleanup_run_seconds', report['seconds'], job=job)
+    return report
@@ -0,0 +1,165 @@
+"""
+Выбор полей ответа (?fields=) и раскрытия связей (?expand=) для вложенных сериализаторов.
+
+- `fields=id,name,product_infos.price` — только перечисленные поля; путь через точку
+  выбирает поля вложенного объекта, вложенное поле без продолжения — все его поля.
+- `expand=product_infos,product_infos.shop` — вложенными объектами отдаются только
+  перечисленные связи, остальные сворачиваются до идентификаторов. Без параметра
+  раскрыты все связи, как и раньше.
+
+План загрузки связей (select_related и Prefetch) строится по тому же усечённому
+дереву сериализаторов, поэтому невыбранные и свёрнутые связи не запрашиваются из базы.
+"""
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+def parse_fields(value):
+    """
+    'id,items.quantity' → {'id': {}, 'items': {'quantity': {}}}; None, если параметр не задан.
+    """
+    if value is None:
+        return None
+    tree = {}
+    for path in filter(None, (path.strip() for path in value.split(','))):
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def parse_expand(value):
+    """
+    'items.product_info' → {'items', 'items.product_info'}; None, если параметр не задан.
+    """
+    if value is None:
+        return None
+    paths = set()
+    for path in filter(None, (path.strip() for path in value.split(','))):
+        names = path.split('.')
+        paths.update('.'.join(names[:length]) for length in range(1, len(names) + 1))
+    return paths
+
+
+def nested_expand(expand, name):
+    if expand is None:
+        return None
+    prefix = name + '.'
+    return {path[len(prefix):] for path in expand if path.startswith(prefix)}
+
+
+def nested_serializer(field):
+    return field.child if isinstance(field, serializers.ListSerializer) else field
+
+
+class SparseFieldsetMixin:
+    """
+    Сериализатор с выбором полей и раскрытием связей.
+
+    relations — поле → связь модели, которую оно читает (для плана загрузки);
+    collapsed_fields — поле → фабрика поля-ссылки, когда связь не раскрыта;
+    required_lookups — поле → дополнительные prefetch-пути (например, для SerializerMethodField).
+    """
+
+    relations = {}
+    collapsed_fields = {}
+    required_lookups = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None or expand is not None:
+            self.prune(fields, expand)
+
+    def prune(self, fields, expand, path=''):
+        if fields:
+            unknown = [path + name for name in fields if name not in self.fields]
+            if unknown:
+                raise ValidationError({'fields': [f'Неизвестное поле: {name}' for name in unknown]})
+            for name in list(self.fields):
+                if name not in fields:
+                    del self.fields[name]
+
+        for name, field in list(self.fields.items()):
+            subfields = fields.get(name) if fields else None
+            # Выбор вложенных полей раскрывает связь
+            if name in self.collapsed_fields and expand is not None and name not in expand and not subfields:
+                self.fields[name] = self.collapsed_fields[name]()
+                continue
+            nested = nested_serializer(field)
+            if isinstance(nested, SparseFieldsetMixin):
+                nested.prune(subfields, nested_expand(expand, name), path=f'{path}{name}.')
+            elif subfields:
+                raise ValidationError({'fields': [f'Поле {path}{name} не содержит вложенных полей']})
+
+
+def prefixed(lookup, prefetch):
+    if isinstance(prefetch, Prefetch):
+        return Prefetch(f'{lookup}__{prefetch.prefetch_through}', queryset=prefetch.queryset)
+    return f'{lookup}__{prefetch}'
+
+
+def load_plan(serializer):
+    """
+    Связи, которые читает усечённый сериализатор: (пути select_related, объекты и пути prefetch_related).
+    """
+    model = serializer.Meta.model
+    select, prefetch, required = [], [], []
+    for name, field in serializer.fields.items():
+        required.extend(serializer.required_lookups.get(name, ()))
+        lookup = serializer.relations.get(name)
+        if lookup is None:
+            continue
+        nested = nested_serializer(field)
+        if isinstance(nested, SparseFieldsetMixin):
+            nested_select, nested_prefetch = load_plan(nested)
+        elif field.source == lookup or field.source.startswith(lookup + '.'):
+            nested_select, nested_prefetch = [], []
+        else:
+            # Свёрнутая связь читает только внешний ключ
+            continue
+
+        relation = model._meta.get_field(lookup)
+        if relation.one_to_many or relation.many_to_many:
+            queryset = relation.related_model._default_manager.prefetch_related(*nested_prefetch)
+            # select_related() без аргументов присоединил бы все внешние ключи
+            if nested_select:
+                queryset = queryset.select_related(*nested_select)
+            prefetch.append(Prefetch(lookup, queryset=queryset))
+        else:
+            select.append(lookup)
+            select.extend(f'{lookup}__{path}' for path in nested_select)
+            prefetch.extend(prefixed(lookup, item) for item in nested_prefetch)
+    # Пути без queryset идут после Prefetch: уже загруженные уровни не запрашиваются повторно
+    return select, prefetch + required
+
+
+class SparseFieldsetViewMixin:
+    """
+    Представление с параметрами ?fields= и ?expand=: усечённый сериализатор и план загрузки под него.
+    """
+
+    def get_fieldset(self):
+        request = getattr(self, 'request', None)
+        if request is None:
+            # Генерация схемы OpenAPI: полный сериализатор
+            return {}
+        return {'fields': parse_fields(request.GET.get('fields')), 'expand': parse_expand(request.GET.get('expand'))}
+
+    def fieldset_serializer(self, serializer_class, *args, **kwargs):
+        return serializer_class(*args, **self.get_fieldset(), **kwargs)
+
+    def fieldset_queryset(self, queryset, serializer_class):
+        select, prefetch = load_plan(self.fieldset_serializer(serializer_class))
+        if select:
+            queryset = queryset.select_related(*select)
+        return queryset.prefetch_related(*prefetch)
+
+
+class SparseFieldsetListMixin(SparseFieldsetViewMixin):
+    """
+    То же для generic-представлений DRF: get_serializer создаёт усечённый сериализатор.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(*args, **self.get_fieldset(), **kwargs)
@@ -0,0 +1,91 @@
+"""
+Заголовок Idempotency-Key для изменяющих запросов.
+
+Клиент, повторяющий запрос после сбоя сети, передаёт тот же ключ. Первый запрос
+выполняется, его ответ сохраняется в кэше IDEMPOTENCY_CACHE на IDEMPOTENCY_KEY_TTL
+секунд; повтор получает сохранённый ответ (заголовок Idempotent-Replayed) без
+повторного выполнения. Параллельный дубликат ждёт короткую блокировку первого
+запроса, а не выполняется второй раз. Ключ с другим телом запроса — ошибка 422.
+"""
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+
+
+def cache_keys(user_id, path, key):
+    """
+    Ключи кэша для сохранённого ответа и блокировки.
+    """
+    digest = hashlib.sha256(f'{user_id}:{path}:{key}'.encode()).hexdigest()
+    return f'idempotency:{digest}', f'idempotency-lock:{digest}'
+
+
+def request_fingerprint(request):
+    content = json.dumps(request.data, cls=JSONEncoder, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method}:{content}'.encode()).hexdigest()
+
+
+def replay(stored, fingerprint):
+    if stored['fingerprint'] != fingerprint:
+        return Response({'Status': False, 'Error': f'{HEADER} уже использован с другим запросом'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return Response(stored['data'], status=stored['status'], headers={'Idempotent-Replayed': 'true'})
+
+
+def idempotent(handler):
+    """
+    Поддержка Idempotency-Key для метода представления DRF; без заголовка запрос выполняется как обычно.
+    """
+    @functools.wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return handler(self, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response({'Status': False, 'Error': f'{HEADER} должен содержать от 1 до {MAX_KEY_LENGTH} символов'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        cache = caches[settings.IDEMPOTENCY_CACHE]
+        response_key, lock_key = cache_keys(request.user.pk, request.path, key)
+        fingerprint = request_fingerprint(request)
+
+        # Ждём, пока параллельный запрос с тем же ключом сохранит ответ или отпустит блокировку
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while not cache.add(lock_key, True, settings.IDEMPOTENCY_LOCK_SECONDS):
+            stored = cache.get(response_key)
+            if stored is not None:
+                return replay(stored, fingerprint)
+            if time.monotonic() >= deadline:
+                return Response({'Status': False, 'Error': 'Запрос с этим ключом ещё выполняется'},
+                                status=status.HTTP_409_CONFLICT,
+                                headers={'Retry-After': str(settings.IDEMPOTENCY_LOCK_SECONDS)})
+            time.sleep(POLL_INTERVAL)
+
+        try:
+            stored = cache.get(response_key)
+            if stored is not None:
+                return replay(stored, fingerprint)
+            response = handler(self, request, *args, **kwargs)
+            # Ошибки сервера не сохраняются: повтор должен выполнить запрос заново
+            if isinstance(response, Response) and response.status_code < 500:
+                cache.set(
+                    response_key,
+                    {'fingerprint': fingerprint, 'status': response.status_code, 'data': response.data},
+                    settings.IDEMPOTENCY_KEY_TTL,
+                )
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    return wrapper
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from orders.snapshot import build_snapshot
+
+
+class Command(BaseCommand):
+    """
+    Сборка снимка каталога для /catalog/snapshot/ вне цикла загрузки прайсов.
+    """
+
+    help = 'Сборка gzip-снимка всего каталога в формате NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Пересобрать, даже если каталог не изменился')
+        parser.add_argument('--chunk-size', type=int, help='Товаров в одной выборке из базы')
+
+    def handle(self, *args, **options):
+        meta = build_snapshot(force=options['force'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Снимок {meta['file']}: {meta['products']} товаров, {meta['size']} байт, "
+            f"версия каталога {meta['catalog_version']}"
+        ))
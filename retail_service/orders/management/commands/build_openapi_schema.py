@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from retail_service.openapi import code_version, get_schema
+
+
+class Command(BaseCommand):
+    """
+    Сборка схемы OpenAPI для /api/schema/ при выкладке, до запуска воркеров.
+    """
+
+    help = 'Сборка и сохранение схемы OpenAPI для текущей версии кода'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Пересобрать, даже если схема актуальна')
+
+    def handle(self, *args, **options):
+        schemas = get_schema(rebuild=options['force'])
+        for schema_format, (content, content_hash) in schemas.items():
+            self.stdout.write(f'{schema_format}: {len(content)} bytes, {content_hash[:12]}')
+        self.stdout.write(self.style.SUCCESS(f'Схема OpenAPI для версии {code_version()} готова'))
@@ -0,0 +1,61 @@
+import json
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from kombu.exceptions import ChannelError
+from retail_service.celery import app
+
+
+def queue_backlog(connection, name):
+    """
+    Число сообщений в очереди брокера (для Redis — по всем уровням приоритета).
+    """
+    with connection.channel() as channel:
+        try:
+            return channel.queue_declare(queue=name, passive=True).message_count
+        except ChannelError:
+            # Очередь ещё не создана: в неё ничего не публиковали
+            return 0
+
+
+def worker_counts(timeout):
+    """
+    Задачи, выполняемые и зарезервированные воркерами, по очередям.
+    """
+    inspect = app.control.inspect(timeout=timeout)
+    counts = {'active': Counter(), 'reserved': Counter()}
+    for state, replies in (('active', inspect.active()), ('reserved', inspect.reserved())):
+        for tasks in (replies or {}).values():
+            counts[state].update(task['delivery_info'].get('routing_key') for task in tasks)
+    return counts
+
+
+class Command(BaseCommand):
+    """
+    Очереди задач Celery: сколько сообщений ждёт в брокере.
+    """
+
+    help = 'Текущая очередь задач Celery по очередям брокера'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', action='store_true', help='Добавить задачи, уже полученные воркерами')
+        parser.add_argument('--timeout', type=float, default=1.0, help='Ожидание ответа воркеров, секунд')
+        parser.add_argument('--json', action='store_true', help='Вывод в JSON')
+
+    def handle(self, *args, **options):
+        with app.connection_for_read() as connection:
+            rows = [{'queue': queue.name, 'backlog': queue_backlog(connection, queue.name)}
+                    for queue in app.conf.task_queues]
+        if options['workers']:
+            counts = worker_counts(options['timeout'])
+            for row in rows:
+                row['active'] = counts['active'][row['queue']]
+                row['reserved'] = counts['reserved'][row['queue']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows))
+            return
+        columns = list(rows[0])
+        self.stdout.write(''.join(f'{column:<16}' for column in columns).rstrip())
+        for row in rows:
+            self.stdout.write(''.join(f'{row[column]!s:<16}' for column in columns).rstrip())
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from orders.cleanup import CLEANUP_JOBS, run_cleanup
+
+
+class Command(BaseCommand):
+    """
+    Очистка устаревших строк вне расписания Celery beat.
+    """
+
+    help = 'Удаление брошенных корзин и устаревших токенов порциями'
+
+    def add_arguments(self, parser):
+        parser.add_argument('jobs', nargs='*', help=f'Виды строк: {", ".join(CLEANUP_JOBS)}; по умолчанию все')
+        parser.add_argument('--chunk-size', type=int, help='Строк в одной порции')
+        parser.add_argument('--dry-run', action='store_true', help='Только посчитать устаревшие строки')
+
+    def handle(self, *args, **options):
+        jobs = options['jobs'] or list(CLEANUP_JOBS)
+        unknown = set(jobs) - set(CLEANUP_JOBS)
+        if unknown:
+            raise CommandError(f'Неизвестные виды строк: {", ".join(sorted(unknown))}')
+
+        for job in jobs:
+            report = run_cleanup(job, chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+            if report['dry_run']:
+                self.stdout.write(f"{job}: к удалению {report['deleted']} строк")
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{job}: удалено {report['deleted']} строк за {report['chunks']} порций, {report['seconds']} с"
+                ))
@@ -0,0 +1,172 @@
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from orders.models import (
+    User, Shop, Category, Product, ProductInfo, Parameter, ProductParameter, Order, OrderItem, Contact,
+    STATE_CHOICES,
+)
+
+CITIES = ['Москва', 'Санкт-Петербург', 'Казань', 'Новосибирск', 'Екатеринбург']
+PARAMETER_VALUES = ['Black', 'White', 'Red', 'S', 'M', 'L', '64 GB', '128 GB', '256 GB']
+
+
+class Command(BaseCommand):
+    """
+    Генерация синтетического набора данных для нагрузочного тестирования.
+
+    Все объекты создаются через bulk_create пачками по --chunk-size без сигналов post_save.
+    Покупатели получают адреса вида <email-prefix><N>@example.com и общий пароль --password,
+    заказы равномерно распределяются по всем статусам STATE_CHOICES (не больше одной корзины
+    на пользователя).
+    """
+
+    help = 'Генерация синтетических магазинов, товаров, пользователей и заказов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shops', type=int, default=10)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--offers-per-product', type=int, default=3, help='Предложений магазинов на товар')
+        parser.add_argument('--parameters', type=int, default=10, help='Число различных параметров')
+        parser.add_argument('--parameters-per-offer', type=int, default=4)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--contacts-per-user', type=int, default=2)
+        parser.add_argument('--orders-per-user', type=int, default=5)
+        parser.add_argument('--items-per-order', type=int, default=3)
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--email-prefix', default='loadtest')
+        parser.add_argument('--password', default='loadtest')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.verbosity = options['verbosity']
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            shops = self.create_shops(options)
+            categories = self.create_categories(options, shops)
+            parameters = self.bulk_create(
+                Parameter, (Parameter(name=f'Parameter {index}') for index in range(options['parameters']))
+            )
+            products = self.bulk_create(Product, (
+                Product(category=self.random.choice(categories), name=f'Product {index}')
+                for index in range(options['products'])
+            ))
+            offers = self.create_offers(options, products, shops)
+            self.bulk_create(ProductParameter, (
+                ProductParameter(product_info=offer, parameter=parameter, value=self.random.choice(PARAMETER_VALUES))
+                for offer in offers
+                for parameter in self.random.sample(parameters, min(len(parameters), options['parameters_per_offer']))
+            ))
+            users = self.create_users(options)
+            contacts = self.bulk_create(Contact, (
+                Contact(
+                    user=user, last_name='Иванов', first_name='Иван', email=user.email,
+                    phone=f'+7900{index:07d}', city=self.random.choice(CITIES), street='Ленина', house=str(index % 100 + 1),
+                )
+                for user in users
+                for index in range(options['contacts_per_user'])
+            ))
+            orders = self.create_orders(options, users, contacts)
+            self.bulk_create(OrderItem, (
+                OrderItem(order=order, product=offer, quantity=self.random.randint(1, 5))
+                for order in orders
+                for offer in self.random.sample(offers, min(len(offers), options['items_per_order']))
+            ))
+
+        self.stdout.write(self.style.SUCCESS(f'Данные сгенерированы за {time.perf_counter() - started:.1f} с'))
+
+    def bulk_create(self, model, objects):
+        """
+        Вставка пачками: генератор материализуется не целиком, а по chunk_size объектов.
+        """
+        created = []
+        chunk = []
+        for obj in objects:
+            chunk.append(obj)
+            if len(chunk) >= self.chunk_size:
+                created += model.objects.bulk_create(chunk)
+                chunk = []
+        if chunk:
+            created += model.objects.bulk_create(chunk)
+        if self.verbosity:
+            self.stdout.write(f'{model.__name__}: {len(created)}')
+        return created
+
+    def create_shops(self, options):
+        offset = self.next_index(User, 'shop-')
+        password = make_password(options['password'])
+        users = self.bulk_create(User, (
+            User(email=f'shop-{offset + index}@example.com', password=password, type='shop')
+            for index in range(options['shops'])
+        ))
+        return self.bulk_create(Shop, (
+            Shop(name=f'Shop {offset + index}', url=f'https://shop{offset + index}.example.com', user=user)
+            for index, user in enumerate(users)
+        ))
+
+    def create_categories(self, options, shops):
+        categories = self.bulk_create(
+            Category, (Category(name=f'Category {index}') for index in range(options['categories']))
+        )
+        through = Category.shops.through
+        self.bulk_create(through, (
+            through(category=category, shop=shop)
+            for category in categories
+            for shop in self.random.sample(shops, min(len(shops), 3))
+        ))
+        return categories
+
+    def create_offers(self, options, products, shops):
+        # external_id уникален во всей таблице
+        external_id = ProductInfo.objects.aggregate(last=Max('external_id'))['last'] or 0
+        offers = []
+        for product in products:
+            for shop in self.random.sample(shops, min(len(shops), options['offers_per_product'])):
+                external_id += 1
+                price = Decimal(self.random.randint(100, 100000))
+                offers.append(ProductInfo(
+                    product=product, shop=shop, name=product.name, quantity=self.random.randint(0, 100),
+                    price=price, price_rrc=price * Decimal('1.2'), external_id=external_id,
+                ))
+        return self.bulk_create(ProductInfo, offers)
+
+    def create_users(self, options):
+        prefix = options['email_prefix']
+        offset = self.next_index(User, prefix)
+        # Хеш пароля вычисляется один раз: иначе генерация упирается в PBKDF2
+        password = make_password(options['password'])
+        return self.bulk_create(User, (
+            User(email=f'{prefix}{offset + index}@example.com', password=password, first_name='Иван', last_name='Иванов')
+            for index in range(options['users'])
+        ))
+
+    def create_orders(self, options, users, contacts):
+        statuses = [value for value, _ in STATE_CHOICES]
+        contacts_by_user = {}
+        for contact in contacts:
+            contacts_by_user.setdefault(contact.user_id, []).append(contact)
+
+        orders = []
+        for user in users:
+            user_contacts = contacts_by_user.get(user.id, [])
+            for index in range(options['orders_per_user']):
+                # Статусы по кругу со сдвигом на пользователя, корзина — только первая
+                status = statuses[(user.id + index) % len(statuses)]
+                if status == 'basket' and index >= len(statuses):
+                    status = 'new'
+                contact = None if status == 'basket' or not user_contacts else self.random.choice(user_contacts)
+                orders.append(Order(user=user, status=status, contact=contact))
+        return self.bulk_create(Order, orders)
+
+    @staticmethod
+    def next_index(model, prefix):
+        # Повторный запуск добавляет новых пользователей, не пересекаясь с уже созданными
+        return model.objects.filter(email__startswith=prefix).count()
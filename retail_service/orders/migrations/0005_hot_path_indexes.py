@@ -0,0 +1,50 @@
+# Generated by Django 5.1.1 on 2026-10-19 08:28
+
+from django.db import migrations, models
+
+
+def merge_duplicate_baskets(apps, schema_editor):
+    # Перед ограничением «одна корзина на пользователя» товары лишних корзин переносятся в самую раннюю
+    Order = apps.get_model("orders", "Order")
+    OrderItem = apps.get_model("orders", "OrderItem")
+    duplicates = (
+        Order.objects.filter(status="basket")
+        .values("user_id")
+        .annotate(baskets=models.Count("id"))
+        .filter(baskets__gt=1)
+    )
+    for row in duplicates:
+        basket, *extra = Order.objects.filter(user_id=row["user_id"], status="basket").order_by("id")
+        OrderItem.objects.filter(order__in=extra).update(order=basket)
+        Order.objects.filter(id__in=[order.id for order in extra]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0004_product_image_user_avatar"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["user", "status"], name="order_user_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="orderitem",
+            index=models.Index(fields=["order", "product"], name="orderitem_order_product_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="productinfo",
+            index=models.Index(fields=["product", "shop"], name="productinfo_product_shop_idx"),
+        ),
+        migrations.RunPython(merge_duplicate_baskets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="order",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "basket")),
+                fields=("user",),
+                name="order_one_basket_per_user",
+            ),
+        ),
+    ]
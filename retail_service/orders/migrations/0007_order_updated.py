@@ -0,0 +1,31 @@
+# Generated by Django 5.1.1 on 2026-10-19 09:20
+
+from django.db import migrations, models
+
+
+def copy_created(apps, schema_editor):
+    # Активность существующих заказов неизвестна: считаем последней записью создание
+    Order = apps.get_model("orders", "Order")
+    Order.objects.update(updated=models.F("dt"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0006_product_info_change_log"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="updated",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                condition=models.Q(("status", "basket")), fields=["updated"], name="order_basket_updated_idx"
+            ),
+        ),
+    ]
@@ -1,6 +1,8 @@
+import contextvars
+from decimal import Decimal
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from django_rest_passwordreset.tokens import get_token_generator
 from imagekit.models import ImageSpecField
 from imagekit.processors import ResizeToFill
 
@@ -116,8 +118,84 @@ class Product(models.Model):
     def __str__(self):
         return self.name
 
+# Удаление через QuerySet записывает журнал одним запросом вместо post_delete на каждый объект
+bulk_deleting_product_infos = contextvars.ContextVar('bulk_deleting_product_infos', default=False)
+# bulk_update выполняет update() с выражениями Case: журнал пишет сам bulk_update по объектам
+bulk_updating_product_infos = contextvars.ContextVar('bulk_updating_product_infos', default=False)
+
+
+# Массовые операции с предложениями тоже попадают в журнал изменений
+class ProductInfoQuerySet(models.QuerySet):
+    def delete(self):
+        rows = list(self.values_list('id', 'shop_id'))
+        token = bulk_deleting_product_infos.set(True)
+        try:
+            # Параметры — одним DELETE, без выборки строк для сигналов ProductParameter:
+            # удаление предложений и так записывается в журнал
+            ProductParameter.objects.filter(product_info_id__in=[pk for pk, _ in rows])._raw_delete(self.db)
+            deleted = super().delete()
+        finally:
+            bulk_deleting_product_infos.reset(token)
+        ProductInfoChange.record_many(rows, 'delete', [])
+        return deleted
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def update(self, **kwargs):
+        if bulk_updating_product_infos.get():
+            return super().update(**kwargs)
+        fields = [self.model._meta.get_field(name) for name in kwargs]
+        rows = list(self.values_list('id', 'shop_id', *(field.attname for field in fields)))
+        updated = super().update(**kwargs)
+        # В журнал — только поля, значение которых действительно меняется; выражения (F, Case)
+        # заранее не вычислить, такие поля считаются изменёнными
+        ProductInfoChange.record_updates(
+            ((pk, shop_id), [
+                field.name for field, old, new in zip(fields, values, kwargs.values())
+                if hasattr(new, 'resolve_expression')
+                or ProductInfo.normalize_value(field.name, old) != ProductInfo.normalize_value(field.name, new)
+            ])
+            for pk, shop_id, *values in rows
+        )
+        return updated
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        self.model.load_values(objs)
+        names = {self.model._meta.get_field(name).name for name in fields}
+        # Как в сигнале post_save: изменения, не видимые по полям модели, передаются в extra_changed_fields
+        changes = [
+            ((obj.pk, obj.shop_id),
+             [name for name in obj.changed_fields() if name in names] + getattr(obj, 'extra_changed_fields', []))
+            for obj in objs
+        ]
+        token = bulk_updating_product_infos.set(True)
+        try:
+            updated = super().bulk_update(objs, fields, *args, **kwargs)
+        finally:
+            bulk_updating_product_infos.reset(token)
+        ProductInfoChange.record_updates(changes)
+        for obj in objs:
+            obj.extra_changed_fields = []
+            obj.remember_values()
+        return updated
+
+    bulk_update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        ProductInfoChange.record_many(
+            [(obj.pk, obj.shop_id) for obj in objs if obj.pk is not None], 'create', list(ProductInfo.TRACKED_FIELDS),
+        )
+        return objs
+
+
 # Модель Информация о продукте
 class ProductInfo(models.Model):
+    # Поля, изменения которых записываются в журнал ProductInfoChange
+    TRACKED_FIELDS = ('product', 'shop', 'name', 'quantity', 'price', 'price_rrc', 'external_id')
+
     product = models.ForeignKey(Product, related_name='product_infos', on_delete=models.CASCADE)
     shop = models.ForeignKey(Shop, related_name='product_infos', on_delete=models.CASCADE)
     name = models.CharField(max_length=80)
@@ -126,9 +204,62 @@ class ProductInfo(models.Model):
     price_rrc = models.DecimalField(max_digits=10, decimal_places=2)
     external_id = models.IntegerField(unique=True)
 
+    objects = ProductInfoQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.product.name} from {self.shop.name}"
 
+    @classmethod
+    def load_values(cls, objs):
+        """
+        Прежние значения отслеживаемых полей из базы: читаются только перед записью
+        (pre_save, bulk_update), а не при каждой загрузке предложения в каталоге.
+        """
+        attnames = [cls._meta.get_field(name).attname for name in cls.TRACKED_FIELDS]
+        objs = [obj for obj in objs if not hasattr(obj, '_loaded_values')]
+        for start in range(0, len(objs), 500):
+            chunk = {obj.pk: obj for obj in objs[start:start + 500]}
+            for obj in chunk.values():
+                obj._loaded_values = {}
+            for pk, *values in cls._base_manager.filter(pk__in=chunk).values_list('pk', *attnames):
+                chunk[pk]._loaded_values = dict(zip(cls.TRACKED_FIELDS, values))
+
+    def remember_values(self):
+        self._loaded_values = {
+            name: getattr(self, self._meta.get_field(name).attname) for name in self.TRACKED_FIELDS
+            if self._meta.get_field(name).attname in self.__dict__
+        }
+
+    def changed_fields(self):
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return list(self.TRACKED_FIELDS)
+        return [
+            name for name in self.TRACKED_FIELDS
+            if name not in loaded or self.normalize_value(name, loaded[name])
+            != self.normalize_value(name, getattr(self, self._meta.get_field(name).attname))
+        ]
+
+    @classmethod
+    def normalize_value(cls, name, value):
+        """
+        Значение поля в том виде, в каком его вернёт база: цена 99.9 из YAML равна Decimal('99.90').
+        """
+        field = cls._meta.get_field(name)
+        if field.is_relation:
+            return getattr(value, 'pk', value)
+        if isinstance(field, models.DecimalField):
+            # float через str: Decimal(99.9) — это 99.900000000000005684...
+            value = field.to_python(str(value) if isinstance(value, float) else value)
+            return value if value is None else value.quantize(Decimal(1).scaleb(-field.decimal_places))
+        return field.to_python(value)
+
+    class Meta:
+        indexes = [
+            # Фильтр каталога по товару и магазину; ProductInfo(shop) покрывает индекс внешнего ключа
+            models.Index(fields=['product', 'shop'], name='productinfo_product_shop_idx'),
+        ]
+
 # Модель Параметр
 class Parameter(models.Model):
     name = models.CharField(max_length=40)
@@ -145,16 +276,91 @@ class ProductParameter(models.Model):
     def __str__(self):
         return f"{self.parameter.name}: {self.value}"
 
+# Журнал изменений предложений магазинов для инкрементальной синхронизации каталога
+class ProductInfoChange(models.Model):
+    OPERATION_CHOICES = (
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    )
+
+    # Первичный ключ служит версией каталога: растёт монотонно и не переиспользуется
+    id = models.BigAutoField(primary_key=True)
+    # Без внешних ключей: запись об удалении переживает само предложение
+    product_info_id = models.BigIntegerField()
+    shop_id = models.BigIntegerField()
+    op = models.CharField(max_length=6, choices=OPERATION_CHOICES)
+    changed_fields = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.op} product info {self.product_info_id} (version {self.id})"
+
+    @classmethod
+    def record(cls, product_info, op, changed_fields):
+        return cls.objects.create(
+            product_info_id=product_info.pk, shop_id=product_info.shop_id, op=op, changed_fields=changed_fields,
+        )
+
+    @classmethod
+    def record_many(cls, rows, op, changed_fields):
+        cls.objects.bulk_create(
+            cls(product_info_id=product_info_id, shop_id=shop_id, op=op, changed_fields=changed_fields)
+            for product_info_id, shop_id in rows
+        )
+
+    @classmethod
+    def record_updates(cls, changes):
+        # Пары ((id, shop_id), изменённые поля) одним запросом; строки без изменений пропускаются
+        cls.objects.bulk_create(
+            cls(product_info_id=product_info_id, shop_id=shop_id, op='update', changed_fields=changed_fields)
+            for (product_info_id, shop_id), changed_fields in changes if changed_fields
+        )
+
+    @classmethod
+    def latest_version(cls):
+        return cls.objects.aggregate(version=models.Max('id'))['version'] or 0
+
+# Правки товаров, категорий, магазинов и параметров: их данные входят в предложения
+# (/products/batch/) и снимок каталога, но не в журнал ProductInfoChange
+class CatalogRevision(models.Model):
+    # Первичный ключ — номер правки: растёт монотонно, как версия журнала предложений
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=40)
+    object_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} (revision {self.id})"
+
+    @classmethod
+    def latest(cls):
+        return cls.objects.aggregate(revision=models.Max('id'))['revision'] or 0
+
 # Модель Заказ
 class Order(models.Model):
     user = models.ForeignKey(User, related_name='orders', on_delete=models.CASCADE)
     dt = models.DateTimeField(auto_now_add=True)
+    # Последнее изменение; корзина обновляется при каждой записи в неё (CartView)
+    updated = models.DateTimeField(auto_now=True)
     status = models.CharField(choices=STATE_CHOICES, max_length=15)
     contact = models.ForeignKey('Contact', on_delete=models.SET_NULL, null=True, blank=True)
 
     def __str__(self):
         return f"Order {self.id} by {self.user.email}"
 
+    class Meta:
+        indexes = [
+            # Корзина и история заказов пользователя
+            models.Index(fields=['user', 'status'], name='order_user_status_idx'),
+            # Очистка брошенных корзин (orders.cleanup)
+            models.Index(fields=['updated'], condition=models.Q(status='basket'), name='order_basket_updated_idx'),
+        ]
+        constraints = [
+            # Не больше одной корзины на пользователя
+            models.UniqueConstraint(fields=['user'], condition=models.Q(status='basket'), name='order_one_basket_per_user'),
+        ]
+
 # Модель Элемент заказа
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name='ordered_items', on_delete=models.CASCADE)
@@ -164,6 +370,12 @@ class OrderItem(models.Model):
     def __str__(self):
         return f"{self.quantity} of {self.product.name}"
 
+    class Meta:
+        indexes = [
+            # Удаление товаров из корзины
+            models.Index(fields=['order', 'product'], name='orderitem_order_product_idx'),
+        ]
+
 # Модель Контакт
 class Contact(models.Model):
     user = models.ForeignKey(User, related_name='contacts', on_delete=models.CASCADE)
@@ -196,6 +408,8 @@ class ConfirmEmailToken(models.Model):
     @staticmethod
     def generate_key():
         """Generate a random token"""
+        from django_rest_passwordreset.tokens import get_token_generator
+
         return get_token_generator().generate_token()
 
     def save(self, *args, **kwargs):
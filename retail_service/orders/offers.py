@@ -0,0 +1,64 @@
+"""
+Предложения магазинов по списку идентификаторов с кэшем на каждое предложение.
+
+Сериализованное предложение хранится в кэше под ключом с идентификатором и версией
+каталога: версией журнала ProductInfoChange и номером правки CatalogRevision (предложение
+включает название товара, категорию, магазин и параметры). Пакет читается одним get_many, из базы одним
+запросом (и одним prefetch характеристик) выбираются только промахи, они же одним
+set_many попадают в кэш. Любое изменение каталога меняет версию, и устаревшие записи
+просто перестают читаться, пока не истечёт их срок.
+"""
+from cachalot.api import cachalot_disabled
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+from .models import ProductInfo, ProductInfoChange, ProductParameter, CatalogRevision
+from .serializers import ProductOfferSerializer
+
+
+def offer_cache_key(version, product_info_id):
+    return f'product_offer:{version}:{product_info_id}'
+
+
+def catalog_version():
+    return f'{ProductInfoChange.latest_version()}.{CatalogRevision.latest()}'
+
+
+def parse_ids(value):
+    """
+    Идентификаторы из '1,2,3' или списка без повторов и с сохранением порядка; ValueError — не числа.
+    """
+    if isinstance(value, str):
+        value = value.split(',')
+    ids = [int(item) for item in value if str(item).strip()]
+    if any(product_info_id < 1 for product_info_id in ids):
+        raise ValueError(value)
+    return list(dict.fromkeys(ids))
+
+
+def get_offers(ids):
+    """
+    Сериализованные предложения {id: данные}; отсутствующих в каталоге идентификаторов в словаре нет.
+    """
+    version = catalog_version()
+    keys = {offer_cache_key(version, product_info_id): product_info_id for product_info_id in ids}
+    offers = {keys[key]: data for key, data in cache.get_many(keys).items()}
+
+    misses = [product_info_id for product_info_id in ids if product_info_id not in offers]
+    if misses:
+        queryset = (
+            ProductInfo.objects.filter(id__in=misses)
+            .select_related('shop', 'product__category')
+            .prefetch_related(Prefetch(
+                'product_parameters', queryset=ProductParameter.objects.select_related('parameter'),
+            ))
+        )
+        # Произвольные наборы id в кэше запросов не нужны: предложения уже кэшируются поштучно
+        with cachalot_disabled():
+            fetched = {data['id']: dict(data) for data in ProductOfferSerializer(queryset, many=True).data}
+        cache.set_many(
+            {offer_cache_key(version, product_info_id): data for product_info_id, data in fetched.items()},
+            settings.PRODUCT_BATCH_CACHE_TIMEOUT,
+        )
+        offers.update(fetched)
+    return offers
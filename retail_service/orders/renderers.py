@@ -0,0 +1,64 @@
+"""
+Рендереры и парсеры ответов API.
+
+ORJSONRenderer заменяет JSONRenderer DRF: orjson кодирует словари, списки, строки,
+datetime и UUID без Python-кода на каждый объект; Decimal и прочие типы проходят через
+JSONEncoder DRF. Ответ совпадает с JSONRenderer при UNICODE_JSON и COMPACT_JSON
+по умолчанию.
+
+MessagePackRenderer и MessagePackParser — тот же ответ в MessagePack для внутренних
+сервисов: выбирается заголовком Accept: application/msgpack или ?format=msgpack.
+"""
+import msgpack
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from retail_service.instrumentation import timed_section
+
+# UTC как «Z», ключи-числа как строки — так же, как JSONEncoder DRF
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+# Типы, которые orjson и msgpack не кодируют сами (msgpack — в том числе datetime и UUID):
+# Decimal вне DecimalField, ленивые строки, timedelta, QuerySet — как в ответах JSONRenderer
+default = JSONEncoder().default
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        options = ORJSON_OPTIONS
+        # Форматирование по запросу клиента: Accept: application/json; indent=2
+        if accepted_media_type and 'indent=' in accepted_media_type:
+            options |= orjson.OPT_INDENT_2
+        with timed_section('render'):
+            return orjson.dumps(data, default=default, option=options)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with timed_section('render'):
+            return msgpack.packb(data, default=default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
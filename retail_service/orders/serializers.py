@@ -1,8 +1,30 @@
 from rest_framework import serializers
-from .models import User, Product, Order, OrderItem, Contact, ProductParameter, ProductInfo
+from retail_service.instrumentation import timed_section
+from .fieldsets import SparseFieldsetMixin
+from .models import User, Product, Order, OrderItem, Contact, ProductParameter, ProductInfo, ProductInfoChange
+
+# Список объектов с учётом времени сериализации (заголовок Server-Timing)
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with timed_section('serializer'):
+            return super().data
+
+# Базовый сериализатор с учётом времени сериализации
+class TimedModelSerializer(serializers.ModelSerializer):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = getattr(cls, 'Meta', None)
+        if meta is not None and not hasattr(meta, 'list_serializer_class'):
+            meta.list_serializer_class = TimedListSerializer
+
+    @property
+    def data(self):
+        with timed_section('serializer'):
+            return super().data
 
 # Сериализатор для модели User
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedModelSerializer):
     class Meta:
         model = User
         fields = ['first_name', 'last_name', 'email', 'password', 'type', 'avatar']
@@ -33,45 +55,84 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 # Сериализатор для параметров продукта
-class ProductParameterSerializer(serializers.ModelSerializer):
+class ProductParameterSerializer(SparseFieldsetMixin, TimedModelSerializer):
     parameter = serializers.CharField(source='parameter.name')
 
+    relations = {'parameter': 'parameter'}
+
     class Meta:
         model = ProductParameter
         fields = ['parameter', 'value']
 
 # Сериализатор для информации о продукте
-class ProductInfoSerializer(serializers.ModelSerializer):
+class ProductInfoSerializer(SparseFieldsetMixin, TimedModelSerializer):
     shop = serializers.CharField(source='shop.name')
     characteristics = ProductParameterSerializer(source='product_parameters', many=True)
 
+    relations = {'shop': 'shop', 'characteristics': 'product_parameters'}
+    # Без ?expand=shop — идентификатор магазина вместо названия
+    collapsed_fields = {'shop': lambda: serializers.IntegerField(source='shop_id')}
+
     class Meta:
         model = ProductInfo
         fields = ['id', 'name', 'price', 'price_rrc', 'quantity', 'shop', 'characteristics']
 
+# Сериализатор для предложения магазина с данными товара (/products/batch/)
+class ProductOfferSerializer(ProductInfoSerializer):
+    product = serializers.IntegerField(source='product_id')
+    product_name = serializers.CharField(source='product.name')
+    category = serializers.CharField(source='product.category.name')
+
+    class Meta(ProductInfoSerializer.Meta):
+        fields = ['id', 'product', 'product_name', 'category', *ProductInfoSerializer.Meta.fields[1:]]
+
 # Сериализатор для продуктов
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, TimedModelSerializer):
     category = serializers.CharField(source='category.name')
     product_infos = ProductInfoSerializer(many=True)
 
+    relations = {'category': 'category', 'product_infos': 'product_infos'}
+    collapsed_fields = {
+        'product_infos': lambda: serializers.PrimaryKeyRelatedField(many=True, read_only=True),
+    }
+
     class Meta:
         model = Product
         fields = ['id', 'name', 'category', 'product_infos']
 
+# Сериализатор для журнала изменений каталога
+class ProductInfoChangeSerializer(TimedModelSerializer):
+    version = serializers.IntegerField(source='id')
+    product_info = serializers.IntegerField(source='product_info_id')
+    shop = serializers.IntegerField(source='shop_id')
+
+    class Meta:
+        model = ProductInfoChange
+        fields = ['version', 'product_info', 'shop', 'op', 'changed_fields', 'created_at']
+
 # Сериализатор для товаров в заказе
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(SparseFieldsetMixin, TimedModelSerializer):
     product_info = ProductInfoSerializer(source='product')
 
+    relations = {'product_info': 'product'}
+    collapsed_fields = {'product_info': lambda: serializers.IntegerField(source='product_id')}
+
     class Meta:
         model = OrderItem
         fields = ['id', 'product_info', 'quantity']
 
 # Сериализатор для заказов
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsetMixin, TimedModelSerializer):
     items = OrderItemSerializer(source='ordered_items', many=True)
     total_sum = serializers.SerializerMethodField()
     status = serializers.CharField(source='get_status_display')
 
+    relations = {'items': 'ordered_items'}
+    collapsed_fields = {
+        'items': lambda: serializers.PrimaryKeyRelatedField(source='ordered_items', many=True, read_only=True),
+    }
+    required_lookups = {'total_sum': ['ordered_items__product']}
+
     class Meta:
         model = Order
         fields = ['id', 'dt', 'status', 'items', 'total_sum']
@@ -80,8 +141,17 @@ class OrderSerializer(serializers.ModelSerializer):
         # Вычисляем общую сумму заказа
         return sum(item.quantity * item.product.price_rrc for item in obj.ordered_items.all())
 
+# Сериализатор для заказов в ленте магазина: строки агрегированного запроса shop.orders
+class PartnerOrderSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='order_id')
+    dt = serializers.DateTimeField()
+    status = serializers.CharField()
+    items = serializers.IntegerField()
+    quantity = serializers.IntegerField(source='total_quantity')
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+
 # Сериализатор для контактов
-class ContactSerializer(serializers.ModelSerializer):
+class ContactSerializer(TimedModelSerializer):
     class Meta:
         model = Contact
         fields = ['id', 'last_name', 'first_name', 'middle_name', 'email', 'phone', 'city', 'street', 'house', 'building', 'apartment']
@@ -1,6 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from .models import User, Product
+from .models import (
+    User, Shop, Category, Product, Parameter, ProductInfo, ProductParameter, ProductInfoChange, CatalogRevision,
+    bulk_deleting_product_infos,
+)
 from .tasks import generate_avatar_thumbnail, generate_product_image_thumbnail
 
 @receiver(post_save, sender=User)
@@ -11,4 +14,65 @@ def trigger_avatar_thumbnail(sender, instance, **kwargs):
 @receiver(post_save, sender=Product)
 def trigger_product_image_thumbnail(sender, instance, **kwargs):
     if instance.image:
-        generate_product_image_thumbnail.delay(instance.id)
\ No newline at end of file
+        generate_product_image_thumbnail.delay(instance.id)
+
+@receiver(pre_save, sender=ProductInfo)
+def load_product_info_values(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    ProductInfo.load_values([instance])
+
+@receiver(post_save, sender=ProductInfo)
+def record_product_info_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        changed_fields = list(ProductInfo.TRACKED_FIELDS)
+    else:
+        changed_fields = instance.changed_fields()
+        if update_fields is not None:
+            changed_fields = [name for name in changed_fields if name in update_fields]
+    # Изменения, не видимые по полям модели (например, параметры при импорте)
+    changed_fields += getattr(instance, 'extra_changed_fields', [])
+    instance.extra_changed_fields = []
+    if changed_fields:
+        ProductInfoChange.record(instance, 'create' if created else 'update', changed_fields)
+    instance.remember_values()
+
+@receiver(post_delete, sender=ProductInfo)
+def record_product_info_delete(sender, instance, **kwargs):
+    # Удаление через ProductInfoQuerySet.delete уже записано одним запросом
+    if bulk_deleting_product_infos.get():
+        return
+    ProductInfoChange.record(instance, 'delete', [])
+
+# Изменение и удаление связанных с предложениями моделей меняет версию каталога (CatalogRevision):
+# кэш предложений и снимок каталога перестают считаться актуальными. Новые объекты
+# существующих предложений не меняют
+@receiver(post_save, sender=Shop)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Parameter)
+@receiver(post_delete, sender=Shop)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Parameter)
+def record_catalog_revision(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw:
+        return
+    CatalogRevision.objects.create(model=sender._meta.label_lower, object_id=instance.pk)
+
+# Параметры — часть ответа о предложении: их изменение пишется в журнал как изменение предложения
+# и меняет версию каталога. Загрузка прайса заменяет параметры без сигналов и пишет журнал
+# по предложениям сама; удаление вместе с предложением, товаром или магазином уже записано
+# как удаление предложения
+@receiver(post_save, sender=ProductParameter)
+@receiver(post_delete, sender=ProductParameter)
+def record_product_parameter_change(sender, instance, raw=False, origin=None, **kwargs):
+    if raw:
+        return
+    if origin is not None and getattr(origin, 'model', type(origin)) not in (ProductParameter, Parameter):
+        return
+    ProductInfoChange.record_many(
+        ProductInfo.objects.filter(pk=instance.product_info_id).values_list('id', 'shop_id'), 'update', ['parameters'],
+    )
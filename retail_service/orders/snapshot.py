@@ -0,0 +1,153 @@
+"""
+Снимок всего каталога: NDJSON, сжатый gzip.
+
+Одна строка файла — товар с предложениями магазинов и характеристиками в том же виде,
+что и элемент выдачи /products/. Снимок собирается после каждой загрузки прайса
+(задача build_catalog_snapshot) или командой build_catalog_snapshot; товары читаются
+через queryset.iterator(chunk_size), поэтому память не зависит от размера каталога.
+
+Файл хранится в CATALOG_SNAPSHOT_DIR под именем с хешем содержимого, рядом — метаданные
+с ETag, версией каталога из журнала ProductInfoChange и номером правки CatalogRevision
+(товары, категории, магазины и параметры): снимок пересобирается, если изменилось
+любое из двух. Кроме загрузки прайса, сборку раз в 15 минут запускает celery beat —
+так в снимок попадают и правки товаров в админке. Эндпоинт скачивания отдаёт
+готовый файл как есть, без сериализации на каждый запрос.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from cachalot.api import cachalot_disabled
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from retail_service.openapi import write_atomic
+from .models import Product, ProductInfoChange, CatalogRevision
+from .serializers import ProductSerializer
+
+META_FILE = 'catalog.meta.json'
+FILE_PATTERN = 'catalog-*.ndjson.gz'
+# Предыдущий снимок остаётся на диске, пока его могут докачивать по Range
+KEEP_SNAPSHOTS = 2
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def snapshot_dir():
+    return Path(settings.CATALOG_SNAPSHOT_DIR)
+
+
+def read_snapshot_meta():
+    try:
+        return json.loads((snapshot_dir() / META_FILE).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def snapshot_path(meta):
+    return snapshot_dir() / meta['file']
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(READ_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_product_lines(chunk_size):
+    from .api_views import PRODUCT_PREFETCH
+
+    queryset = Product.objects.select_related('category').prefetch_related(*PRODUCT_PREFETCH).order_by('id')
+    for product in queryset.iterator(chunk_size=chunk_size):
+        yield json.dumps(ProductSerializer(product).data, cls=DjangoJSONEncoder, ensure_ascii=False).encode() + b'\n'
+
+
+def build_snapshot(force=False, chunk_size=None):
+    """
+    Сборка снимка, если каталог изменился с прошлой сборки; возвращает метаданные.
+    """
+    version = ProductInfoChange.latest_version()
+    revision = CatalogRevision.latest()
+    meta = read_snapshot_meta()
+    if (
+        not force and meta is not None and snapshot_path(meta).exists()
+        and (meta['catalog_version'], meta.get('catalog_revision')) == (version, revision)
+    ):
+        return meta
+
+    directory = snapshot_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    products = 0
+    try:
+        # mtime=0: одинаковый каталог даёт одинаковый файл и тот же ETag
+        with os.fdopen(descriptor, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as compressed:
+            # Выборка всего каталога не должна попадать в кэш запросов
+            with cachalot_disabled():
+                for line in iter_product_lines(chunk_size or settings.CATALOG_SNAPSHOT_CHUNK_SIZE):
+                    compressed.write(line)
+                    products += 1
+        etag = file_hash(temporary)
+        path = directory / f'catalog-{etag[:16]}.ndjson.gz'
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+    meta = {
+        'file': path.name,
+        'etag': etag,
+        'size': path.stat().st_size,
+        'products': products,
+        'catalog_version': version,
+        'catalog_revision': revision,
+        'built_at': timezone.now().isoformat(),
+    }
+    write_atomic(directory / META_FILE, json.dumps(meta).encode())
+
+    snapshots = sorted(directory.glob(FILE_PATTERN), key=lambda snapshot: snapshot.stat().st_mtime, reverse=True)
+    for stale in snapshots[KEEP_SNAPSHOTS:]:
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return meta
+
+
+def parse_range(header, size):
+    """
+    Один диапазон байтов из заголовка Range: (start, end) включительно.
+
+    None — заголовка нет, он некорректен или содержит несколько диапазонов: отдаётся весь файл.
+    ValueError — диапазон за пределами файла (416 Range Not Satisfiable).
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    start, separator, end = header[len('bytes='):].strip().partition('-')
+    if not separator or not (start or end) or not all(part.isdigit() for part in (start, end) if part):
+        return None
+    if not start:
+        # Суффикс: последние end байтов
+        if int(end) == 0:
+            raise ValueError(header)
+        return max(size - int(end), 0), size - 1
+    start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def iter_file_range(file, start, length):
+    file.seek(start)
+    try:
+        while length > 0:
+            chunk = file.read(min(READ_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
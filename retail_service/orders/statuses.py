@@ -0,0 +1,82 @@
+"""
+Переходы заказа по статусам: new → confirmed → assembled → sent → delivered.
+
+Отменить можно заказ, ещё не переданный в доставку. Корзина становится новым заказом
+только через подтверждение (/confirm-order/), поэтому здесь переходов из basket нет.
+
+transition_orders переводит сразу много заказов одним UPDATE: строки заказов блокируются
+до проверки статусов, поэтому параллельный запрос не изменит их между проверкой и записью.
+Уведомления покупателям ставятся одной задачей на весь пакет после фиксации.
+
+Заказ с товарами нескольких магазинов ни один из них не переводит: его статус меняет
+сотрудник (is_staff) через тот же эндпоинт shop/orders/status/.
+"""
+from django.db import transaction
+from django.db.models import Count, Q
+from .models import Order, STATE_CHOICES
+
+TRANSITIONS = {
+    'basket': set(),
+    'new': {'confirmed', 'canceled'},
+    'confirmed': {'assembled', 'canceled'},
+    'assembled': {'sent', 'canceled'},
+    'sent': {'delivered'},
+    'delivered': set(),
+    'canceled': set(),
+}
+STATUSES = dict(STATE_CHOICES)
+
+
+def can_transition(current, target):
+    return target in TRANSITIONS.get(current, ())
+
+
+def sources_for(target):
+    """
+    Статусы, из которых допустим переход в target.
+    """
+    return {status for status, targets in TRANSITIONS.items() if target in targets}
+
+
+def transition_orders(order_ids, target, shop=None):
+    """
+    Перевод заказов в статус target; (переведённые id, {id: причина отказа}).
+
+    Для магазина переводятся только заказы, все позиции которых — его товары:
+    общий статус заказа нескольких магазинов один магазин не меняет. Без shop
+    (сотрудник) переводятся любые заказы.
+    """
+    from .tasks import send_order_status_emails
+
+    if target not in STATUSES:
+        raise ValueError(f'Неизвестный статус {target}')
+    sources = sources_for(target)
+
+    rejected, eligible = {}, []
+    with transaction.atomic():
+        # Блокировка до проверки: статус не меняется между проверкой и UPDATE,
+        # поэтому переведёнными считаются ровно проверенные заказы
+        found = dict(Order.objects.select_for_update().filter(id__in=order_ids).values_list('id', 'status'))
+        items = {}
+        if shop is not None:
+            items = {
+                order['id']: order for order in Order.objects.filter(id__in=found).values('id').annotate(
+                    own_items=Count('ordered_items', filter=Q(ordered_items__product__shop=shop)),
+                    other_items=Count('ordered_items', filter=~Q(ordered_items__product__shop=shop)),
+                )
+            }
+        for order_id in order_ids:
+            current = found.get(order_id)
+            if current is None or (shop is not None and not items[order_id]['own_items']):
+                rejected[order_id] = 'Заказ не найден'
+            elif shop is not None and items[order_id]['other_items']:
+                rejected[order_id] = 'В заказе есть товары других магазинов: статус меняет администратор'
+            elif current not in sources:
+                rejected[order_id] = f'Переход {current} → {target} недопустим'
+            else:
+                eligible.append(order_id)
+
+        if eligible:
+            Order.objects.filter(id__in=eligible).update(status=target)
+            transaction.on_commit(lambda: send_order_status_emails.delay(eligible, target))
+    return eligible, rejected
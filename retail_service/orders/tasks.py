@@ -1,13 +1,18 @@
 from __future__ import absolute_import, unicode_literals
+from smtplib import SMTPException
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.mail import send_mail, send_mass_mail
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.apps import apps
 
 User = get_user_model()
 
-@shared_task
+# Повтор отправки письма при недоступном почтовом сервере
+MAIL_RETRY = {'autoretry_for': (SMTPException, OSError), 'retry_backoff': True, 'max_retries': 3}
+
+# Ошибки SMTP и сети не скрываются: задача повторяется, а исчерпав попытки, попадает в метрики ошибок
+@shared_task(priority=5, rate_limit='100/m', **MAIL_RETRY)
 def send_welcome_email(user_id):
     """
     Отправка приветственного email после регистрации пользователя.
@@ -22,10 +27,8 @@ def send_welcome_email(user_id):
         return f"Welcome email for user {user_id} was sent."
     except User.DoesNotExist:
         return f"User with ID {user_id} not found."
-    except Exception as e:
-        return f"Error when sending welcome email: {str(e)}"
 
-@shared_task
+@shared_task(priority=0, rate_limit='300/m', **MAIL_RETRY)
 def send_order_confirmation_email(order_id):
     """
     Отправка подтверждающего email пользователю после подтверждения заказа.
@@ -42,10 +45,27 @@ def send_order_confirmation_email(order_id):
         return f"Order confirmation email for order #{order.id} has been sent."
     except Order.DoesNotExist:
         return f"Order with ID {order_id} not found."
-    except Exception as e:
-        return f"Error when sending confirmation email: {str(e)}"
 
-@shared_task
+@shared_task(priority=3, rate_limit='10/m', **MAIL_RETRY)
+def send_order_status_emails(order_ids, status):
+    """
+    Письма покупателям о смене статуса заказов: одна задача и одно SMTP-соединение на пакет.
+    """
+    Order = apps.get_model('orders', 'Order')
+    orders = Order.objects.filter(id__in=order_ids).select_related('user')
+    messages = []
+    for order in orders:
+        messages.append((
+            f"Order #{order.id}: {order.get_status_display()}",
+            f"Hello, {order.user.first_name or order.user.email}! "
+            f"The status of your order #{order.id} is now: {order.get_status_display()}.",
+            settings.DEFAULT_FROM_EMAIL,
+            [order.user.email],
+        ))
+    sent = send_mass_mail(messages)
+    return f"Status emails sent for {sent} of {len(order_ids)} orders ({status})."
+
+@shared_task(priority=0)
 def process_order(order_id):
     """
     Обработка заказа
@@ -57,10 +77,9 @@ def process_order(order_id):
         return f"Order #{order.id} processed."
     except Order.DoesNotExist:
         return f"Order #{order_id} not found."
-    except Exception as e:
-        return f"Error during order processing: {str(e)}"
     
-@shared_task
+# Обработка изображений: подтверждение после выполнения, повтор при падении воркера
+@shared_task(priority=3, rate_limit='20/s', acks_late=True, reject_on_worker_lost=True)
 def generate_avatar_thumbnail(user_id):
     try:
         user = User.objects.get(id=user_id)
@@ -69,7 +88,7 @@ def generate_avatar_thumbnail(user_id):
     except User.DoesNotExist:
         pass
 
-@shared_task
+@shared_task(priority=6, rate_limit='20/s', acks_late=True, reject_on_worker_lost=True)
 def generate_product_image_thumbnail(product_id):
     try:
         Product = apps.get_model('orders', 'Product')
@@ -79,6 +98,26 @@ def generate_product_image_thumbnail(product_id):
     except Product.DoesNotExist:
         pass
 
+@shared_task(priority=9, acks_late=True, reject_on_worker_lost=True)
+def build_catalog_snapshot():
+    """
+    Пересборка снимка каталога для /catalog/snapshot/ после загрузки прайса и по расписанию.
+    """
+    from .snapshot import build_snapshot
+
+    meta = build_snapshot()
+    return f"Catalog snapshot {meta['file']} for version {meta['catalog_version']} is ready."
+
+@shared_task(priority=9)
+def cleanup_stale_rows(job):
+    """
+    Периодическая очистка устаревших строк одного вида (CELERY_BEAT_SCHEDULE).
+    """
+    from .cleanup import run_cleanup
+
+    report = run_cleanup(job)
+    return f"Cleanup {job}: {report['deleted']} rows removed in {report['seconds']}s."
+
 @shared_task
 def test_task():
     print("Test task executed successfully!")
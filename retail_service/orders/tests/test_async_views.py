@@ -0,0 +1,112 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, AsyncRequestFactory, override_settings
+from rest_framework.test import APIClient
+from rest_framework.authtoken.models import Token
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from ..async_views import AsyncProductListView, AsyncCartView, AsyncOrderListView
+from ..models import Category, Product, ProductInfo, Shop, Parameter, ProductParameter, Order, OrderItem
+
+User = get_user_model()
+
+
+# Тесты асинхронных вариантов представлений: ответы должны совпадать с синхронными
+class AsyncViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='asyncuser@example.com', password='asyncpassword123')
+        cls.token = Token.objects.create(user=cls.user)
+
+        shop = Shop.objects.create(name='Async Shop')
+        category = Category.objects.create(name='Async Category')
+        parameter = Parameter.objects.create(name='Color')
+        for index in range(3):
+            product = Product.objects.create(name=f'Product {index}', category=category)
+            product_info = ProductInfo.objects.create(
+                product=product, shop=shop, name=f'Model {index}', quantity=5,
+                price=100 + index, price_rrc=120 + index, external_id=index + 1,
+            )
+            ProductParameter.objects.create(product_info=product_info, parameter=parameter, value='Red')
+
+        cls.cart = Order.objects.create(user=cls.user, status='basket')
+        OrderItem.objects.create(order=cls.cart, product=product_info, quantity=2)
+        order = Order.objects.create(user=cls.user, status='new')
+        OrderItem.objects.create(order=order, product=product_info, quantity=1)
+
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+        self.headers = {'Authorization': 'Token ' + self.token.key}
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    async def test_product_list(self):
+        request = self.factory.get('/products/', headers=self.headers)
+        response = await AsyncProductListView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        await self.async_assert_same_as_sync(response, 'product-list')
+
+    async def test_product_list_filter(self):
+        request = self.factory.get('/products/', {'search': 'Model 1'}, headers=self.headers)
+        response = await AsyncProductListView.as_view()(request)
+        self.assertEqual([product['name'] for product in self.json(response)], ['Product 1'])
+
+    async def test_product_list_not_cached(self):
+        request = self.factory.get('/products/', headers=self.headers)
+        await AsyncProductListView.as_view()(request)
+        await Product.objects.filter(name='Product 0').aupdate(name='Renamed')
+
+        response = await AsyncProductListView.as_view()(request)
+        self.assertIn('Renamed', [product['name'] for product in self.json(response)])
+        await self.async_assert_same_as_sync(response, 'product-list')
+
+    async def test_cart(self):
+        request = self.factory.get('/cart/', headers=self.headers)
+        response = await AsyncCartView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.json(response)['items'][0]['quantity'], 2)
+        await self.async_assert_same_as_sync(response, 'cart')
+
+    async def test_order_list(self):
+        request = self.factory.get('/orders/', headers=self.headers)
+        response = await AsyncOrderListView.as_view()(request)
+        self.assertEqual(len(self.json(response)), 1)
+        await self.async_assert_same_as_sync(response, 'order-list')
+
+    async def test_order_list_fieldset(self):
+        params = {'fields': 'id,total_sum,items.product_info', 'expand': ''}
+        request = self.factory.get('/orders/', params, headers=self.headers)
+        response = await AsyncOrderListView.as_view()(request)
+        self.assertEqual(set(self.json(response)[0]), {'id', 'total_sum', 'items'})
+        await self.async_assert_same_as_sync(response, 'order-list', params)
+
+        request = self.factory.get('/cart/', {'fields': 'unknown'}, headers=self.headers)
+        self.assertEqual((await AsyncCartView.as_view()(request)).status_code, 400)
+
+    async def test_throttled(self):
+        await sync_to_async(caches['throttle'].clear)()
+        rates = {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'orders': '1/day'}
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}):
+            request = self.factory.get('/orders/', headers=self.headers)
+            first = await AsyncOrderListView.as_view()(request)
+            second = await AsyncOrderListView.as_view()(request)
+        self.assertEqual((first.status_code, second.status_code), (200, 429))
+        self.assertGreater(int(second.headers['Retry-After']), 0)
+
+    async def test_unauthenticated_access(self):
+        request = self.factory.get('/orders/')
+        response = await AsyncOrderListView.as_view()(request)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.headers['WWW-Authenticate'], 'Token')
+
+    def json(self, response):
+        return json.loads(response.content)
+
+    async def async_assert_same_as_sync(self, response, url_name, params=None):
+        # Сравнение с ответом синхронного представления DRF
+        sync_response = await sync_to_async(self.client.get)(reverse(url_name), params)
+        self.assertEqual(response.status_code, sync_response.status_code)
+        self.assertJSONEqual(response.content, sync_response.content.decode())
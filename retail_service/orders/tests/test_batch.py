@@ -0,0 +1,122 @@
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import ResolverMatch, reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from ..async_views import AsyncCartView
+from ..batch import resolve_references
+from ..models import User, Shop, Category, Product, ProductInfo, Order, OrderItem, Contact
+
+CONTACT = {
+    'last_name': 'Last', 'first_name': 'First', 'email': 'contact@example.com', 'phone': '1234567890',
+    'city': 'City', 'street': 'Street', 'house': '1',
+}
+
+
+# Тесты для пакета операций
+@patch('orders.tasks.process_order.delay')
+@patch('orders.tasks.send_order_confirmation_email.delay')
+class BatchTest(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.user = User.objects.create_user(email='batch@example.com', password='password')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        shop = Shop.objects.create(name='Batch Shop')
+        product = Product.objects.create(name='Product', category=Category.objects.create(name='Category'))
+        self.product_info = ProductInfo.objects.create(
+            product=product, shop=shop, name='Model', quantity=5, price=100, price_rrc=120, external_id=1,
+        )
+
+    def batch(self, operations):
+        return self.client.post(reverse('batch'), {'operations': operations}, format='json')
+
+    def checkout(self, contact_id='{{contact.Contact.id}}'):
+        return [
+            {'method': 'POST', 'path': '/cart/', 'body': {'items': [{'product_id': self.product_info.id, 'quantity': 2}]}},
+            {'method': 'POST', 'path': '/contacts/', 'body': CONTACT, 'name': 'contact'},
+            {'method': 'GET', 'path': '/cart/?fields=id,total_sum', 'name': 'cart'},
+            {'method': 'POST', 'path': '/confirm-order/', 'body': {'order_id': '{{cart.id}}', 'contact_id': contact_id}},
+        ]
+
+    def test_resolve_references(self, *mocks):
+        results = {'0': {'items': [{'id': 5}]}, 'cart': {'id': 7}}
+
+        self.assertEqual(resolve_references({'order_id': '{{cart.id}}'}, results), {'order_id': 7})
+        self.assertEqual(resolve_references('/orders/{{0.items.0.id}}/', results), '/orders/5/')
+        with self.assertRaises(ValueError):
+            resolve_references('{{cart.missing}}', results)
+
+    def test_checkout(self, *mocks):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, \
+                CaptureQueriesContext(connection) as context:
+            response = self.batch(self.checkout())
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([result['status'] for result in response.data['results']], [201, 201, 200, 200])
+        self.assertEqual(response.data['results'][2]['body']['total_sum'], 240)
+        order = Order.objects.get(user=self.user)
+        self.assertEqual(order.status, 'new')
+        self.assertEqual(order.contact.city, 'City')
+        self.assertEqual(len(callbacks), 2)
+        # Токен проверяется один раз на весь пакет
+        self.assertEqual(sum('"authtoken_token"' in query['sql'] for query in context.captured_queries), 1)
+
+    def test_failed_operation_rolls_back(self, *mocks):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.batch(self.checkout(contact_id=999999))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.data['Status'])
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertFalse(Contact.objects.exists())
+        self.assertEqual(callbacks, [])
+
+    def test_idempotency_key_applies_to_batch(self, *mocks):
+        caches['idempotency'].clear()
+        add = {'method': 'POST', 'path': '/cart/', 'body': {'items': [{'product_id': self.product_info.id}]}}
+        for _ in range(2):
+            response = self.client.post(
+                reverse('batch'), {'operations': [add, add]}, format='json', headers={'Idempotency-Key': 'checkout-1'},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        # Обе операции первого пакета выполнены, повтор пакета — нет
+        self.assertEqual(OrderItem.objects.count(), 2)
+
+    def test_invalid_batch(self, *mocks):
+        cases = [
+            [],
+            [{'method': 'TRACE', 'path': '/cart/'}],
+            [{'method': 'GET', 'path': '/unknown/'}],
+            [{'method': 'GET', 'path': '/admin/'}],
+            [{'method': 'GET', 'path': '/api/schema/'}],
+            [{'method': 'POST', 'path': '/batch/', 'body': {'operations': []}}],
+            [{'method': 'GET', 'path': '/cart/{{missing.id}}'}],
+        ]
+        for operations in cases:
+            with self.subTest(operations=operations):
+                response = self.batch(operations)
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.data['Status'])
+
+    def test_async_variant_runs_sync_view(self, *mocks):
+        # Маршрут /cart/ с асинхронным вариантом (ASYNC_VIEWS=cart)
+        async_match = ResolverMatch(AsyncCartView.as_view(), (), {}, url_name='cart')
+        with patch('orders.batch.resolve', return_value=async_match):
+            response = self.batch([self.checkout()[0], {'method': 'GET', 'path': '/cart/?fields=total_sum'}])
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['results'][1]['body'], {'total_sum': 240})
+
+    def test_unauthenticated(self, *mocks):
+        self.client.credentials()
+
+        self.assertEqual(self.batch(self.checkout()).status_code, 401)
@@ -0,0 +1,198 @@
+import yaml
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from ..models import (
+    User, Shop, Category, Product, ProductInfo, ProductInfoChange, OrderItem, Order, Parameter, ProductParameter,
+)
+from ..offers import catalog_version
+
+
+def changes(since=0):
+    return list(ProductInfoChange.objects.filter(id__gt=since).order_by('id').values_list('op', 'changed_fields'))
+
+
+# Тесты для журнала изменений предложений
+class ProductInfoChangeLogTest(TestCase):
+    def setUp(self):
+        self.shop = Shop.objects.create(name='Change Shop')
+        self.product = Product.objects.create(name='Change Product', category=Category.objects.create(name='Changes'))
+
+    def create_product_info(self, external_id=1):
+        return ProductInfo.objects.create(
+            product=self.product, shop=self.shop, name='Model', quantity=10, price=100, price_rrc=120,
+            external_id=external_id,
+        )
+
+    def test_save_records_changed_fields_only(self):
+        product_info = self.create_product_info()
+        version = ProductInfoChange.latest_version()
+
+        product_info.save()
+        product_info = ProductInfo.objects.get(pk=product_info.pk)
+        product_info.price = 90
+        product_info.quantity = 5
+        product_info.save()
+        product_info.delete()
+
+        self.assertEqual(changes(version), [('update', ['quantity', 'price']), ('delete', [])])
+        self.assertEqual(changes()[0][0], 'create')
+
+    def test_values_read_only_when_saving(self):
+        product_info = self.create_product_info()
+        version = ProductInfoChange.latest_version()
+
+        product_infos = list(ProductInfo.objects.all())
+        self.assertFalse(hasattr(product_infos[0], '_loaded_values'))
+        product_infos[0].name = 'Renamed'
+        # Прежние значения, UPDATE и запись журнала
+        with self.assertNumQueries(3):
+            product_infos[0].save()
+
+        self.assertEqual(changes(version), [('update', ['name'])])
+        self.assertFalse(hasattr(ProductInfo.objects.get(pk=product_info.pk), '_loaded_values'))
+
+    def test_parameter_changes_recorded(self):
+        product_info = self.create_product_info()
+        parameter = Parameter.objects.create(name='Color')
+        version, cache_version = ProductInfoChange.latest_version(), catalog_version()
+
+        product_parameter = ProductParameter.objects.create(product_info=product_info, parameter=parameter, value='Red')
+        product_parameter.value = 'Black'
+        product_parameter.save()
+        product_parameter.delete()
+
+        self.assertEqual(changes(version), [('update', ['parameters'])] * 3)
+        self.assertNotEqual(catalog_version(), cache_version)
+
+        # Параметры удалённого предложения отдельно не записываются
+        ProductParameter.objects.create(product_info=product_info, parameter=parameter, value='Red')
+        version = ProductInfoChange.latest_version()
+        product_info.delete()
+        ProductInfo.objects.filter(pk=self.create_product_info(2).pk).delete()
+        self.assertEqual(changes(version), [('delete', []), ('create', list(ProductInfo.TRACKED_FIELDS)), ('delete', [])])
+
+    def test_queryset_operations_recorded(self):
+        self.create_product_info(1)
+        self.create_product_info(2)
+        version = ProductInfoChange.latest_version()
+
+        ProductInfo.objects.filter(shop=self.shop).update(quantity=0)
+        ProductInfo.objects.filter(shop=self.shop).delete()
+
+        self.assertEqual(changes(version), [('update', ['quantity'])] * 2 + [('delete', [])] * 2)
+
+    def test_update_records_real_changes_only(self):
+        first = self.create_product_info(1)
+        second = self.create_product_info(2)
+        ProductInfo.objects.filter(pk=first.pk).update(quantity=3)
+        version = ProductInfoChange.latest_version()
+
+        ProductInfo.objects.filter(shop=self.shop).update(quantity=3, price='100.00')
+
+        self.assertEqual(list(ProductInfoChange.objects.filter(id__gt=version).values_list(
+            'product_info_id', 'changed_fields')), [(second.pk, ['quantity'])])
+
+    def test_bulk_update_recorded(self):
+        for external_id in (1, 2, 3):
+            self.create_product_info(external_id)
+        product_infos = list(ProductInfo.objects.order_by('id'))
+        version = ProductInfoChange.latest_version()
+
+        product_infos[0].price = 99.9
+        product_infos[1].quantity = 1
+        product_infos[1].price = 100.0
+        ProductInfo.objects.bulk_update(product_infos, ['price', 'quantity'])
+
+        self.assertEqual(list(ProductInfoChange.objects.filter(id__gt=version).values_list(
+            'product_info_id', 'changed_fields')), [(product_infos[0].pk, ['price']), (product_infos[1].pk, ['quantity'])])
+        self.assertEqual(product_infos[0].changed_fields(), [])
+
+
+# Тесты для журнала изменений при загрузке прайса и эндпоинта /catalog/changes/
+class CatalogChangesViewTest(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.user = User.objects.create_user(email='changes@example.com', password='password', type='shop')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.user).key)
+        self.goods = [
+            {
+                'id': 100 + index, 'category': 1, 'model': f'Model {index}', 'name': f'Product {index}',
+                'price': 100, 'price_rrc': 120, 'quantity': 5, 'parameters': {'Color': 'Black'},
+            }
+            for index in range(3)
+        ]
+
+    def upload(self):
+        feed = {'shop': 'Feed Shop', 'categories': [{'id': 1, 'name': 'Feed'}], 'goods': self.goods}
+        file = SimpleUploadedFile('feed.yaml', yaml.dump(feed).encode(), content_type='application/x-yaml')
+        response = self.client.post(reverse('update-partner'), {'file': file}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+
+    def test_reimport_records_only_differences(self):
+        self.upload()
+        kept = ProductInfo.objects.get(external_id=100)
+        order = Order.objects.create(user=self.user, status='new')
+        OrderItem.objects.create(order=order, product=kept, quantity=1)
+        version = ProductInfoChange.latest_version()
+
+        self.upload()
+        self.assertEqual(changes(version), [])
+
+        self.goods[1]['price'] = 150
+        self.goods[2]['parameters'] = {'Color': 'White'}
+        self.goods.append(dict(self.goods[0], id=200, name='Product new'))
+        del self.goods[0]
+        self.upload()
+
+        self.assertEqual(changes(version), [
+            ('update', ['price']), ('update', ['parameters']), ('create', list(ProductInfo.TRACKED_FIELDS)),
+            ('delete', []),
+        ])
+        self.assertEqual(ProductInfo.objects.get(external_id=102).product_parameters.get().value, 'White')
+        # Неизменённое предложение сохраняет id, удалённое — уходит вместе с позициями заказов
+        self.assertFalse(OrderItem.objects.exists())
+
+    def test_reimport_fractional_prices(self):
+        self.goods[0].update(price=99.9, price_rrc=120.55)
+        self.upload()
+        version = ProductInfoChange.latest_version()
+
+        self.upload()
+        self.assertEqual(changes(version), [])
+
+        self.goods[0]['price'] = 99.95
+        self.upload()
+        self.assertEqual(changes(version), [('update', ['price'])])
+
+    def test_keyset_paging(self):
+        self.upload()
+        self.goods[0]['quantity'] = 1
+        self.upload()
+
+        response = self.client.get(reverse('catalog-changes'), {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['has_more'])
+        self.assertEqual([change['op'] for change in response.data['changes']], ['create', 'create'])
+
+        response = self.client.get(reverse('catalog-changes'), {'since': response.data['next_since'], 'limit': 2})
+        self.assertFalse(response.data['has_more'])
+        self.assertEqual(
+            [(change['op'], change['changed_fields']) for change in response.data['changes']],
+            [('create', list(ProductInfo.TRACKED_FIELDS)), ('update', ['quantity'])],
+        )
+        self.assertEqual(response.data['changes'][-1]['product_info'], ProductInfo.objects.get(external_id=100).id)
+
+        response = self.client.get(reverse('catalog-changes'), {'since': response.data['next_since']})
+        self.assertEqual(response.data['changes'], [])
+        self.assertFalse(response.data['has_more'])
+
+    def test_invalid_since(self):
+        response = self.client.get(reverse('catalog-changes'), {'since': 'latest'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.data['Status'])
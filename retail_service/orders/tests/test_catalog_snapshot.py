@@ -0,0 +1,132 @@
+import gzip
+import json
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import yaml
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from ..models import User, Shop, Category, Product, ProductInfo, Parameter, ProductParameter
+from ..snapshot import build_snapshot, parse_range
+
+SNAPSHOT_DIR = tempfile.mkdtemp()
+
+
+# Тесты для снимка каталога и его скачивания
+@override_settings(CATALOG_SNAPSHOT_DIR=SNAPSHOT_DIR)
+class CatalogSnapshotTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SNAPSHOT_DIR, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(SNAPSHOT_DIR, ignore_errors=True)
+        caches['throttle'].clear()
+        self.user = User.objects.create_user(email='snapshot@example.com', password='password', type='shop')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.user).key)
+        self.url = reverse('catalog-snapshot')
+        shop = Shop.objects.create(name='Snapshot Shop')
+        category = Category.objects.create(name='Snapshot Category')
+        color = Parameter.objects.create(name='Color')
+        for index in range(5):
+            product = Product.objects.create(name=f'Product {index}', category=category)
+            product_info = ProductInfo.objects.create(
+                product=product, shop=shop, name=f'Model {index}', quantity=index, price=100, price_rrc=120,
+                external_id=index,
+            )
+            ProductParameter.objects.create(product_info=product_info, parameter=color, value='Black')
+
+    def download(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        return response, b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_snapshot_matches_product_list(self):
+        build_snapshot(chunk_size=2)
+
+        response, content = self.download()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        products = [json.loads(line) for line in gzip.decompress(content).splitlines()]
+        self.assertEqual(products, json.loads(json.dumps(self.client.get(reverse('product-list')).data)))
+        self.assertEqual(products[0]['product_infos'][0]['characteristics'], [{'parameter': 'Color', 'value': 'Black'}])
+
+    def test_etag_and_range(self):
+        meta = build_snapshot()
+        response, content = self.download()
+
+        self.assertEqual(self.download(**{'If-None-Match': response['ETag']})[0].status_code, 304)
+
+        response, part = self.download(Range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(part, content[10:20])
+        self.assertEqual(response['Content-Range'], f"bytes 10-19/{meta['size']}")
+
+        self.assertEqual(self.download(Range='bytes=-5')[1], content[-5:])
+        self.assertEqual(self.download(Range=f"bytes={meta['size']}-")[0].status_code, 416)
+        # Снимок сменился: If-Range с чужим ETag — весь файл
+        self.assertEqual(self.download(Range='bytes=0-9', **{'If-Range': '"stale"'})[0].status_code, 200)
+
+    def test_rebuilt_only_when_catalog_changes(self):
+        meta = build_snapshot()
+        self.assertEqual(build_snapshot(), meta)
+
+        ProductInfo.objects.filter(external_id=0).update(quantity=50)
+        rebuilt = build_snapshot()
+
+        self.assertNotEqual(rebuilt['etag'], meta['etag'])
+        self.assertGreater(rebuilt['catalog_version'], meta['catalog_version'])
+        self.assertEqual(self.download()[0]['X-Catalog-Version'], str(rebuilt['catalog_version']))
+
+    def test_rebuilt_when_related_models_change(self):
+        meta = build_snapshot()
+
+        product = Product.objects.get(name='Product 0')
+        product.name = 'Renamed product'
+        product.save()
+        rebuilt = build_snapshot()
+
+        self.assertNotEqual(rebuilt['etag'], meta['etag'])
+        self.assertEqual(rebuilt['catalog_version'], meta['catalog_version'])
+        content = self.download()[1]
+        self.assertIn('Renamed product', gzip.decompress(content).decode())
+
+        category = Category.objects.get()
+        category.name = 'Renamed category'
+        category.save()
+        self.assertNotEqual(build_snapshot()['etag'], rebuilt['etag'])
+
+    def test_beat_schedule(self):
+        from retail_service.celery import app
+
+        schedule = app.conf.beat_schedule['catalog-snapshot']
+        self.assertEqual(schedule['task'], 'orders.tasks.build_catalog_snapshot')
+
+    def test_not_built(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @patch('orders.tasks.build_catalog_snapshot.delay')
+    def test_partner_update_schedules_snapshot(self, build):
+        feed = {'shop': 'Feed Shop', 'categories': [], 'goods': []}
+        file = SimpleUploadedFile('feed.yaml', yaml.dump(feed).encode(), content_type='application/x-yaml')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('update-partner'), {'file': file}, format='multipart')
+
+        build.assert_called_once_with()
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=0-', 10), (0, 9))
+        self.assertEqual(parse_range('bytes=5-100', 10), (5, 9))
+        self.assertEqual(parse_range('bytes=-20', 10), (0, 9))
+        self.assertIsNone(parse_range('bytes=0-1,4-5', 10))
+        self.assertIsNone(parse_range('items=0-1', 10))
+        with self.assertRaises(ValueError):
+            parse_range('bytes=10-', 10)
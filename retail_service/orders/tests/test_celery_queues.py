@@ -0,0 +1,43 @@
+from django.test import SimpleTestCase
+from retail_service.celery import app, worker_argv, WORKER_PROFILES
+from .. import tasks
+
+
+# Тесты для очередей задач и профилей воркеров Celery
+class CeleryQueuesTest(SimpleTestCase):
+    def queue(self, task):
+        return app.amqp.router.route({}, task.name, (), {})['queue'].name
+
+    def test_routes(self):
+        expected = {
+            tasks.process_order: 'orders',
+            tasks.send_welcome_email: 'notifications',
+            tasks.send_order_confirmation_email: 'notifications',
+            tasks.generate_avatar_thumbnail: 'media',
+            tasks.generate_product_image_thumbnail: 'media',
+            tasks.build_catalog_snapshot: 'media',
+            tasks.test_task: 'default',
+        }
+        for task, queue in expected.items():
+            with self.subTest(task=task.name):
+                self.assertEqual(self.queue(task), queue)
+
+    def test_profiles_cover_queues(self):
+        queues = {queue for profile in WORKER_PROFILES.values() for queue in profile['queues']}
+        self.assertEqual(queues, {queue.name for queue in app.conf.task_queues})
+
+    def test_task_options(self):
+        self.assertLess(tasks.send_order_confirmation_email.priority, tasks.send_welcome_email.priority)
+        self.assertLess(tasks.process_order.priority, tasks.generate_product_image_thumbnail.priority)
+        self.assertTrue(tasks.generate_product_image_thumbnail.acks_late)
+        self.assertFalse(tasks.process_order.acks_late)
+        self.assertEqual(tasks.generate_avatar_thumbnail.rate_limit, '20/s')
+
+    def test_worker_argv(self):
+        argv = worker_argv('media')
+
+        self.assertEqual(argv[0], 'worker')
+        self.assertIn('--queues=media', argv)
+        self.assertIn('--prefetch-multiplier=1', argv)
+        self.assertIn('--max-tasks-per-child=100', argv)
+        self.assertIn('--concurrency=8', worker_argv('orders', concurrency=8))
@@ -0,0 +1,134 @@
+import io
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django_rest_passwordreset.models import ResetPasswordToken
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from retail_service.celery import app
+from ..cleanup import CLEANUP_JOBS, run_cleanup
+from ..models import User, Shop, Category, Product, ProductInfo, Order, OrderItem, ConfirmEmailToken
+from .. import tasks
+
+
+# Тесты для очистки устаревших строк
+@override_settings(CLEANUP_CHUNK_PAUSE=0, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class CleanupTest(TestCase):
+    def setUp(self):
+        self.logger = self.enterContext(patch('orders.cleanup.logger'))
+        self.old = timezone.now() - timedelta(days=365)
+        self.users = [User.objects.create_user(email=f'cleanup{index}@example.com', password='password')
+                      for index in range(5)]
+        shop = Shop.objects.create(name='Cleanup Shop')
+        product = Product.objects.create(name='Product', category=Category.objects.create(name='Category'))
+        self.product_info = ProductInfo.objects.create(
+            product=product, shop=shop, name='Model', quantity=5, price=100, price_rrc=120, external_id=1,
+        )
+
+    def age(self, queryset, field):
+        # auto_now_add не даёт задать дату при создании
+        queryset.update(**{field: self.old})
+
+    def test_baskets(self):
+        for user in self.users:
+            basket = Order.objects.create(user=user, status='basket')
+            OrderItem.objects.create(order=basket, product=self.product_info, quantity=1)
+        self.age(Order.objects.filter(user__in=self.users[:3]), 'updated')
+        # Подтверждённые заказы не трогаются при любом возрасте
+        confirmed = Order.objects.create(user=self.users[0], status='new')
+        self.age(Order.objects.filter(pk=confirmed.pk), 'updated')
+
+        report = run_cleanup('baskets', chunk_size=2)
+
+        self.assertEqual((report['deleted'], report['chunks']), (3, 2))
+        self.logger.info.assert_called_once()
+        self.assertGreaterEqual(report['seconds'], 0)
+        self.assertEqual(Order.objects.filter(status='basket').count(), 2)
+        self.assertEqual(OrderItem.objects.count(), 2)
+        self.assertTrue(Order.objects.filter(pk=confirmed.pk).exists())
+
+    def test_old_basket_with_recent_write_kept(self):
+        caches['throttle'].clear()
+        user = self.users[0]
+        basket = Order.objects.create(user=user, status='basket')
+        OrderItem.objects.create(order=basket, product=self.product_info, quantity=1)
+        self.age(Order.objects.all(), 'dt')
+        self.age(Order.objects.all(), 'updated')
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=user).key)
+        response = client.post(reverse('cart'), {'items': [{'product_id': self.product_info.id}]}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(run_cleanup('baskets')['deleted'], 0)
+        self.assertEqual(OrderItem.objects.filter(order=basket).count(), 2)
+
+        # Удаление товаров тоже продлевает жизнь корзины
+        self.age(Order.objects.all(), 'updated')
+        client.delete(reverse('cart'), {'product_ids': str(self.product_info.id)}, format='json')
+        self.assertGreater(Order.objects.get(pk=basket.pk).updated, self.old)
+
+    def test_invalid_cart_post_does_not_touch_basket(self):
+        caches['throttle'].clear()
+        user, new_user = self.users[:2]
+        basket = Order.objects.create(user=user, status='basket')
+        self.age(Order.objects.all(), 'updated')
+
+        for items_user in (user, new_user):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=items_user).key)
+            for items in ([{'product_id': self.product_info.id}, 'bad'], [{'product_id': 'x'}], [{'product_id': 0}]):
+                with self.subTest(user=items_user.email, items=items):
+                    response = client.post(reverse('cart'), {'items': items}, format='json')
+                    self.assertIn(response.status_code, (201, 400))
+
+        # Корзина не продлена и не создана, позиции не добавлены
+        self.assertEqual(Order.objects.get(pk=basket.pk).updated, self.old)
+        self.assertFalse(Order.objects.filter(user=new_user).exists())
+        self.assertFalse(OrderItem.objects.exists())
+
+    def test_tokens(self):
+        for user in self.users:
+            Token.objects.create(user=user)
+            ConfirmEmailToken.objects.create(user=user)
+            ResetPasswordToken.objects.create(user=user)
+        for model, field in ((Token, 'created'), (ConfirmEmailToken, 'created_at'), (ResetPasswordToken, 'created_at')):
+            self.age(model.objects.filter(user__in=self.users[:4]), field)
+
+        for job in ('confirm_tokens', 'reset_tokens'):
+            with self.subTest(job=job):
+                self.assertEqual(run_cleanup(job, dry_run=True)['deleted'], 4)
+                self.assertEqual(run_cleanup(job, chunk_size=3)['deleted'], 4)
+                self.assertEqual(run_cleanup(job)['deleted'], 0)
+        self.assertEqual(ConfirmEmailToken.objects.get().user, self.users[4])
+        # Токены авторизации не истекают: старый токен активного пользователя остаётся
+        self.assertEqual(Token.objects.count(), len(self.users))
+
+    @override_settings(CLEANUP_RETENTION={job: timedelta(days=1000) for job in CLEANUP_JOBS})
+    def test_retention_setting(self):
+        Order.objects.create(user=self.users[0], status='basket')
+        self.age(Order.objects.all(), 'updated')
+
+        self.assertEqual(run_cleanup('baskets')['deleted'], 0)
+
+    def test_task_and_command(self):
+        Order.objects.create(user=self.users[0], status='basket')
+        self.age(Order.objects.all(), 'updated')
+
+        result = tasks.cleanup_stale_rows.apply(args=('baskets',)).get()
+        self.assertTrue(result.startswith('Cleanup baskets: 1 rows removed'), result)
+        self.assertFalse(Order.objects.exists())
+
+        stdout = io.StringIO()
+        call_command('cleanup_stale_rows', '--dry-run', stdout=stdout)
+        self.assertEqual(len(stdout.getvalue().splitlines()), len(CLEANUP_JOBS))
+
+    def test_beat_schedule(self):
+        scheduled = {entry['args'][0] for entry in app.conf.beat_schedule.values()
+                     if entry['task'] == 'orders.tasks.cleanup_stale_rows'}
+        self.assertEqual(scheduled, set(CLEANUP_JOBS))
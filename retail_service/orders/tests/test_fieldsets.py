@@ -0,0 +1,89 @@
+from cachalot.api import cachalot_disabled
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from ..fieldsets import parse_fields, parse_expand
+from ..models import User, Shop, Category, Product, ProductInfo, Parameter, ProductParameter, Order, OrderItem
+
+
+# Тесты для параметров fields и expand
+class SparseFieldsetTest(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.user = User.objects.create_user(email='fields@example.com', password='password')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.user).key)
+        self.shop = Shop.objects.create(name='Fields Shop')
+        category = Category.objects.create(name='Fields Category')
+        color = Parameter.objects.create(name='Color')
+        self.product_infos = []
+        for index in range(2):
+            product = Product.objects.create(name=f'Product {index}', category=category)
+            product_info = ProductInfo.objects.create(
+                product=product, shop=self.shop, name=f'Model {index}', quantity=5, price=100, price_rrc=120,
+                external_id=index,
+            )
+            ProductParameter.objects.create(product_info=product_info, parameter=color, value='Red')
+            self.product_infos.append(product_info)
+        for status in ('basket', 'new'):
+            order = Order.objects.create(user=self.user, status=status)
+            OrderItem.objects.create(order=order, product=self.product_infos[0], quantity=3)
+
+    def get(self, url_name, **params):
+        # Запросы без кэша cachalot: проверяется план загрузки, а не попадания в кэш
+        with cachalot_disabled(), CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(url_name), params)
+        tables = ' '.join(query['sql'] for query in context.captured_queries)
+        return response, tables
+
+    def test_parse(self):
+        self.assertEqual(parse_fields('id, items.quantity,items.id'), {'id': {}, 'items': {'quantity': {}, 'id': {}}})
+        self.assertIsNone(parse_fields(None))
+        self.assertEqual(parse_expand('items.product_info'), {'items', 'items.product_info'})
+        self.assertEqual(parse_expand(''), set())
+
+    def test_default_unchanged(self):
+        response, tables = self.get('product-list')
+
+        self.assertEqual(set(response.data[0]), {'id', 'name', 'category', 'product_infos'})
+        self.assertEqual(response.data[0]['product_infos'][0]['shop'], 'Fields Shop')
+        self.assertIn('orders_productparameter', tables)
+
+    def test_product_fields_prune_relations(self):
+        response, tables = self.get('product-list', fields='id,name,product_infos.price')
+
+        self.assertEqual(response.data[0], {'id': self.product_infos[0].product_id, 'name': 'Product 0',
+                                            'product_infos': [{'price': '100.00'}]})
+        for table in ('orders_productparameter', 'orders_shop', 'orders_category'):
+            self.assertNotIn(table, tables)
+
+    def test_product_expand(self):
+        response, tables = self.get('product-list', expand='')
+        self.assertEqual(response.data[0]['product_infos'], [self.product_infos[0].id])
+        self.assertNotIn('orders_productparameter', tables)
+
+        response, tables = self.get('product-list', expand='product_infos')
+        product_info = response.data[0]['product_infos'][0]
+        self.assertEqual(product_info['shop'], self.shop.id)
+        self.assertEqual(product_info['characteristics'], [{'parameter': 'Color', 'value': 'Red'}])
+        self.assertNotIn('orders_shop', tables)
+
+    def test_cart_and_orders(self):
+        response, tables = self.get('cart', fields='id,items.quantity')
+        self.assertEqual(response.data, {'id': response.data['id'], 'items': [{'quantity': 3}]})
+        self.assertNotIn('orders_productinfo', tables)
+
+        response, tables = self.get('order-list', fields='id,total_sum,items', expand='items')
+        self.assertEqual(response.data[0]['total_sum'], 360)
+        self.assertEqual(response.data[0]['items'][0]['product_info'], self.product_infos[0].id)
+        self.assertNotIn('orders_productparameter', tables)
+
+    def test_unknown_field(self):
+        response, _ = self.get('order-list', fields='id,items.price')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('items.price', str(response.data['fields']))
@@ -0,0 +1,42 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from ..models import User, Shop, ProductInfo, ProductParameter, Order, OrderItem, Contact, STATE_CHOICES
+
+
+# Тесты для команды generate_data
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class GenerateDataTest(TestCase):
+    options = {
+        'shops': 3, 'categories': 4, 'products': 10, 'offers_per_product': 2, 'parameters': 5,
+        'parameters_per_offer': 2, 'users': 4, 'contacts_per_user': 2, 'orders_per_user': 9,
+        'items_per_order': 2, 'chunk_size': 7, 'stdout': StringIO(),
+    }
+
+    def test_generate_data(self):
+        call_command('generate_data', **self.options)
+
+        self.assertEqual(Shop.objects.count(), 3)
+        self.assertEqual(ProductInfo.objects.count(), 20)
+        self.assertEqual(ProductParameter.objects.count(), 40)
+        self.assertEqual(Contact.objects.count(), 8)
+        self.assertEqual(Order.objects.count(), 36)
+        self.assertEqual(OrderItem.objects.count(), 72)
+        self.assertEqual(
+            set(Order.objects.values_list('status', flat=True)), {value for value, _ in STATE_CHOICES}
+        )
+        # Не больше одной корзины на пользователя
+        self.assertFalse(
+            Order.objects.filter(status='basket').values('user').annotate(baskets=Count('id'))
+            .filter(baskets__gt=1).exists()
+        )
+        self.assertTrue(User.objects.get(email='loadtest0@example.com').check_password('loadtest'))
+
+    def test_repeated_run_adds_new_users(self):
+        call_command('generate_data', **self.options)
+        call_command('generate_data', **self.options)
+
+        self.assertEqual(User.objects.filter(type='buyer').count(), 8)
+        self.assertEqual(ProductInfo.objects.count(), 40)
@@ -0,0 +1,147 @@
+import threading
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from ..idempotency import cache_keys
+from ..models import User, Shop, Category, Product, ProductInfo, Order, OrderItem, Contact
+
+
+# Тесты для заголовка Idempotency-Key
+@patch('orders.tasks.process_order.delay')
+@patch('orders.tasks.send_order_confirmation_email.delay')
+class IdempotencyTest(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        caches['idempotency'].clear()
+        self.user = User.objects.create_user(email='retry@example.com', password='password')
+        self.client = self.client_for(self.user)
+        shop = Shop.objects.create(name='Retry Shop')
+        product = Product.objects.create(name='Product', category=Category.objects.create(name='Category'))
+        self.product_info = ProductInfo.objects.create(
+            product=product, shop=shop, name='Model', quantity=5, price=100, price_rrc=120, external_id=1,
+        )
+        self.items = {'items': [{'product_id': self.product_info.id, 'quantity': 2}]}
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=user).key)
+        return client
+
+    def add_to_cart(self, client=None, key='cart-1', data=None):
+        return (client or self.client).post(
+            reverse('cart'), data or self.items, format='json', headers={'Idempotency-Key': key},
+        )
+
+    def test_cart_replay(self, *mocks):
+        first = self.add_to_cart()
+        second = self.add_to_cart()
+
+        self.assertEqual((first.status_code, second.status_code), (201, 201))
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first)
+        self.assertEqual(OrderItem.objects.count(), 1)
+
+        # Другой ключ и запрос без ключа выполняются
+        self.add_to_cart(key='cart-2')
+        self.client.post(reverse('cart'), self.items, format='json')
+        self.assertEqual(OrderItem.objects.count(), 3)
+
+    def test_failed_commit_not_stored(self, *mocks):
+        depth = len(connection.atomic_blocks)
+        exit_atomic = transaction.Atomic.__exit__
+
+        def failing_exit(atomic, exc_type, exc_value, traceback):
+            exit_atomic(atomic, exc_type, exc_value, traceback)
+            # Ошибка при выходе из транзакции представления, после записи корзины
+            if exc_type is None and len(connection.atomic_blocks) == depth:
+                raise OperationalError('commit failed')
+
+        self.client.raise_request_exception = False
+        with patch.object(transaction.Atomic, '__exit__', failing_exit):
+            response = self.add_to_cart()
+
+        self.assertEqual(response.status_code, 500)
+        response_key, lock_key = cache_keys(self.user.pk, reverse('cart'), 'cart-1')
+        self.assertIsNone(caches['idempotency'].get(response_key))
+        self.assertIsNone(caches['idempotency'].get(lock_key))
+
+        # Повтор с тем же ключом выполняет запись, а не воспроизводит успех
+        response = self.add_to_cart()
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+    def test_keys_are_per_user(self, *mocks):
+        other = User.objects.create_user(email='other@example.com', password='password')
+        self.add_to_cart()
+        response = self.add_to_cart(client=self.client_for(other))
+
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(OrderItem.objects.count(), 2)
+
+    def test_confirm_enqueues_tasks_once(self, send_email, process_order):
+        order = Order.objects.create(user=self.user, status='basket')
+        contact = Contact.objects.create(
+            user=self.user, last_name='Last', first_name='First', email='contact@example.com',
+            phone='1234567890', city='City', street='Street', house='1',
+        )
+        data = {'order_id': order.id, 'contact_id': contact.id}
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                response = self.client.post(
+                    reverse('confirm-order'), data, format='json', headers={'Idempotency-Key': 'confirm-1'},
+                )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'Status': True})
+        send_email.assert_called_once_with(order.id)
+        process_order.assert_called_once_with(order.id)
+
+    def test_key_reused_with_other_body(self, *mocks):
+        self.add_to_cart()
+        response = self.add_to_cart(data={'items': [{'product_id': self.product_info.id, 'quantity': 5}]})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(OrderItem.objects.count(), 1)
+
+    def test_invalid_key(self, *mocks):
+        self.assertEqual(self.add_to_cart(key='x' * 256).status_code, 400)
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0.1)
+    def test_concurrent_duplicate_conflict(self, *mocks):
+        _, lock_key = cache_keys(self.user.pk, reverse('cart'), 'cart-1')
+        caches['idempotency'].add(lock_key, True, 10)
+
+        response = self.add_to_cart()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('Retry-After', response)
+        self.assertFalse(OrderItem.objects.exists())
+
+    def test_concurrent_duplicate_waits(self, *mocks):
+        cache = caches['idempotency']
+        first = self.add_to_cart()
+        response_key, lock_key = cache_keys(self.user.pk, reverse('cart'), 'cart-1')
+        # Первый запрос ещё выполняется: ответ появится и блокировка снимется позже
+        stored = cache.get(response_key)
+        cache.delete(response_key)
+        cache.add(lock_key, True, 10)
+
+        def finish():
+            cache.set(response_key, stored)
+            cache.delete(lock_key)
+
+        timer = threading.Timer(0.2, finish)
+        timer.start()
+        response = self.add_to_cart()
+        timer.join()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, first.data)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(OrderItem.objects.count(), 1)
@@ -0,0 +1,49 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework.authtoken.models import Token
+from django.contrib.auth import get_user_model
+from retail_service.metrics import registry
+
+User = get_user_model()
+
+
+# Тесты выборочного профилирования и эндпоинта /metrics
+@override_settings(PROFILING_SAMPLE_RATE=0, METRICS_ALLOWED_IPS=['127.0.0.1'])
+class SamplingProfilerTest(TestCase):
+    def setUp(self):
+        registry.clear()
+        self.user = User.objects.create_user(email='metrics@example.com', password='metricspassword123')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def test_unsampled_request_not_recorded(self):
+        self.client.get(reverse('contacts'))
+        self.assertNotIn('endpoint="contacts"', self.client.get(reverse('metrics')).content.decode())
+
+    def test_profile_header_records_latency_and_queries(self):
+        self.client.get(reverse('contacts'), HTTP_X_PROFILE='1')
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_request_duration_seconds_count{endpoint="contacts",method="GET"} 1', body)
+        self.assertIn('http_requests_sampled_total{endpoint="contacts",method="GET",status="200"} 1', body)
+        # Токен и список контактов — два запроса к базе
+        self.assertIn('http_request_queries_sum{endpoint="contacts",method="GET"} 2', body)
+
+    @override_settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN='secret')
+    def test_access(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(APIClient().get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(APIClient().get(url, HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+        with self.settings(METRICS_TOKEN=None):
+            self.assertEqual(APIClient().get(url, HTTP_AUTHORIZATION='Bearer secret').status_code, 403)
+            self.assertEqual(APIClient().get(url, REMOTE_ADDR='10.0.0.5').status_code, 403)
+            with self.settings(METRICS_ALLOWED_IPS=['10.0.0.5']):
+                self.assertEqual(APIClient().get(url, REMOTE_ADDR='10.0.0.5').status_code, 200)
@@ -0,0 +1,53 @@
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from retail_service import openapi
+
+SCHEMA_DIR = tempfile.mkdtemp()
+
+
+# Тесты для заранее собранной схемы OpenAPI
+@override_settings(OPENAPI_SCHEMA_DIR=SCHEMA_DIR, CODE_VERSION='test-1')
+class CachedSchemaViewTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SCHEMA_DIR, ignore_errors=True)
+
+    def setUp(self):
+        openapi._loaded = None
+        shutil.rmtree(SCHEMA_DIR, ignore_errors=True)
+        self.url = reverse('schema')
+
+    def test_schema_served_with_etag_and_cache_headers(self):
+        response = self.client.get(self.url, {'format': 'json'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.oai.openapi+json')
+        self.assertIn('max-age=86400', response['Cache-Control'])
+        self.assertIn('/products/', response.json()['paths'])
+
+        response = self.client.get(self.url, {'format': 'json'}, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_yaml_by_default(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response['Content-Type'], 'application/vnd.oai.openapi')
+        self.assertTrue(response.content.startswith(b'openapi:'))
+
+    def test_built_once_per_code_version(self):
+        with patch('retail_service.openapi.build_schema', wraps=openapi.build_schema) as build_schema:
+            etag = self.client.get(self.url)['ETag']
+            self.client.get(self.url)
+            # Новый процесс читает схему из файла
+            openapi._loaded = None
+            self.assertEqual(self.client.get(self.url)['ETag'], etag)
+            self.assertEqual(build_schema.call_count, 1)
+
+            with override_settings(CODE_VERSION='test-2'):
+                self.client.get(self.url)
+            self.assertEqual(build_schema.call_count, 2)
@@ -0,0 +1,138 @@
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from ..models import User, Shop, Category, Product, ProductInfo, Order, OrderItem
+from ..statuses import can_transition, sources_for, transition_orders
+from ..tasks import send_order_status_emails
+
+
+# Тесты для массовой смены статуса заказов магазином
+class OrderStatusTest(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.shop_user = User.objects.create_user(email='status-shop@example.com', password='password', type='shop')
+        self.shop = Shop.objects.create(name='Status Shop', user=self.shop_user)
+        self.other_shop = Shop.objects.create(name='Other Shop')
+        self.buyer = User.objects.create_user(email='buyer@example.com', password='password', first_name='Иван')
+        category = Category.objects.create(name='Category')
+        self.own = self.product_info(self.shop, category, 1)
+        self.foreign = self.product_info(self.other_shop, category, 2)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.shop_user).key)
+
+    @staticmethod
+    def product_info(shop, category, external_id):
+        product = Product.objects.create(name=f'Product {external_id}', category=category)
+        return ProductInfo.objects.create(
+            product=product, shop=shop, name='Model', quantity=5, price=100, price_rrc=120, external_id=external_id,
+        )
+
+    def order(self, status, *products):
+        order = Order.objects.create(user=self.buyer, status=status)
+        for product in products or (self.own,):
+            OrderItem.objects.create(order=order, product=product, quantity=1)
+        return order
+
+    def post(self, order_ids, status):
+        return self.client.post(reverse('partner-order-status'), {'order_ids': order_ids, 'status': status},
+                                format='json')
+
+    def test_transitions(self):
+        self.assertTrue(can_transition('confirmed', 'assembled'))
+        self.assertFalse(can_transition('new', 'sent'))
+        self.assertFalse(can_transition('delivered', 'canceled'))
+        self.assertEqual(sources_for('canceled'), {'new', 'confirmed', 'assembled'})
+        with self.assertRaises(ValueError):
+            transition_orders([1], 'lost')
+
+    @patch('orders.tasks.send_order_status_emails.delay')
+    def test_single_update_and_one_notification(self, delay):
+        orders = [self.order('confirmed') for _ in range(5)]
+        ids = [order.id for order in orders]
+
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            updated, rejected = transition_orders(ids, 'assembled', shop=self.shop)
+
+        self.assertEqual((updated, rejected), (ids, {}))
+        self.assertEqual(sum(query['sql'].startswith('UPDATE') for query in queries), 1)
+        self.assertEqual(set(Order.objects.filter(id__in=ids).values_list('status', flat=True)), {'assembled'})
+        delay.assert_called_once_with(ids, 'assembled')
+
+    @patch('orders.tasks.send_order_status_emails.delay')
+    def test_endpoint_rejections(self, delay):
+        ready = self.order('assembled')
+        too_early = self.order('new')
+        mixed = self.order('assembled', self.own, self.foreign)
+        foreign = self.order('assembled', self.foreign)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post([ready.id, too_early.id, mixed.id, foreign.id, 999999], 'sent')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['updated'], [ready.id])
+        self.assertEqual(set(data['rejected']), {str(too_early.id), str(mixed.id), str(foreign.id), '999999'})
+        self.assertEqual(data['rejected'][str(foreign.id)], 'Заказ не найден')
+        self.assertEqual(data['rejected'][str(mixed.id)],
+                         'В заказе есть товары других магазинов: статус меняет администратор')
+        self.assertEqual(Order.objects.get(id=too_early.id).status, 'new')
+        self.assertEqual(Order.objects.get(id=mixed.id).status, 'assembled')
+        delay.assert_called_once_with([ready.id], 'sent')
+
+    @patch('orders.tasks.send_order_status_emails.delay')
+    def test_staff_moves_multi_shop_order(self, delay):
+        mixed = self.order('confirmed', self.own, self.foreign)
+        staff = User.objects.create_user(email='staff@example.com', password='password', is_staff=True)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=staff).key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post([mixed.id], 'assembled')
+
+        self.assertEqual(response.json()['updated'], [mixed.id])
+        self.assertEqual(Order.objects.get(id=mixed.id).status, 'assembled')
+        delay.assert_called_once_with([mixed.id], 'assembled')
+
+    @patch('orders.tasks.send_order_status_emails.delay')
+    def test_nothing_updated(self, delay):
+        order = self.order('delivered')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post([order.id], 'canceled')
+        self.assertEqual(response.json()['updated'], [])
+        delay.assert_not_called()
+
+    def test_bad_requests(self):
+        order = self.order('new')
+        self.assertEqual(self.post([order.id], 'basket').status_code, 400)
+        self.assertEqual(self.post(['x'], 'confirmed').status_code, 400)
+        self.assertEqual(self.post([], 'confirmed').status_code, 400)
+        with self.settings(ORDER_STATUS_BATCH_MAX_IDS=1):
+            self.assertEqual(self.post([order.id, order.id + 1], 'confirmed').status_code, 400)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.buyer).key)
+        self.assertEqual(self.post([order.id], 'confirmed').status_code, 403)
+        self.assertEqual(Order.objects.get(id=order.id).status, 'new')
+
+    def test_emails_sent_in_one_batch(self):
+        orders = [self.order('sent') for _ in range(3)]
+
+        result = send_order_status_emails([order.id for order in orders], 'sent')
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].to, ['buyer@example.com'])
+        self.assertIn('Sent', mail.outbox[0].subject)
+        self.assertIn('3 of 3', result)
+
+    def test_emails_retried(self):
+        order = self.order('sent')
+        with patch('orders.tasks.send_mass_mail', side_effect=ConnectionRefusedError) as send:
+            result = send_order_status_emails.apply(args=([order.id], 'sent'))
+        self.assertEqual(result.state, 'FAILURE')
+        # Первая попытка и три повтора MAIL_RETRY
+        self.assertEqual(send.call_count, 4)
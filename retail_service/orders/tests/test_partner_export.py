@@ -0,0 +1,86 @@
+import csv
+import io
+
+import yaml
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from ..models import User, ProductInfoChange
+
+
+# Тесты для выгрузки прайса магазина
+@override_settings(PARTNER_EXPORT_CHUNK_SIZE=2)
+class PartnerExportTest(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.user = User.objects.create_user(email='export@example.com', password='password', type='shop')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.user).key)
+        self.feed = {
+            'shop': 'Export Shop',
+            'categories': [{'id': 1, 'name': 'Смартфоны'}, {'id': 2, 'name': 'Аксессуары'}],
+            'goods': [
+                {
+                    'id': 100 + index, 'category': 1 + index % 2, 'model': f'Model {index}',
+                    'name': f'Товар {index}', 'price': 100 + index, 'price_rrc': 120.5, 'quantity': index,
+                    'parameters': {'Цвет': 'черный', 'Память': str(16 * (index + 1))} if index else {'Цвет': 'белый'},
+                }
+                for index in range(5)
+            ],
+        }
+
+    def upload(self, content):
+        file = SimpleUploadedFile('feed.yaml', content, content_type='application/x-yaml')
+        response = self.client.post(reverse('update-partner'), {'file': file}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+
+    def export(self, export_format):
+        response = self.client.get(reverse('partner-export', args=[export_format]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_yaml_round_trip(self):
+        self.upload(yaml.dump(self.feed, allow_unicode=True).encode())
+
+        content = self.export('yaml')
+
+        self.assertEqual(yaml.safe_load(content), self.feed)
+        # Повторная загрузка выгрузки ничего не меняет в каталоге
+        version = ProductInfoChange.latest_version()
+        self.upload(content.encode())
+        self.assertEqual(ProductInfoChange.latest_version(), version)
+
+    def test_csv(self):
+        self.upload(yaml.dump(self.feed, allow_unicode=True).encode())
+
+        rows = list(csv.DictReader(io.StringIO(self.export('csv'))))
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0], {
+            'id': '100', 'category': '1', 'category_name': 'Смартфоны', 'model': 'Model 0', 'name': 'Товар 0',
+            'price': '100', 'price_rrc': '120.5', 'quantity': '0', 'Память': '', 'Цвет': 'белый',
+        })
+        self.assertEqual(rows[4]['Память'], '80')
+
+    def test_empty_catalog(self):
+        self.feed['goods'] = []
+        self.upload(yaml.dump(self.feed, allow_unicode=True).encode())
+
+        self.assertEqual(yaml.safe_load(self.export('yaml'))['goods'], [])
+
+    def test_only_for_shops(self):
+        self.user.type = 'buyer'
+        self.user.save()
+
+        response = self.client.get(reverse('partner-export', args=['yaml']))
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_unknown_format(self):
+        self.upload(yaml.dump(self.feed, allow_unicode=True).encode())
+
+        self.assertEqual(self.client.get(reverse('partner-export', args=['xml'])).status_code, 400)
@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from ..models import User, Shop, Category, Product, ProductInfo, Order, OrderItem
+
+
+# Тесты для ленты заказов магазина
+class PartnerOrdersTest(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.shop_user = User.objects.create_user(email='feed-shop@example.com', password='password', type='shop')
+        self.shop = Shop.objects.create(name='Feed Shop', user=self.shop_user)
+        self.buyer = User.objects.create_user(email='feed-buyer@example.com', password='password')
+        category = Category.objects.create(name='Category')
+        self.own = self.product_info(self.shop, category, 1, price_rrc=100)
+        self.own_cheap = self.product_info(self.shop, category, 2, price_rrc=10)
+        self.foreign = self.product_info(Shop.objects.create(name='Other Shop'), category, 3, price_rrc=1000)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.shop_user).key)
+
+    @staticmethod
+    def product_info(shop, category, external_id, price_rrc):
+        product = Product.objects.create(name=f'Product {external_id}', category=category)
+        return ProductInfo.objects.create(
+            product=product, shop=shop, name='Model', quantity=5, price=1, price_rrc=price_rrc,
+            external_id=external_id,
+        )
+
+    def order(self, status, *items):
+        order = Order.objects.create(user=self.buyer, status=status)
+        for product, quantity in items:
+            OrderItem.objects.create(order=order, product=product, quantity=quantity)
+        return order
+
+    def feed(self, **params):
+        response = self.client.get(reverse('partner-orders'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_subtotals_for_shop_items_only(self):
+        mixed = self.order('new', (self.own, 2), (self.own_cheap, 3), (self.foreign, 1))
+        self.order('new', (self.foreign, 1))
+        self.order('basket', (self.own, 1))
+
+        with self.assertNumQueries(3):
+            data = self.feed()
+
+        self.assertEqual(data['orders'], [{
+            'id': mixed.id, 'dt': data['orders'][0]['dt'], 'status': 'new',
+            'items': 2, 'quantity': 5, 'subtotal': '230.00',
+        }])
+        self.assertFalse(data['has_more'])
+
+    def test_keyset_pages(self):
+        orders = [self.order('confirmed', (self.own, 1)) for _ in range(5)]
+
+        first = self.feed(limit=2)
+        second = self.feed(limit=2, before=first['next_before'])
+        # Новый заказ не сдвигает уже полученные страницы
+        self.order('confirmed', (self.own, 1))
+        third = self.feed(limit=2, before=second['next_before'])
+
+        pages = [[order['id'] for order in page['orders']] for page in (first, second, third)]
+        ids = [order.id for order in reversed(orders)]
+        self.assertEqual(pages, [ids[:2], ids[2:4], ids[4:]])
+        self.assertEqual([page['has_more'] for page in (first, second, third)], [True, True, False])
+
+    def test_filters(self):
+        new = self.order('new', (self.own, 1))
+        sent = self.order('sent', (self.own, 1))
+        old = self.order('delivered', (self.own, 1))
+        Order.objects.filter(pk=old.pk).update(dt=timezone.now() - timedelta(days=10))
+        today = timezone.localdate().isoformat()
+
+        def ids(**params):
+            return [order['id'] for order in self.feed(**params)['orders']]
+
+        self.assertEqual(ids(status='new,sent'), [sent.id, new.id])
+        self.assertEqual(ids(date_from=today), [sent.id, new.id])
+        self.assertEqual(ids(date_to=(timezone.localdate() - timedelta(days=1)).isoformat()), [old.id])
+        self.assertEqual(ids(status='delivered', date_from=today), [])
+
+    def test_bad_requests(self):
+        url = reverse('partner-orders')
+        for params in ({'status': 'basket'}, {'date_from': '2024-13-01'}, {'date_to': 'yesterday'},
+                       {'before': 'x'}, {'limit': 0}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.buyer).key)
+        self.assertEqual(self.client.get(url).status_code, 403)
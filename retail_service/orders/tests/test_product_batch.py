@@ -0,0 +1,114 @@
+from cachalot.api import cachalot_disabled
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from ..models import User, Shop, Category, Product, ProductInfo, Parameter, ProductParameter, ProductInfoChange
+from ..offers import parse_ids
+
+
+# Тесты для предложений по списку идентификаторов
+class ProductBatchTest(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        cache.clear()
+        self.user = User.objects.create_user(email='batch@example.com', password='password')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.user).key)
+        shop = Shop.objects.create(name='Batch Shop')
+        category = Category.objects.create(name='Batch Category')
+        color = Parameter.objects.create(name='Color')
+        self.product_infos = []
+        for index in range(3):
+            product = Product.objects.create(name=f'Product {index}', category=category)
+            product_info = ProductInfo.objects.create(
+                product=product, shop=shop, name=f'Model {index}', quantity=5, price=100 + index, price_rrc=120,
+                external_id=index,
+            )
+            ProductParameter.objects.create(product_info=product_info, parameter=color, value='Red')
+            self.product_infos.append(product_info)
+        self.ids = [product_info.id for product_info in self.product_infos]
+
+    def get(self, ids):
+        with cachalot_disabled(), CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('product-batch'), {'ids': ids})
+        return response, [query['sql'] for query in context.captured_queries]
+
+    def test_parse_ids(self):
+        self.assertEqual(parse_ids('3, 1,3,2'), [3, 1, 2])
+        self.assertEqual(parse_ids([5, '6']), [5, 6])
+        for value in ('1,a', '0', [None]):
+            with self.assertRaises((TypeError, ValueError)):
+                parse_ids(value)
+
+    def test_order_and_missing(self):
+        response, _ = self.get(f'{self.ids[2]},999,{self.ids[0]}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([offer['id'] for offer in response.data['results']], [self.ids[2], self.ids[0]])
+        self.assertEqual(response.data['missing'], [999])
+        offer = response.data['results'][0]
+        self.assertEqual(offer['product_name'], 'Product 2')
+        self.assertEqual(offer['category'], 'Batch Category')
+        self.assertEqual(offer['shop'], 'Batch Shop')
+        self.assertEqual(offer['price'], '102.00')
+        self.assertEqual(offer['characteristics'], [{'parameter': 'Color', 'value': 'Red'}])
+
+    def test_only_misses_are_fetched(self):
+        self.get(str(self.ids[0]))
+
+        response, queries = self.get(','.join(map(str, self.ids)))
+        offers = [query for query in queries if 'FROM "orders_productinfo"' in query]
+        self.assertEqual(len(offers), 1)
+        self.assertIn(f'IN ({self.ids[1]}, {self.ids[2]})', offers[0])
+        self.assertEqual(len(response.data['results']), 3)
+
+        # Всё из кэша: только токен, версия журнала и номер правки каталога
+        _, queries = self.get(','.join(map(str, self.ids)))
+        self.assertEqual(len(queries), 3)
+
+    def test_catalog_change_invalidates(self):
+        self.get(str(self.ids[0]))
+        product_info = self.product_infos[0]
+        product_info.price = 150
+        product_info.save()
+        self.assertGreater(ProductInfoChange.latest_version(), 0)
+
+        response, _ = self.get(str(self.ids[0]))
+        self.assertEqual(response.data['results'][0]['price'], '150.00')
+
+    def test_related_rename_invalidates(self):
+        self.get(str(self.ids[0]))
+        product = self.product_infos[0].product
+        product.name = 'Renamed product'
+        product.save()
+        category = product.category
+        category.name = 'Renamed category'
+        category.save()
+
+        response, _ = self.get(str(self.ids[0]))
+        self.assertEqual(response.data['results'][0]['product_name'], 'Renamed product')
+        self.assertEqual(response.data['results'][0]['category'], 'Renamed category')
+
+        shop = self.product_infos[0].shop
+        shop.name = 'Renamed shop'
+        shop.save()
+        response, _ = self.get(str(self.ids[0]))
+        self.assertEqual(response.data['results'][0]['shop'], 'Renamed shop')
+
+    def test_post(self):
+        response = self.client.post(reverse('product-batch'), {'ids': self.ids[:2]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([offer['id'] for offer in response.data['results']], self.ids[:2])
+
+    @override_settings(PRODUCT_BATCH_MAX_IDS=2)
+    def test_invalid_ids(self):
+        for ids in ('', 'a,b', ','.join(map(str, self.ids))):
+            with self.subTest(ids=ids):
+                response, _ = self.get(ids)
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.data['Status'])
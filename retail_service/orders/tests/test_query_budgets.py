@@ -0,0 +1,164 @@
+import io
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import yaml
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from ..models import (
+    Category, Product, ProductInfo, Shop, Parameter, ProductParameter, Order, OrderItem, Contact,
+)
+from .utils import QueryBudgetMixin
+
+User = get_user_model()
+
+# Размеры данных, на которых проверяются бюджеты
+SIZES = (1, 5, 20)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def avatar_file():
+    image = io.BytesIO()
+    Image.new('RGB', (1, 1)).save(image, 'PNG')
+    return SimpleUploadedFile('avatar.png', image.getvalue(), content_type='image/png')
+
+
+# Бюджеты SQL-запросов для всех эндпоинтов API
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+@patch('orders.tasks.generate_avatar_thumbnail.delay')
+@patch('orders.tasks.generate_product_image_thumbnail.delay')
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        caches['throttle'].clear()
+        self.client = APIClient()
+        self.category = Category.objects.create(name='Budget Category')
+        self.parameters = [Parameter.objects.create(name=name) for name in ('Color', 'Size', 'Weight')]
+        self.shop_user = User.objects.create_user(email='budgetshop@example.com', password='password', type='shop')
+        self.shop_token = Token.objects.create(user=self.shop_user)
+        self.shop = Shop.objects.create(name='Budget Shop', user=self.shop_user)
+        self.external_id = 1000
+        # Предложение, которого нет в прайсе: загрузка на каждом размере удаляет пропавшие предложения
+        ProductInfo.objects.create(
+            product=Product.objects.create(name='Stale product', category=self.category), shop=self.shop,
+            name='Stale', quantity=1, price=100, price_rrc=120, external_id=1,
+        )
+
+    def populate(self, size):
+        """
+        Покупатель с `size` контактами, товарами в корзине и заказами; каталог растёт на `size` товаров.
+        """
+        product_infos = []
+        for _ in range(size):
+            self.external_id += 1
+            product = Product.objects.create(name=f'Product {self.external_id}', category=self.category)
+            product_info = ProductInfo.objects.create(
+                product=product, shop=self.shop, name=f'Model {self.external_id}', quantity=10,
+                price=100, price_rrc=120, external_id=self.external_id,
+            )
+            for parameter in self.parameters:
+                ProductParameter.objects.create(product_info=product_info, parameter=parameter, value='value')
+            product_infos.append(product_info)
+
+        user = User.objects.create_user(email=f'budget{size}@example.com', password='password')
+        token = Token.objects.create(user=user)
+        contacts = [
+            Contact.objects.create(
+                user=user, last_name='Last', first_name='First', email='contact@example.com',
+                phone='1234567890', city='City', street='Street', house='1',
+            )
+            for _ in range(size)
+        ]
+        basket = Order.objects.create(user=user, status='basket')
+        for product_info in product_infos:
+            OrderItem.objects.create(order=basket, product=product_info, quantity=1)
+        for _ in range(size):
+            order = Order.objects.create(user=user, status='new', contact=contacts[0])
+            for product_info in product_infos:
+                OrderItem.objects.create(order=order, product=product_info, quantity=2)
+        return user, token, basket, contacts, product_infos
+
+    def partner_feed(self, size, product_infos):
+        """
+        Прайс-лист: `size` новых товаров и изменённые цена и параметры у `product_infos` магазина.
+        """
+        changed = [
+            {
+                'id': product_info.external_id, 'category': self.category.id, 'model': product_info.name,
+                'name': product_info.product.name, 'price': 99.9, 'price_rrc': 120, 'quantity': 10,
+                'parameters': {'Color': 'Red', 'Size': 'L'},
+            }
+            for product_info in product_infos
+        ]
+        feed = {
+            'shop': self.shop.name,
+            'categories': [{'id': self.category.id, 'name': self.category.name}],
+            'goods': changed + [
+                {
+                    'id': 90000 + size * 100 + index, 'category': self.category.id, 'model': f'Feed {index}',
+                    'name': f'Feed product {size}-{index}', 'price': 100, 'price_rrc': 120, 'quantity': 5,
+                    'parameters': {'Color': 'Black', 'Size': 'M'},
+                }
+                for index in range(size)
+            ],
+        }
+        return SimpleUploadedFile('feed.yaml', yaml.dump(feed).encode(), content_type='application/x-yaml')
+
+    @patch('orders.tasks.send_welcome_email.delay')
+    @patch('orders.tasks.send_order_confirmation_email.delay')
+    @patch('orders.tasks.process_order.delay')
+    def test_query_budgets(self, *mocks):
+        contexts = {}
+
+        def measure(endpoint, size, request):
+            contexts.setdefault(endpoint, {})[size] = self.count_queries(request)
+
+        for size in SIZES:
+            user, token, basket, contacts, product_infos = self.populate(size)
+            self.client.credentials()
+            measure('login', size, lambda: self.client.post(
+                reverse('login'), {'email': user.email, 'password': 'password'}, format='json'))
+            caches['throttle'].clear()
+            measure('register', size, lambda: self.client.post(
+                reverse('register'),
+                {'email': f'new{size}@example.com', 'password': 'password', 'avatar': avatar_file()},
+                format='multipart'))
+
+            self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+            measure('products', size, lambda: self.client.get(reverse('product-list')))
+            ids = ','.join(str(product_info.id) for product_info in product_infos)
+            measure('products-batch', size, lambda: self.client.get(reverse('product-batch'), {'ids': ids}))
+            measure('cart-get', size, lambda: self.client.get(reverse('cart')))
+            items = [{'product_id': product_info.id, 'quantity': 1} for product_info in product_infos]
+            measure('cart-post', size, lambda: self.client.post(reverse('cart'), {'items': items}, format='json'))
+            measure('cart-delete', size, lambda: self.client.delete(
+                reverse('cart'), {'product_ids': str(product_infos[0].id)}, format='json'))
+            measure('contacts', size, lambda: self.client.get(reverse('contacts')))
+            measure('orders', size, lambda: self.client.get(reverse('order-list')))
+            measure('confirm-order', size, lambda: self.client.post(
+                reverse('confirm-order'), {'order_id': basket.id, 'contact_id': contacts[0].id}, format='json'))
+
+            self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.shop_token.key)
+            measure('partner-orders', size, lambda: self.client.get(reverse('partner-orders')))
+            measure('update-partner', size, lambda: self.client.post(
+                reverse('update-partner'), {'file': self.partner_feed(size, product_infos)}, format='multipart'))
+
+        self.assertEqual(set(contexts), set(self.query_budgets))
+        for endpoint, contexts_by_size in contexts.items():
+            with self.subTest(endpoint=endpoint):
+                self.assertQueryBudget(endpoint, contexts_by_size)
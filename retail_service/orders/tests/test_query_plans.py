@@ -0,0 +1,62 @@
+import re
+from unittest import skipUnless
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from shop.orders import ORDER_STATUSES, shop_orders
+from ..models import User, Shop, Category, Product, ProductInfo, Order, OrderItem, Contact
+
+# Полный просмотр таблицы в плане SQLite: «SCAN orders_order» без «USING ... INDEX»
+FULL_SCAN = re.compile(r'\bSCAN (\w+)\b(?! USING)')
+
+
+# Планы запросов горячих путей API: каждый должен использовать индекс
+@skipUnless(connection.vendor == 'sqlite', 'Разбор EXPLAIN QUERY PLAN реализован для SQLite')
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='plans@example.com', password='password')
+        cls.shop = Shop.objects.create(name='Plan Shop')
+        category = Category.objects.create(name='Plan Category')
+        product = Product.objects.create(name='Plan Product', category=category)
+        cls.product_info = ProductInfo.objects.create(
+            product=product, shop=cls.shop, name='Plan Model', quantity=1, price=1, price_rrc=1, external_id=1,
+        )
+        cls.cart = Order.objects.create(user=cls.user, status='basket')
+        OrderItem.objects.create(order=cls.cart, product=cls.product_info, quantity=1)
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        scans = FULL_SCAN.findall(plan)
+        self.assertFalse(scans, f'Full table scan of {scans}:\n{queryset.query}\n{plan}')
+
+    def test_hot_queries_use_indexes(self):
+        hot_queries = {
+            'basket': Order.objects.filter(user=self.user, status='basket'),
+            'order history': Order.objects.filter(user=self.user).exclude(status='basket'),
+            'cart delete': self.cart.ordered_items.filter(product_id__in=[self.product_info.id]),
+            'import cleanup': ProductInfo.objects.filter(shop_id=self.shop.id),
+            'offer lookup': ProductInfo.objects.filter(product_id=self.product_info.product_id, shop_id=self.shop.id),
+            'products by shop': Product.objects.filter(product_infos__shop_id=self.shop.id),
+            'contacts': Contact.objects.filter(user=self.user),
+            'order items prefetch': OrderItem.objects.filter(order_id__in=[self.cart.id]),
+            'partner orders': shop_orders(self.shop, ORDER_STATUSES, before=self.cart.id + 1)[:51],
+        }
+        for name, queryset in hot_queries.items():
+            with self.subTest(query=name):
+                self.assertUsesIndex(queryset)
+
+    def test_full_scan_detected(self):
+        plan = Order.objects.filter(dt__isnull=False).explain()
+        self.assertTrue(FULL_SCAN.search(plan), plan)
+
+
+class OneBasketPerUserTest(TestCase):
+    def test_second_basket_rejected(self):
+        user = User.objects.create_user(email='basket@example.com', password='password')
+        Order.objects.create(user=user, status='basket')
+        Order.objects.create(user=user, status='new')
+        Order.objects.create(user=user, status='new')
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Order.objects.create(user=user, status='basket')
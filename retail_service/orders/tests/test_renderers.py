@@ -0,0 +1,70 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+import msgpack
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from ..models import User, Shop, Category, Product, ProductInfo, Parameter, ProductParameter, Order, OrderItem
+from ..renderers import ORJSONRenderer, MessagePackRenderer
+
+
+# Тесты для рендереров orjson и MessagePack
+class RendererTest(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.user = User.objects.create_user(email='renderer@example.com', password='password')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.user).key)
+        shop = Shop.objects.create(name='Магазин')
+        product = Product.objects.create(name='Товар', category=Category.objects.create(name='Категория'))
+        self.product_info = ProductInfo.objects.create(
+            product=product, shop=shop, name='Модель', quantity=3, price=Decimal('99.90'), price_rrc=120,
+            external_id=1,
+        )
+        ProductParameter.objects.create(
+            product_info=self.product_info, parameter=Parameter.objects.create(name='Цвет'), value='синий',
+        )
+        order = Order.objects.create(user=self.user, status='new')
+        OrderItem.objects.create(order=order, product=self.product_info, quantity=2)
+
+    def test_same_output_as_drf_json(self):
+        data = {
+            'price': Decimal('10.50'),
+            'dt': timezone.now(),
+            'naive': datetime.datetime(2024, 1, 2, 3, 4, 5, 678),
+            'date': datetime.date(2024, 1, 2),
+            'id': uuid.uuid4(),
+            'name': 'Товар',
+            1: [None, True, 1.5],
+        }
+
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+        for url in (reverse('product-list'), reverse('order-list')):
+            response = self.client.get(url)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_msgpack_negotiation(self):
+        response = self.client.get(reverse('order-list'), headers={'Accept': 'application/msgpack'})
+
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        orders = msgpack.unpackb(response.content)
+        self.assertEqual(orders, self.client.get(reverse('order-list')).json())
+        self.assertEqual(orders[0]['items'][0]['product_info']['price'], '99.90')
+
+    def test_msgpack_request_body(self):
+        response = self.client.post(
+            reverse('cart'),
+            MessagePackRenderer().render({'items': [{'product_id': self.product_info.id, 'quantity': 1}]}),
+            content_type='application/msgpack',
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Order.objects.filter(user=self.user, status='basket').exists())
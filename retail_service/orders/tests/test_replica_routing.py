@@ -0,0 +1,85 @@
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from retail_service.routers import pin_key
+from ..models import User, Shop, Category, Product, ProductInfo, Order, OrderItem
+
+REPLICA = settings.REPLICA_DATABASE
+
+
+def sync_replica():
+    """
+    Копия основной базы в реплику средствами sqlite3 backup — имитация репликации.
+    """
+    for alias in ('default', REPLICA):
+        connections[alias].ensure_connection()
+    connections['default'].connection.backup(connections[REPLICA].connection)
+
+
+# Чтение каталога и истории заказов из реплики, запись и read-your-writes — из основной базы
+@override_settings(REPLICA_READS=True, REPLICA_PIN_SECONDS=60)
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        caches['throttle'].clear()
+        self.user = User.objects.create_user(email='replica@example.com', password='password')
+        cache.delete(pin_key(self.user.pk))
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.user).key)
+        shop = Shop.objects.create(name='Replica Shop')
+        category = Category.objects.create(name='Replica Category')
+        product = Product.objects.create(name='Replicated Product', category=category)
+        self.product_info = ProductInfo.objects.create(
+            product=product, shop=shop, name='Model', quantity=10, price=100, price_rrc=120, external_id=1,
+        )
+        order = Order.objects.create(user=self.user, status='new')
+        OrderItem.objects.create(order=order, product=self.product_info, quantity=1)
+        sync_replica()
+
+    def test_reads_go_to_replica(self):
+        # Запись после синхронизации видна только в основной базе
+        Product.objects.create(name='Unreplicated Product', category=self.product_info.product.category)
+
+        response = self.client.get(reverse('product-list'))
+
+        self.assertEqual([product['name'] for product in response.data], ['Replicated Product'])
+        self.assertEqual(len(self.client.get(reverse('order-list')).data), 1)
+
+    def test_writes_go_to_primary(self):
+        Order.objects.create(user=self.user, status='delivered')
+
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(Order.objects.using(REPLICA).count(), 1)
+
+    @patch('orders.tasks.send_order_confirmation_email.delay')
+    @patch('orders.tasks.process_order.delay')
+    def test_read_your_writes(self, *mocks):
+        response = self.client.post(
+            reverse('cart'), {'items': [{'product_id': self.product_info.id, 'quantity': 1}]}, format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        basket = Order.objects.get(user=self.user, status='basket')
+        basket.status = 'new'
+        basket.save()
+
+        # Реплика ещё не получила изменения, но пользователь закреплён за основной базой
+        self.assertEqual(len(self.client.get(reverse('order-list')).data), 2)
+
+        cache.delete(pin_key(self.user.pk))
+        self.assertEqual(len(self.client.get(reverse('order-list')).data), 1)
+
+        sync_replica()
+        self.assertEqual(len(self.client.get(reverse('order-list')).data), 2)
+
+    @override_settings(REPLICA_READS=False)
+    def test_disabled(self):
+        Product.objects.create(name='Unreplicated Product', category=self.product_info.product.category)
+
+        self.assertEqual(len(self.client.get(reverse('product-list')).data), 2)
@@ -0,0 +1,48 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework.authtoken.models import Token
+from django.contrib.auth import get_user_model
+from retail_service.instrumentation import fingerprint
+
+User = get_user_model()
+
+
+# Тесты заголовка Server-Timing и журнала медленных запросов
+class ServerTimingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='timing@example.com', password='timingpassword123')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def test_header_only_for_staff(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('contacts')))
+        self.assertNotIn('Server-Timing', APIClient().get(reverse('product-list')))
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertIn('Server-Timing', self.client.get(reverse('contacts')))
+        with override_settings(SERVER_TIMING='off'):
+            self.assertNotIn('Server-Timing', self.client.get(reverse('contacts')))
+
+    @override_settings(SERVER_TIMING='all')
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('contacts'))
+        metrics = {item.split(';')[0]: item for item in response['Server-Timing'].split(', ')}
+        self.assertIn('desc="2 queries"', metrics['db'])
+        self.assertIn('serializer', metrics)
+        self.assertIn('throttle', metrics)
+        self.assertIn('total', metrics)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_query_logged_with_fingerprint_and_view(self):
+        with self.assertLogs('retail_service.slow_queries', level='WARNING') as logs:
+            self.client.get(reverse('contacts'))
+        self.assertTrue(any('in contacts:' in message for message in logs.output))
+
+    def test_fingerprint_normalizes_literals(self):
+        first = fingerprint("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'a'")
+        second = fingerprint("SELECT *  FROM t WHERE id IN (4) AND name = 'bb'")
+        self.assertEqual(first, second)
+        self.assertEqual(first[1], 'SELECT * FROM t WHERE id IN (...) AND name = ?')
@@ -0,0 +1,93 @@
+import threading
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from ..models import User, Shop, Category, Product, ProductInfo, Order, OrderItem, Contact
+
+THREADS = 8
+REQUESTS_PER_THREAD = 10
+# PRAGMA synchronous возвращает номер режима
+SYNCHRONOUS_MODES = {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3}
+
+
+# Профиль SQLite: прагмы соединения и параллельная запись корзины и заказов
+@skipUnless(connection.vendor == 'sqlite', 'Профиль относится к SQLite')
+# Ожидание блокировки в BEGIN IMMEDIATE не должно попадать в журнал медленных запросов теста
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    SLOW_QUERY_THRESHOLD_MS=60 * 1000,
+)
+class SQLiteProfileTest(TransactionTestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        shop = Shop.objects.create(name='Concurrency Shop')
+        category = Category.objects.create(name='Concurrency Category')
+        product = Product.objects.create(name='Concurrency Product', category=category)
+        self.product_info = ProductInfo.objects.create(
+            product=product, shop=shop, name='Model', quantity=1000, price=100, price_rrc=120, external_id=1,
+        )
+        self.clients = []
+        for index in range(THREADS):
+            user = User.objects.create_user(email=f'concurrent{index}@example.com', password='password')
+            contact = Contact.objects.create(
+                user=user, last_name='Last', first_name='First', email=user.email,
+                phone='1234567890', city='City', street='Street', house='1',
+            )
+            self.clients.append((Token.objects.create(user=user).key, contact.id))
+
+    def test_pragmas(self):
+        with connection.cursor() as cursor:
+            for name, expected in settings.SQLITE_PRAGMAS.items():
+                cursor.execute(f'PRAGMA {name}')
+                value = cursor.fetchone()[0]
+                if name == 'synchronous':
+                    expected = SYNCHRONOUS_MODES[expected]
+                with self.subTest(pragma=name):
+                    self.assertEqual(str(value).lower(), str(expected).lower())
+
+    @patch('orders.tasks.send_order_confirmation_email.delay')
+    @patch('orders.tasks.process_order.delay')
+    def test_parallel_cart_and_confirm_writes(self, *mocks):
+        errors = []
+        barrier = threading.Barrier(THREADS)
+
+        def client(token, contact_id):
+            api = APIClient()
+            api.credentials(HTTP_AUTHORIZATION='Token ' + token)
+            try:
+                barrier.wait()
+                for _ in range(REQUESTS_PER_THREAD):
+                    response = api.post(
+                        reverse('cart'), {'items': [{'product_id': self.product_info.id, 'quantity': 1}]},
+                        format='json',
+                    )
+                    if response.status_code != 201:
+                        errors.append(response.status_code)
+                cart = Order.objects.get(user__auth_token__key=token, status='basket')
+                response = api.post(
+                    reverse('confirm-order'), {'order_id': cart.id, 'contact_id': contact_id}, format='json',
+                )
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+            except Exception as exc:
+                # OperationalError: database is locked
+                errors.append(repr(exc))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=client, args=args) for args in self.clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Order.objects.filter(status='new').count(), THREADS)
+        self.assertEqual(OrderItem.objects.count(), THREADS * REQUESTS_PER_THREAD)
@@ -0,0 +1,99 @@
+import io
+import json
+import os
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from redis.exceptions import ConnectionError as RedisConnectionError
+from retail_service import task_metrics
+from retail_service.celery import app
+from retail_service.metrics import registry, task_registry
+from .. import tasks
+
+
+# Тесты для метрик задач Celery и команды celery_queues
+@override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+class TaskMetricsTest(TestCase):
+    def setUp(self):
+        # Свой хеш Redis: метрики работающих воркеров не смешиваются с тестовыми и не удаляются
+        self.enterContext(patch.object(task_registry, 'key', f'metrics:celery:test:{os.getpid()}'))
+        task_registry.clear()
+        self.addCleanup(task_registry.clear)
+
+    def metrics(self):
+        return self.client.get(reverse('metrics')).content.decode()
+
+    def test_runtime_and_state(self):
+        tasks.process_order.apply(args=(999999,))
+
+        body = self.metrics()
+        self.assertIn('# TYPE celery_task_runtime_seconds histogram', body)
+        self.assertIn('celery_task_runtime_seconds_count{queue="unknown",task="orders.tasks.process_order"} 1', body)
+        self.assertIn('celery_tasks_total{queue="unknown",state="SUCCESS",task="orders.tasks.process_order"} 1', body)
+
+    def test_failure_and_retries(self):
+        with patch('orders.tasks.send_mail', side_effect=ConnectionRefusedError):
+            user = tasks.User.objects.create_user(email='mail@example.com', password='password')
+            result = tasks.send_welcome_email.apply(args=(user.id,))
+
+        self.assertEqual(result.state, 'FAILURE')
+        body = self.metrics()
+        self.assertIn('state="RETRY",task="orders.tasks.send_welcome_email"} 3', body)
+        self.assertIn('state="FAILURE",task="orders.tasks.send_welcome_email"} 1', body)
+        self.assertIn(
+            'celery_task_failures_total{exception="ConnectionRefusedError",queue="unknown",'
+            'task="orders.tasks.send_welcome_email"} 1', body,
+        )
+
+    def test_queue_lag(self):
+        headers = {}
+        task_metrics.mark_published(headers=headers)
+        headers['published_at'] -= 2
+        task = SimpleNamespace(
+            name='orders.tasks.process_order',
+            request=SimpleNamespace(published_at=headers['published_at'], eta=None,
+                                    delivery_info={'routing_key': 'orders'}),
+        )
+        task_metrics.task_started(task_id='lag', task=task)
+        task_metrics.started.pop('lag')
+
+        body = self.metrics()
+        labels = '{queue="orders",task="orders.tasks.process_order"}'
+        self.assertIn(f'celery_task_queue_lag_seconds_count{labels} 1', body)
+        lag = float(body.split(f'celery_task_queue_lag_seconds_sum{labels} ')[1].split()[0])
+        self.assertGreaterEqual(lag, 2)
+        self.assertIn(f'celery_task_queue_lag_seconds_bucket{{queue="orders",task="orders.tasks.process_order",le="1.0"}} 0',
+                      body)
+
+    def test_celery_queues_command(self):
+        # Брокер в памяти процесса: очереди настоящего брокера тест не читает и не очищает
+        brokers = {'broker_read_url': 'memory://', 'broker_write_url': 'memory://'}
+        previous = {name: app.conf[name] for name in brokers}
+        app.conf.update(brokers)
+        self.addCleanup(app.conf.update, previous)
+
+        with app.connection_for_write() as connection:
+            for _ in range(2):
+                tasks.generate_product_image_thumbnail.apply_async(args=(1,), connection=connection)
+            try:
+                stdout = io.StringIO()
+                call_command('celery_queues', '--json', stdout=stdout)
+            finally:
+                connection.default_channel.queue_purge('media')
+
+        backlog = {row['queue']: row['backlog'] for row in json.loads(stdout.getvalue())}
+        self.assertEqual(backlog, {'orders': 0, 'notifications': 0, 'media': 2, 'default': 0})
+
+    def test_metrics_without_redis(self):
+        registry.inc('http_requests_sampled_total')
+        with patch.object(task_registry, 'connection', side_effect=RedisConnectionError), \
+                self.assertLogs('retail_service.metrics', 'WARNING'):
+            response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('http_requests_sampled_total', response.content.decode())
+        self.assertNotIn('celery_tasks_total', response.content.decode())
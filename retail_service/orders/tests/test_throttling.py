@@ -0,0 +1,117 @@
+from unittest import skipUnless
+
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework.authtoken.models import Token
+from django.contrib.auth import get_user_model
+from ..throttling import LocalTokenBucket, RedisTokenBucket, ScopedTokenBucketThrottle, get_token_bucket
+
+User = get_user_model()
+
+REST_FRAMEWORK_RATES = {
+    'anon': '100/day',
+    'user': '1000/day',
+    'login': '3/min',
+    'register': '2/day',
+    'orders': '1000/day',
+    'products': '1000/day',
+    'cart': '1000/day',
+    'contacts': '2/day',
+}
+
+
+def redis_available():
+    try:
+        return redis.Redis().ping()
+    except redis.exceptions.ConnectionError:
+        return False
+
+
+# Тесты троттлинга по корзине токенов
+class TokenBucketThrottleTest(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.client = APIClient()
+
+    def throttle_rates(self):
+        return override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': REST_FRAMEWORK_RATES})
+
+    def test_login_scope_returns_retry_after(self):
+        with self.throttle_rates():
+            for _ in range(3):
+                response = self.client.post(reverse('login'), {'email': 'a@example.com'}, format='json')
+                self.assertEqual(response.status_code, 400)
+            response = self.client.post(reverse('login'), {'email': 'a@example.com'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    def test_scopes_are_independent(self):
+        user = User.objects.create_user(email='throttle@example.com', password='throttlepassword123')
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        with self.throttle_rates():
+            statuses = [self.client.get(reverse('contacts')).status_code for _ in range(3)]
+            cart_status = self.client.get(reverse('cart')).status_code
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(cart_status, 404)
+
+    def test_bucket_built_once(self):
+        bucket = get_token_bucket()
+        self.assertIs(get_token_bucket(), bucket)
+        self.assertIsNone(ScopedTokenBucketThrottle().rate)
+        # Другой кэш лимитов — новая корзина
+        with override_settings(CACHES={
+            **settings.CACHES,
+            'throttle': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'other-throttle'},
+        }):
+            self.assertIsNot(get_token_bucket(), bucket)
+
+    def test_local_bucket_refills(self):
+        bucket = LocalTokenBucket(caches['throttle'])
+        now = [1000.0]
+        bucket.timer = lambda: now[0]
+        self.assertEqual([bucket.consume('key', 2, 1.0)[0] for _ in range(3)], [True, True, False])
+        self.assertAlmostEqual(bucket.consume('key', 2, 1.0)[1], 1.0)
+        now[0] += 1
+        self.assertTrue(bucket.consume('key', 2, 1.0)[0])
+
+    @skipUnless(redis_available(), 'Redis недоступен')
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'throttle': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': 'redis://127.0.0.1:6379/15',
+            'KEY_PREFIX': 'test',
+        },
+    })
+    def test_redis_bucket(self):
+        caches['throttle'].delete('key')
+        bucket = RedisTokenBucket(caches['throttle'])
+        results = [bucket.consume('key', 2, 0.5) for _ in range(3)]
+        self.assertEqual([allowed for allowed, wait in results], [True, True, False])
+        self.assertAlmostEqual(results[2][1], 2.0, places=1)
+        caches['throttle'].delete('key')
+
+    @skipUnless(redis_available(), 'Redis недоступен')
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'throttle': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': 'redis://127.0.0.1:6379/15',
+            'KEY_PREFIX': 'test',
+        },
+    })
+    async def test_redis_bucket_async(self):
+        await sync_to_async(caches['throttle'].delete)('key')
+        bucket = await sync_to_async(RedisTokenBucket)(caches['throttle'])
+        # Асинхронное и синхронное списание работают с одной корзиной
+        results = [await bucket.aconsume('key', 2, 0.5), await bucket.aconsume('key', 2, 0.5)]
+        results.append(await sync_to_async(bucket.consume)('key', 2, 0.5))
+        self.assertEqual([allowed for allowed, wait in results], [True, True, False])
+        self.assertAlmostEqual((await bucket.aconsume('key', 2, 0.5))[1], 2.0, places=1)
+        await sync_to_async(caches['throttle'].delete)('key')
@@ -2,6 +2,7 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from rest_framework.authtoken.models import Token
 from unittest.mock import patch
 from ..models import Product, ProductInfo, Shop, Order, OrderItem, Contact
@@ -11,6 +12,7 @@ User = get_user_model()
 # Тесты для LoginView
 class LoginViewTest(APITestCase):
     def setUp(self):
+        caches['throttle'].clear()
         self.login_url = reverse('login')
         self.user = User.objects.create_user(email='testuser@example.com', password='testpassword123')
 
@@ -44,6 +46,7 @@ class LoginViewTest(APITestCase):
 # Тесты для RegisterView
 class RegisterViewTest(APITestCase):
     def setUp(self):
+        caches['throttle'].clear()
         self.register_url = reverse('register')
 
     @patch('orders.tasks.send_welcome_email.delay')
@@ -184,7 +187,9 @@ class OrderConfirmViewTest(APITestCase):
             'order_id': self.cart.id,
             'contact_id': self.contact.id
         }
-        response = self.client.post(self.confirm_order_url, data, format='json')
+        # Задачи ставятся в очередь после фиксации транзакции
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.confirm_order_url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         updated_order = Order.objects.get(id=self.cart.id)
         self.assertEqual(updated_order.status, 'new')
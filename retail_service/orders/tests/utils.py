@@ -0,0 +1,46 @@
+import json
+from pathlib import Path
+
+from cachalot.api import cachalot_disabled
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Максимальное число SQL-запросов на эндпоинт
+QUERY_BUDGETS_FILE = Path(__file__).with_name('query_budgets.json')
+
+
+def load_query_budgets():
+    with open(QUERY_BUDGETS_FILE) as file:
+        return json.load(file)
+
+
+class QueryBudgetMixin:
+    """
+    Проверка бюджета SQL-запросов эндпоинта на данных разного размера.
+
+    Число запросов не должно превышать бюджет из query_budgets.json и не должно
+    меняться с ростом данных — иначе в эндпоинте появился запрос N+1.
+    """
+
+    query_budgets = load_query_budgets()
+
+    def count_queries(self, request):
+        # Запросы считаются без кэша cachalot: попадания в кэш зависят от порядка тестов
+        with cachalot_disabled(), CaptureQueriesContext(connection) as context:
+            response = request()
+        self.assertLess(response.status_code, 400, getattr(response, 'data', response))
+        return context
+
+    def assertQueryBudget(self, endpoint, contexts_by_size):
+        budget = self.query_budgets[endpoint]
+        counts = {size: len(context) for size, context in contexts_by_size.items()}
+        for size, context in contexts_by_size.items():
+            queries = '\n'.join(query['sql'] for query in context.captured_queries)
+            self.assertLessEqual(
+                len(context), budget,
+                f'{endpoint}: {len(context)} queries at size {size}, budget is {budget}\n{queries}',
+            )
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f'{endpoint}: query count grows with data size {counts}',
+        )
@@ -0,0 +1,261 @@
+import asyncio
+import math
+import threading
+import time
+import weakref
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+from retail_service.instrumentation import timed_section
+
+
+# Корзина токенов в Redis: пополнение и списание выполняются атомарно одним скриптом,
+# состояние ключа — два числа вместо списка отметок времени каждого запроса
+TOKEN_BUCKET_SCRIPT = """
+redis.replicate_commands()
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(wait)}
+"""
+
+
+async def client_lifetime(client):
+    # Цикл событий завершает незакрытые асинхронные генераторы перед остановкой
+    try:
+        yield client
+    finally:
+        await client.aclose()
+
+
+class RedisTokenBucket:
+    """
+    Корзины токенов в Redis (django_redis), списание через Lua-скрипт.
+
+    У django_redis нет собственных асинхронных методов (aget выполняется в потоке),
+    поэтому aconsume вызывает тот же скрипт через redis.asyncio. Асинхронный клиент
+    привязан к циклу событий и создаётся для каждого цикла отдельно; соединения
+    закрываются при остановке цикла (shutdown_asyncgens), а не сборщиком мусора.
+    """
+
+    def __init__(self, cache):
+        from django_redis import get_redis_connection
+
+        self.cache = cache
+        self.script = get_redis_connection(settings.THROTTLE_CACHE).register_script(TOKEN_BUCKET_SCRIPT)
+        self.async_scripts = weakref.WeakKeyDictionary()
+
+    def consume(self, key, capacity, rate, cost=1):
+        allowed, wait = self.script(keys=[self.cache.make_key(key)], args=[capacity, rate, cost])
+        return bool(allowed), float(wait)
+
+    async def aconsume(self, key, capacity, rate, cost=1):
+        loop = asyncio.get_running_loop()
+        if loop not in self.async_scripts:
+            from redis.asyncio import Redis
+
+            # Первый сервер — основной, как у клиента django_redis
+            client = Redis.from_url(self.cache.client._server[0])
+            lifetime = client_lifetime(client)
+            await anext(lifetime)
+            self.async_scripts[loop] = (client.register_script(TOKEN_BUCKET_SCRIPT), lifetime)
+        script, _ = self.async_scripts[loop]
+        allowed, wait = await script(keys=[self.cache.make_key(key)], args=[capacity, rate, cost])
+        return bool(allowed), float(wait)
+
+
+class LocalTokenBucket:
+    """
+    Замена для кэшей без Redis (locmem в тестах и разработке): тот же алгоритм,
+    атомарность обеспечивается блокировкой внутри процесса.
+    """
+
+    lock = threading.Lock()
+    timer = time.time
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def consume(self, key, capacity, rate, cost=1):
+        with self.lock:
+            now = self.timer()
+            tokens, ts = self.cache.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0, now - ts) * rate)
+
+            allowed, wait = tokens >= cost, 0.0
+            if allowed:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+
+            self.cache.set(key, (tokens, now), math.ceil((capacity - tokens) / rate) + 1)
+            return allowed, wait
+
+    async def aconsume(self, key, capacity, rate, cost=1):
+        # Кэш в памяти процесса не ждёт ввода-вывода: списание выполняется сразу, без потока
+        return self.consume(key, capacity, rate, cost)
+
+
+@lru_cache(maxsize=None)
+def token_bucket(alias):
+    # Один объект на процесс: скрипт регистрируется один раз, а не при каждой проверке лимита
+    from django_redis.cache import RedisCache
+
+    cache = caches[alias]
+    if isinstance(cache, RedisCache):
+        return RedisTokenBucket(cache)
+    return LocalTokenBucket(cache)
+
+
+def get_token_bucket():
+    return token_bucket(settings.THROTTLE_CACHE)
+
+
+@receiver(setting_changed)
+def reset_token_bucket(setting, **kwargs):
+    if setting in ('CACHES', 'THROTTLE_CACHE'):
+        token_bucket.cache_clear()
+
+
+class TokenBucketRateThrottle(SimpleRateThrottle):
+    """
+    Троттлинг по алгоритму корзины токенов.
+
+    Лимит вида '1000/day' задаёт ёмкость корзины (1000 запросов) и скорость её пополнения
+    (1000 токенов в сутки). В отличие от SimpleRateThrottle, на каждый запрос
+    выполняется одна атомарная операция над ключом постоянного размера.
+    """
+
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def get_rate(self):
+        # Лимиты читаются при каждом запросе, а не фиксируются при импорте класса
+        if not getattr(self, 'scope', None):
+            raise ImproperlyConfigured(
+                f'You must set either `.scope` or `.rate` for "{self.__class__.__name__}" throttle'
+            )
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f'No default throttle rate set for "{self.scope}" scope')
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        with timed_section('throttle'):
+            bucket = get_token_bucket()
+            allowed, self.wait_time = bucket.consume(self.key, self.num_requests, self.num_requests / self.duration)
+        return allowed
+
+    async def aallow_request(self, request, view):
+        """
+        Асинхронный вариант allow_request для асинхронных представлений.
+        """
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        with timed_section('throttle'):
+            bucket = get_token_bucket()
+            allowed, self.wait_time = await bucket.aconsume(
+                self.key, self.num_requests, self.num_requests / self.duration,
+            )
+        return allowed
+
+    def wait(self):
+        # Retry-After: через сколько секунд в корзине появится токен
+        return math.ceil(self.wait_time)
+
+
+class AnonTokenBucketThrottle(TokenBucketRateThrottle):
+    """
+    Лимит 'anon' для неаутентифицированных пользователей, по IP-адресу.
+    """
+
+    scope = 'anon'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class UserTokenBucketThrottle(TokenBucketRateThrottle):
+    """
+    Лимит 'user' по идентификатору пользователя (или IP-адресу для анонимных).
+    """
+
+    scope = 'user'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class ScopedTokenBucketThrottle(UserTokenBucketThrottle):
+    """
+    Лимит по throttle_scope представления: cart, orders, products, contacts, login, register.
+    """
+
+    scope = None
+
+    def get_rate(self):
+        # Область известна только после получения представления: при создании лимита нет
+        return super().get_rate() if self.scope else None
+
+    def set_scope(self, view):
+        self.scope = getattr(view, 'throttle_scope', None)
+        if self.scope:
+            self.rate = self.get_rate()
+            self.num_requests, self.duration = self.parse_rate(self.rate)
+        return bool(self.scope)
+
+    def allow_request(self, request, view):
+        if not self.set_scope(view):
+            return True
+        return super().allow_request(request, view)
+
+    async def aallow_request(self, request, view):
+        if not self.set_scope(view):
+            return True
+        return await super().aallow_request(request, view)
@@ -1,17 +1,36 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import api_views
+from . import api_views, async_views
 from .views import SocialAuthView
 
 
+# Асинхронные варианты представлений, включаемые по имени маршрута через settings.ASYNC_VIEWS
+ASYNC_VARIANTS = {
+    'product-list': async_views.AsyncProductListView,
+    'cart': async_views.AsyncCartView,
+    'order-list': async_views.AsyncOrderListView,
+}
+
+
+def select_view(name, view):
+    if name in settings.ASYNC_VIEWS:
+        view = ASYNC_VARIANTS[name]
+    return view.as_view()
+
+
 urlpatterns = [
     path('auth/<str:provider>/', SocialAuthView.as_view(), name='social-auth'),
     path('login/', api_views.LoginView.as_view(), name='login'),
     path('register/', api_views.RegisterView.as_view(), name='register'),
     path('logout/', api_views.LogoutView.as_view(), name='logout'),
-    path('products/', api_views.ProductListView.as_view(), name='product-list'),
-    path('cart/', api_views.CartView.as_view(), name='cart'),
+    path('products/', select_view('product-list', api_views.ProductListView), name='product-list'),
+    path('products/batch/', api_views.ProductBatchView.as_view(), name='product-batch'),
+    path('catalog/changes/', api_views.CatalogChangesView.as_view(), name='catalog-changes'),
+    path('catalog/snapshot/', api_views.CatalogSnapshotView.as_view(), name='catalog-snapshot'),
+    path('cart/', select_view('cart', api_views.CartView), name='cart'),
     path('contacts/', api_views.ContactView.as_view(), name='contacts'),
     path('confirm-order/', api_views.OrderConfirmView.as_view(), name='confirm-order'),
-    path('orders/', api_views.OrderListView.as_view(), name='order-list'),
-]
\ No newline at end of file
+    path('orders/', select_view('order-list', api_views.OrderListView), name='order-list'),
+    path('batch/', api_views.BatchView.as_view(), name='batch'),
+]
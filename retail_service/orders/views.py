@@ -4,8 +4,6 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
-from social_django.utils import load_strategy, load_backend
-from social_core.exceptions import MissingBackend, AuthTokenError
 from drf_spectacular.utils import extend_schema
 from .serializers import UserSerializer
 
@@ -40,6 +38,10 @@ class SocialAuthView(APIView):
         - `401 Unauthorized`: Аутентификация не удалась.
         """
 
+        # social_core тянет requests и бэкенды провайдеров: импорт при первом обращении
+        from social_django.utils import load_strategy, load_backend
+        from social_core.exceptions import MissingBackend, AuthTokenError
+
         access_token = request.data.get('access_token')
         if not access_token:
             return Response({'error': 'Access token is required'}, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,18 @@
+from django_redis.cache import RedisCache
+
+from .instrumentation import timed_cache_call
+
+TIMED_METHODS = (
+    'get', 'set', 'add', 'delete', 'touch', 'has_key', 'incr', 'decr',
+    'get_many', 'set_many', 'delete_many', 'clear',
+)
+
+
+class TimedRedisCache(RedisCache):
+    """
+    RedisCache с учётом времени обращений для заголовка Server-Timing.
+    """
+
+
+for name in TIMED_METHODS:
+    setattr(TimedRedisCache, name, timed_cache_call(getattr(RedisCache, name)))
@@ -1,4 +1,5 @@
 from __future__ import absolute_import, unicode_literals
+import argparse
 import os
 from celery import Celery
 
@@ -7,7 +8,59 @@ app = Celery("retail_service")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
 
+# Метрики задач по сигналам Celery: подключаются и в веб-процессе (время публикации), и в воркере
+from . import task_metrics  # noqa: E402,F401
+
+# Профили воркеров по очередям из CELERY_TASK_QUEUES: каждый профиль — отдельный процесс,
+# поэтому долгая обработка изображений не задерживает письма и обработку заказов.
+WORKER_PROFILES = {
+    # Короткие задачи заказов: несколько задач про запас на каждый процесс
+    "orders": {"queues": ["orders"], "concurrency": 4, "prefetch_multiplier": 4},
+    "notifications": {"queues": ["notifications", "default"], "concurrency": 4, "prefetch_multiplier": 4},
+    # Долгие задачи: процесс берёт следующую задачу, только закончив текущую (вместе с acks_late),
+    # и перезапускается после max_tasks_per_child задач, чтобы не копить память Pillow
+    "media": {"queues": ["media"], "concurrency": 2, "prefetch_multiplier": 1, "max_tasks_per_child": 100},
+}
+
+
+def worker_argv(profile, concurrency=None):
+    """
+    Аргументы `celery worker` для профиля.
+    """
+    options = WORKER_PROFILES[profile]
+    argv = [
+        "worker",
+        f"--queues={','.join(options['queues'])}",
+        f"--hostname={profile}@%h",
+        f"--concurrency={concurrency or options['concurrency']}",
+        f"--prefetch-multiplier={options['prefetch_multiplier']}",
+    ]
+    if "max_tasks_per_child" in options:
+        argv.append(f"--max-tasks-per-child={options['max_tasks_per_child']}")
+    return argv
+
+
+def main(argv=None):
+    """
+    Запуск воркера по профилю:
+
+        python -m retail_service.celery media
+        DJANGO_SETTINGS_MODULE=retail_service.settings_worker python -m retail_service.celery orders --concurrency 8
+    """
+    parser = argparse.ArgumentParser(description="Воркер Celery для очередей профиля")
+    parser.add_argument("profile", choices=sorted(WORKER_PROFILES))
+    parser.add_argument("--concurrency", type=int, help="Число процессов вместо значения профиля")
+    args = parser.parse_args(argv)
+    app.worker_main(worker_argv(args.profile, args.concurrency))
+
 
 @app.task(bind=True)
 def debug_task(self):
-    print(f'Request: {self.request!r}')
\ No newline at end of file
+    print(f'Request: {self.request!r}')
+
+
+if __name__ == "__main__":
+    # Модуль, запущенный через -m, — копия retail_service.celery: воркер использует приложение пакета
+    from retail_service.celery import main as run
+
+    run()
@@ -0,0 +1,138 @@
+"""
+Учёт времени SQL, кэша, сериализации и троттлинга в рамках запроса.
+
+Обёртка execute_wrapper устанавливается на каждое соединение с базой; пока в текущем
+контексте нет активного сборщика, она только проверяет порог медленного запроса.
+Контекстная переменная передаётся и в потоки sync_to_async, поэтому учитываются
+запросы асинхронных представлений.
+"""
+import contextvars
+import functools
+import hashlib
+import logging
+import re
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('retail_service.slow_queries')
+
+current_timings = contextvars.ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    __slots__ = ('queries', 'db_time', 'cache_calls', 'cache_time', 'sections', 'view')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_calls = 0
+        self.cache_time = 0.0
+        self.sections = {}
+        self.view = None
+
+
+@contextmanager
+def collect_timings():
+    """
+    Сборщик для текущего запроса; вложенные вызовы используют уже активный сборщик.
+    """
+    timings = current_timings.get()
+    if timings is not None:
+        yield timings
+        return
+
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        current_timings.reset(token)
+
+
+@contextmanager
+def timed_section(name):
+    """
+    Время участка кода (serializer, throttle) в сборщике текущего запроса.
+    """
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.sections[name] = timings.sections.get(name, 0.0) + time.perf_counter() - started
+
+
+def timed_cache_call(method):
+    """
+    Декоратор методов бэкенда кэша: время обращений к кэшу.
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        timings = current_timings.get()
+        if timings is None:
+            return method(*args, **kwargs)
+
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings.cache_calls += 1
+            timings.cache_time += time.perf_counter() - started
+    return wrapper
+
+
+# Нормализация SQL для отпечатка: литералы и списки параметров заменяются заполнителями
+FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def fingerprint(sql):
+    normalized = sql
+    for pattern, replacement in FINGERPRINT_RULES:
+        normalized = pattern.sub(replacement, normalized)
+    normalized = normalized.strip()
+    return hashlib.md5(normalized.encode()).hexdigest()[:12], normalized
+
+
+def query_observer(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        timings = current_timings.get()
+        if timings is not None:
+            timings.queries += 1
+            timings.db_time += elapsed
+        if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            digest, normalized = fingerprint(sql)
+            view = timings.view if timings is not None else None
+            logger.warning(
+                'Slow query %.1f ms [%s] in %s: %s', elapsed * 1000, digest, view or '-', normalized,
+                extra={'fingerprint': digest, 'view': view, 'duration_ms': elapsed * 1000},
+            )
+
+
+def install_query_observer(connection, **kwargs):
+    if query_observer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_observer)
+
+
+def install():
+    connection_created.connect(install_query_observer, dispatch_uid='install_query_observer')
+    # Соединения, открытые до загрузки middleware
+    for connection in connections.all(initialized_only=True):
+        install_query_observer(connection)
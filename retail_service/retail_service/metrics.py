@@ -0,0 +1,210 @@
+"""
+Метрики процесса в памяти и их выдача в текстовом формате Prometheus.
+
+Метрики задач Celery пишут дочерние процессы воркеров, поэтому они хранятся
+не в памяти, а в хеше Redis (RedisMetricsRegistry) и отдаются тем же /metrics.
+"""
+import bisect
+import hmac
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from redis.exceptions import RedisError
+
+logger = logging.getLogger('retail_service.metrics')
+
+# Границы корзин гистограмм
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+# Задачи Celery: ожидание в очереди и выполнение бывают минутами
+TASK_LAG_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+TASK_RUNTIME_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+
+class MetricsRegistry:
+    """
+    Счётчики и гистограммы с метками. Данные хранятся в памяти процесса,
+    поэтому каждый воркер отдаёт собственные значения.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.descriptions = {}
+
+    def describe(self, name, kind, help_text, buckets=None):
+        self.descriptions[name] = (kind, help_text, buckets)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.metrics[key] = self.metrics.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.metrics.get(key)
+            if histogram is None:
+                histogram = self.metrics[key] = Histogram(self.descriptions[name][2] or LATENCY_BUCKETS)
+            histogram.observe(value)
+
+    def clear(self):
+        with self.lock:
+            self.metrics.clear()
+
+    def render(self):
+        with self.lock:
+            items = sorted(self.metrics.items(), key=lambda item: item[0])
+            lines = []
+            described = set()
+            for (name, labels), value in items:
+                if name not in described:
+                    kind, help_text, _ = self.descriptions.get(name, ('untyped', '', None))
+                    lines.append(f'# HELP {name} {help_text}')
+                    lines.append(f'# TYPE {name} {kind}')
+                    described.add(name)
+                if isinstance(value, Histogram):
+                    cumulative = 0
+                    for bound, count in zip(value.buckets, value.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{format_labels(labels, le=bound)} {cumulative}')
+                    lines.append(f'{name}_bucket{format_labels(labels, le="+Inf")} {value.count}')
+                    lines.append(f'{name}_sum{format_labels(labels)} {value.sum}')
+                    lines.append(f'{name}_count{format_labels(labels)} {value.count}')
+                else:
+                    lines.append(f'{name}{format_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class RedisMetricsRegistry(MetricsRegistry):
+    """
+    Счётчики и гистограммы, общие для всех процессов: значения накапливаются
+    в хеше Redis командами HINCRBYFLOAT, render читает их целиком.
+    """
+
+    def __init__(self, key, cache_alias='default'):
+        super().__init__()
+        self.key = key
+        self.cache_alias = cache_alias
+
+    def connection(self):
+        from django_redis import get_redis_connection
+
+        return get_redis_connection(self.cache_alias)
+
+    def field(self, name, labels, part=None):
+        return json.dumps([name, sorted(labels.items()), part])
+
+    def inc(self, name, value=1, **labels):
+        self.connection().hincrbyfloat(self.key, self.field(name, labels), value)
+
+    def observe(self, name, value, **labels):
+        buckets = self.descriptions[name][2] or LATENCY_BUCKETS
+        index = bisect.bisect_left(buckets, value)
+        pipeline = self.connection().pipeline(transaction=False)
+        # Значение больше последней границы попадает только в +Inf (count)
+        if index < len(buckets):
+            pipeline.hincrbyfloat(self.key, self.field(name, labels, index), 1)
+        pipeline.hincrbyfloat(self.key, self.field(name, labels, 'sum'), value)
+        pipeline.hincrbyfloat(self.key, self.field(name, labels, 'count'), 1)
+        pipeline.execute()
+
+    def load(self):
+        metrics = {}
+        for field, value in self.connection().hgetall(self.key).items():
+            name, labels, part = json.loads(field)
+            key = (name, tuple(tuple(pair) for pair in labels))
+            value = float(value)
+            if part is None:
+                metrics[key] = int(value) if value.is_integer() else value
+                continue
+            histogram = metrics.get(key)
+            if histogram is None:
+                histogram = metrics[key] = Histogram(self.descriptions[name][2] or LATENCY_BUCKETS)
+            if part == 'sum':
+                histogram.sum = value
+            elif part == 'count':
+                histogram.count = int(value)
+            else:
+                histogram.counts[part] = int(value)
+        with self.lock:
+            self.metrics = metrics
+
+    def render(self):
+        self.load()
+        return super().render()
+
+    def clear(self):
+        self.connection().delete(self.key)
+        super().clear()
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(value)}"' for key, value in pairs) + '}'
+
+
+registry = MetricsRegistry()
+registry.describe('http_request_duration_seconds', 'histogram', 'Request latency of sampled requests.')
+registry.describe('http_request_queries', 'histogram', 'SQL queries per sampled request.', COUNT_BUCKETS)
+registry.describe('http_requests_sampled_total', 'counter', 'Number of sampled requests.')
+
+task_registry = RedisMetricsRegistry('metrics:celery')
+task_registry.describe('celery_task_queue_lag_seconds', 'histogram', 'Time from publishing a task to its start.',
+                       TASK_LAG_BUCKETS)
+task_registry.describe('celery_task_runtime_seconds', 'histogram', 'Task execution time.', TASK_RUNTIME_BUCKETS)
+task_registry.describe('celery_tasks_total', 'counter', 'Finished task runs by final state.')
+task_registry.describe('celery_task_failures_total', 'counter', 'Task failures by exception type.')
+task_registry.describe('cleanup_rows_deleted_total', 'counter', 'Rows removed by the cleanup jobs.')
+task_registry.describe('cleanup_run_seconds', 'histogram', 'Duration of a cleanup job run.', TASK_RUNTIME_BUCKETS)
+
+
+def metrics_allowed(request):
+    token = settings.METRICS_TOKEN
+    if token and hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', '').encode(),
+                                     f'Bearer {token}'.encode()):
+        return True
+    return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+
+def metrics_view(request):
+    """
+    Метрики в формате Prometheus: по токену METRICS_TOKEN (Authorization: Bearer)
+    или с адресов METRICS_ALLOWED_IPS.
+    """
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    body = registry.render()
+    # Недоступный Redis не должен скрывать метрики процесса
+    try:
+        body += task_registry.render()
+    except RedisError:
+        logger.warning('Failed to load task metrics from Redis', exc_info=True)
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
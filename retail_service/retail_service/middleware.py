@@ -0,0 +1,162 @@
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+from .instrumentation import collect_timings, current_timings, install
+from .metrics import registry
+from .routers import pin_to_primary, replica_enabled
+
+
+class SamplingProfilerMiddleware:
+    """
+    Выборочное профилирование запросов.
+
+    Профилируется доля запросов PROFILING_SAMPLE_RATE, а также все запросы с заголовком
+    PROFILING_HEADER. Для них в памяти процесса накапливаются гистограммы времени ответа
+    и числа SQL-запросов по эндпоинтам, доступные через /metrics.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.header = 'HTTP_' + settings.PROFILING_HEADER.upper().replace('-', '_')
+        install()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def should_sample(self, request):
+        return self.header in request.META or random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_sample(request):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        with collect_timings() as timings:
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, timings)
+        return response
+
+    async def __acall__(self, request):
+        if not self.should_sample(request):
+            return await self.get_response(request)
+
+        started = time.perf_counter()
+        with collect_timings() as timings:
+            response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, timings)
+        return response
+
+    def record(self, request, response, elapsed, timings):
+        match = request.resolver_match
+        labels = {
+            'endpoint': match.view_name if match else 'unmatched',
+            'method': request.method,
+        }
+        registry.observe('http_request_duration_seconds', elapsed, **labels)
+        registry.observe('http_request_queries', timings.queries, **labels)
+        registry.inc('http_requests_sampled_total', status=response.status_code, **labels)
+
+
+class ServerTimingMiddleware:
+    """
+    Разбивка времени запроса в заголовке Server-Timing.
+
+    Учитываются SQL (время и число запросов), кэш, сериализация и троттлинг.
+    Время собирается всегда (оно нужно журналу медленных запросов), а заголовок
+    добавляется по настройке SERVER_TIMING: по умолчанию только в ответы сотрудникам.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        with collect_timings() as timings:
+            response = self.get_response(request)
+        if self.expose(request):
+            self.add_header(response, timings, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with collect_timings() as timings:
+            response = await self.get_response(request)
+        # request.user может быть ленивым и обращаться к базе
+        if await sync_to_async(self.expose)(request):
+            self.add_header(response, timings, time.perf_counter() - started)
+        return response
+
+    def expose(self, request):
+        mode = settings.SERVER_TIMING
+        if mode == 'all':
+            return True
+        # DRF передаёт аутентифицированного по токену пользователя в исходный запрос
+        user = getattr(request, 'user', None)
+        return mode == 'staff' and user is not None and user.is_staff
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Имя представления для журнала медленных запросов
+        timings = current_timings.get()
+        if timings is not None:
+            timings.view = request.resolver_match.view_name
+
+    def add_header(self, response, timings, elapsed):
+        metrics = [
+            f'db;dur={timings.db_time * 1000:.1f};desc="{timings.queries} queries"',
+            f'cache;dur={timings.cache_time * 1000:.1f};desc="{timings.cache_calls} calls"',
+        ]
+        metrics += [f'{name};dur={duration * 1000:.1f}' for name, duration in timings.sections.items()]
+        metrics.append(f'total;dur={elapsed * 1000:.1f}')
+        response['Server-Timing'] = ', '.join(metrics)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Закрепление пользователя за основной базой после успешного изменяющего запроса.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self.pin(request, response)
+        return response
+
+    def pin(self, request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400 or not replica_enabled():
+            return
+        # request.user заполняет аутентификация DRF внутри представления
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
@@ -0,0 +1,154 @@
+"""
+Заранее собранная схема OpenAPI.
+
+drf_spectacular обходит все представления и сериализаторы при каждом запросе схемы.
+Здесь схема собирается один раз — командой build_openapi_schema при выкладке или при
+первом запросе — и хранится в OPENAPI_SCHEMA_DIR вместе с версией кода и хешем
+содержимого. Пересборка происходит только при смене версии кода: CODE_VERSION
+из окружения или хеш исходников проекта.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views import View
+from django.views.decorators.http import condition
+
+META_FILE = 'schema.meta.json'
+# Форматы как у SpectacularAPIView: YAML по умолчанию, JSON по ?format=json или Accept
+CONTENT_TYPES = {
+    'yaml': 'application/vnd.oai.openapi',
+    'json': 'application/vnd.oai.openapi+json',
+}
+# Исходники, не влияющие на схему
+IGNORED_DIRS = {'tests', 'migrations', 'benchmarks', '__pycache__'}
+
+_lock = threading.Lock()
+_loaded = None
+
+
+def code_version():
+    return settings.CODE_VERSION or source_hash()
+
+
+@lru_cache(maxsize=None)
+def source_hash():
+    digest = hashlib.sha256()
+    for path in sorted(Path(settings.BASE_DIR).rglob('*.py')):
+        if IGNORED_DIRS.intersection(path.relative_to(settings.BASE_DIR).parts):
+            continue
+        digest.update(str(path.relative_to(settings.BASE_DIR)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def build_schema():
+    """
+    Генерация схемы drf_spectacular: содержимое по форматам.
+    """
+    from drf_spectacular.generators import SchemaGenerator
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return {
+        'yaml': OpenApiYamlRenderer().render(schema, renderer_context={}),
+        'json': OpenApiJsonRenderer().render(schema, renderer_context={}),
+    }
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def write_atomic(path, content):
+    # Несколько воркеров могут собирать схему одновременно: файл заменяется целиком
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent)
+    with os.fdopen(descriptor, 'wb') as file:
+        file.write(content)
+    os.chmod(temporary, 0o644)
+    os.replace(temporary, path)
+
+
+def save_schema(contents):
+    directory = Path(settings.OPENAPI_SCHEMA_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    for schema_format, content in contents.items():
+        write_atomic(directory / f'schema.{schema_format}', content)
+    # Метаданные пишутся последними: до их замены старые файлы считаются устаревшими
+    meta = {
+        'code_version': code_version(),
+        'hashes': {schema_format: content_hash(content) for schema_format, content in contents.items()},
+    }
+    write_atomic(directory / META_FILE, json.dumps(meta).encode())
+
+
+def read_schema():
+    directory = Path(settings.OPENAPI_SCHEMA_DIR)
+    try:
+        meta = json.loads((directory / META_FILE).read_text())
+        contents = {schema_format: (directory / f'schema.{schema_format}').read_bytes() for schema_format in CONTENT_TYPES}
+    except (OSError, ValueError):
+        return None
+    if meta.get('code_version') != code_version():
+        return None
+    if any(content_hash(content) != meta['hashes'].get(schema_format) for schema_format, content in contents.items()):
+        return None
+    return contents
+
+
+def get_schema(rebuild=False):
+    """
+    Схема из памяти процесса, затем из файла; при отсутствии или смене версии кода — новая сборка.
+
+    Возвращает словарь {формат: (содержимое, хеш)}.
+    """
+    global _loaded
+    with _lock:
+        if rebuild or _loaded is None or _loaded[0] != code_version():
+            contents = None if rebuild else read_schema()
+            if contents is None:
+                contents = build_schema()
+                save_schema(contents)
+            _loaded = (
+                code_version(),
+                {schema_format: (content, content_hash(content)) for schema_format, content in contents.items()},
+            )
+        return _loaded[1]
+
+
+def requested_format(request):
+    schema_format = request.GET.get('format')
+    if schema_format in CONTENT_TYPES:
+        return schema_format
+    accept = request.headers.get('Accept', '')
+    return 'json' if 'json' in accept and 'yaml' not in accept else 'yaml'
+
+
+def schema_etag(request, *args, **kwargs):
+    return get_schema()[requested_format(request)][1]
+
+
+class CachedSchemaView(View):
+    """
+    Схема OpenAPI с ETag (хеш содержимого) и долгим кэшированием на клиенте.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return condition(etag_func=schema_etag)(super().as_view(**initkwargs))
+
+    def get(self, request, *args, **kwargs):
+        schema_format = requested_format(request)
+        content, _ = get_schema()[schema_format]
+        response = HttpResponse(content, content_type=CONTENT_TYPES[schema_format])
+        patch_cache_control(response, public=True, max_age=settings.OPENAPI_SCHEMA_MAX_AGE)
+        # Формат зависит от Accept: кэши должны хранить варианты раздельно
+        response['Vary'] = 'Accept'
+        return response
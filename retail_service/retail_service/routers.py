@@ -0,0 +1,67 @@
+"""
+Маршрутизация чтения между основной базой и репликой.
+
+Запись всегда идёт в 'default'. Чтение отправляется в REPLICA_DATABASE только внутри
+представлений с ReplicaReadMixin, для безопасных методов и только если пользователь
+ничего не записывал последние REPLICA_PIN_SECONDS секунд (read-your-writes):
+после успешного изменяющего запроса retail_service.middleware.ReadYourWritesMiddleware
+закрепляет пользователя за основной базой.
+"""
+import contextvars
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+read_from_replica = contextvars.ContextVar('read_from_replica', default=False)
+
+
+def replica_enabled():
+    return settings.REPLICA_READS and settings.REPLICA_DATABASE in settings.DATABASES
+
+
+def pin_key(user_id):
+    return f'db_pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    cache.set(pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(pin_key(user_id), False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if read_from_replica.get() and replica_enabled():
+            return settings.REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика содержит те же данные, что и основная база
+        return True
+
+
+class ReplicaReadMixin:
+    """
+    Подключение представления DRF к чтению из реплики.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        # Аутентификация и троттлинг выполняются до переключения, на основной базе
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and replica_enabled():
+            user_id = request.user.pk if request.user.is_authenticated else None
+            if user_id is None or not is_pinned(user_id):
+                self.replica_token = read_from_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, 'replica_token', None)
+        if token is not None:
+            read_from_replica.reset(token)
+            self.replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
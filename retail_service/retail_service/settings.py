@@ -10,8 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import os
+import tempfile
+from datetime import timedelta
 from pathlib import Path
 
+from celery.schedules import crontab
+from kombu import Queue
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -50,7 +55,6 @@ INSTALLED_APPS = [
     'drf_spectacular',
     'imagekit',
     'cachalot',
-    'silk',
     'social_django',
     'orders',
     'shop',
@@ -58,15 +62,39 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'retail_service.middleware.ServerTimingMiddleware',
+    'retail_service.middleware.SamplingProfilerMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'retail_service.middleware.ReadYourWritesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'silk.middleware.SilkyMiddleware',
 ]
 
+# Профилирование
+# Доля запросов, попадающих в метрики /metrics, и заголовок для принудительного профилирования
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0.01'))
+PROFILING_HEADER = 'X-Profile'
+# Доступ к /metrics: токен для заголовка 'Authorization: Bearer <токен>' и адреса без токена.
+# Без них эндпоинт закрыт; за обратным прокси REMOTE_ADDR — адрес прокси, поэтому там нужен токен
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+METRICS_ALLOWED_IPS = [ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip]
+
+# Заголовок Server-Timing: 'staff' — в ответах сотрудникам (is_staff), 'all' — во всех ответах
+# (локальная отладка, бенчмарки), 'off' — нигде
+SERVER_TIMING = os.environ.get('SERVER_TIMING', 'staff')
+
+# Журнал медленных SQL-запросов (логгер retail_service.slow_queries)
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '200'))
+
+# Silk записывает каждый запрос и все SQL-запросы в базу, поэтому включается только явно
+SILK_ENABLED = os.environ.get('SILK_ENABLED') == '1'
+if SILK_ENABLED:
+    INSTALLED_APPS.append('silk')
+    MIDDLEWARE.append('silk.middleware.SilkyMiddleware')
+
 ROOT_URLCONF = 'retail_service.urls'
 
 TEMPLATES = [
@@ -97,13 +125,47 @@ WSGI_APPLICATION = 'retail_service.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Профиль SQLite для нескольких воркеров gunicorn: WAL позволяет читать во время записи,
+# busy_timeout ждёт освобождения блокировки вместо ошибки 'database is locked'
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',                                                  # fsync только при checkpoint
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024)),    # отрицательное значение — в КБ
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Выполняется при открытии каждого соединения
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # Транзакции сразу берут блокировку записи: повышение блокировки внутри
+            # отложенной транзакции в режиме WAL завершается SQLITE_BUSY без ожидания
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000,
+        },
+        # Тестовая база в файле: в памяти нет WAL, а потоки блокируют общий кэш таблиц
+        'TEST': {'NAME': os.path.join(tempfile.gettempdir(), 'test_retail_service.sqlite3')},
     }
 }
 
+# Реплика для чтения каталога и истории заказов (retail_service.routers)
+REPLICA_DATABASE = 'replica'
+REPLICA_DATABASE_NAME = os.environ.get('REPLICA_DATABASE_NAME')
+REPLICA_READS = bool(REPLICA_DATABASE_NAME)
+# Сколько секунд после записи пользователь читает из основной базы
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', '5'))
+if REPLICA_DATABASE_NAME:
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES['default'],
+        'NAME': REPLICA_DATABASE_NAME,
+        'TEST': {'NAME': os.path.join(tempfile.gettempdir(), 'test_retail_service_replica.sqlite3')},
+    }
+DATABASE_ROUTERS = ['retail_service.routers.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -159,9 +221,21 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # JSON через orjson, MessagePack для внутренних сервисов (Accept: application/msgpack)
+    'DEFAULT_RENDERER_CLASSES': [
+        'orders.renderers.ORJSONRenderer',
+        'orders.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'orders.renderers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'orders.throttling.AnonTokenBucketThrottle',
+        'orders.throttling.UserTokenBucketThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/day',
@@ -170,11 +244,43 @@ REST_FRAMEWORK = {
         'register': '2/day',       # Лимит для эндпоинта регистрации
         'orders': '1000/day',      # Лимит для заказов
         'products': '1000/day',    # Лимит для товаров
+        'catalog': '10000/day',    # Лимит для журнала изменений каталога
         'cart': '1000/day',        # Лимит для эндпоинта работы корзиной
         'contacts': '50/day'     # Лимит для эндпоинта контактов
     },
 }
 
+# Журнал изменений каталога (/catalog/changes/)
+CATALOG_CHANGES_PAGE_SIZE = 500
+CATALOG_CHANGES_MAX_PAGE_SIZE = 5000
+
+# Предложения по списку идентификаторов (/products/batch/, orders.offers)
+PRODUCT_BATCH_MAX_IDS = 100
+PRODUCT_BATCH_CACHE_TIMEOUT = 60 * 60
+
+# Лента заказов магазина (shop/orders/)
+PARTNER_ORDERS_PAGE_SIZE = 50
+PARTNER_ORDERS_MAX_PAGE_SIZE = 500
+
+# Массовая смена статуса заказов магазином (shop/orders/status/, orders.statuses)
+ORDER_STATUS_BATCH_MAX_IDS = 1000
+
+# Пакет операций (/batch/, orders.batch)
+BATCH_MAX_OPERATIONS = 20
+
+# Снимок всего каталога (/catalog/snapshot/, orders.snapshot)
+CATALOG_SNAPSHOT_DIR = os.environ.get('CATALOG_SNAPSHOT_DIR', BASE_DIR / 'snapshots')
+CATALOG_SNAPSHOT_CHUNK_SIZE = 500
+
+# Выгрузка прайса магазина (shop.exporter): товаров в одной выборке из базы
+PARTNER_EXPORT_CHUNK_SIZE = 500
+
+# Заранее собранная схема OpenAPI (retail_service.openapi)
+# Версия кода задаётся при выкладке; без неё используется хеш исходников
+CODE_VERSION = os.environ.get('CODE_VERSION')
+OPENAPI_SCHEMA_DIR = os.environ.get('OPENAPI_SCHEMA_DIR', BASE_DIR / 'openapi')
+OPENAPI_SCHEMA_MAX_AGE = 60 * 60 * 24
+
 AUTHENTICATION_BACKENDS = (
     'django.contrib.auth.backends.ModelBackend',
     'social_core.backends.github.GithubOAuth2',
@@ -199,6 +305,60 @@ APPEND_SLASH=True
 CELERY_BROKER_URL = "redis://localhost:6379/0"
 CELERY_RESULT_BACKEND = "redis://localhost:6379/0"
 
+# Очереди задач: заказы, уведомления и обработка изображений не ждут друг друга.
+# Воркеры по очередям запускаются профилями из retail_service.celery (WORKER_PROFILES)
+CELERY_TASK_QUEUES = (
+    Queue('orders', routing_key='orders'),
+    Queue('notifications', routing_key='notifications'),
+    Queue('media', routing_key='media'),
+    Queue('default', routing_key='default'),
+)
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_ROUTES = {
+    'orders.tasks.process_order': {'queue': 'orders'},
+    'orders.tasks.send_welcome_email': {'queue': 'notifications'},
+    'orders.tasks.send_order_confirmation_email': {'queue': 'notifications'},
+    'orders.tasks.send_order_status_emails': {'queue': 'notifications'},
+    'orders.tasks.generate_avatar_thumbnail': {'queue': 'media'},
+    'orders.tasks.generate_product_image_thumbnail': {'queue': 'media'},
+    'orders.tasks.build_catalog_snapshot': {'queue': 'media'},
+    'orders.tasks.cleanup_stale_rows': {'queue': 'default'},
+}
+# Приоритеты в Redis: 0 — наивысший; задачи получают priority в декораторе
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+    # Задачи с acks_late (очередь media) дольше этого срока брокер вернёт в очередь
+    'visibility_timeout': 60 * 60,
+}
+
+# Очистка устаревших строк (orders.cleanup): срок хранения по видам строк, строки старше удаляются
+CLEANUP_RETENTION = {
+    # От последней записи в корзину
+    'baskets': timedelta(days=30),
+    'confirm_tokens': timedelta(days=2),
+    'reset_tokens': timedelta(days=1),
+}
+CLEANUP_CHUNK_SIZE = 500
+# Пауза между порциями, секунд: даёт записать запросам API
+CLEANUP_CHUNK_PAUSE = 0.05
+# Ночью, виды строк по очереди с интервалом в 5 минут (celery -A retail_service beat)
+CELERY_BEAT_SCHEDULE = {
+    f'cleanup-{job}': {
+        'task': 'orders.tasks.cleanup_stale_rows',
+        'schedule': crontab(hour=3, minute=index * 5),
+        'args': (job,),
+    }
+    for index, job in enumerate(CLEANUP_RETENTION)
+}
+# Снимок каталога (orders.snapshot): без изменений каталога сборка сразу завершается
+CELERY_BEAT_SCHEDULE['catalog-snapshot'] = {
+    'task': 'orders.tasks.build_catalog_snapshot',
+    'schedule': crontab(minute='*/15'),
+}
+
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -218,11 +378,59 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Caching settings
 CACHES = {
     'default': {
-        'BACKEND': 'django_redis.cache.RedisCache',
+        'BACKEND': 'retail_service.cache.TimedRedisCache',
         'LOCATION': 'redis://127.0.0.1:6379/1',
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
         }
+    },
+    # Корзины токенов для троттлинга (orders.throttling)
+    'throttle': {
+        'BACKEND': 'retail_service.cache.TimedRedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/2',
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+        }
+    },
+    # Ответы на запросы с Idempotency-Key (orders.idempotency)
+    'idempotency': {
+        'BACKEND': 'retail_service.cache.TimedRedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/3',
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+        }
     }
 }
-CACHALOT_TIMEOUT = 60 * 15
\ No newline at end of file
+THROTTLE_CACHE = 'throttle'
+IDEMPOTENCY_CACHE = 'idempotency'
+# Срок хранения ответа, блокировки выполняющегося запроса и ожидания параллельного дубликата
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+IDEMPOTENCY_LOCK_SECONDS = 10
+IDEMPOTENCY_WAIT_SECONDS = 5
+CACHALOT_TIMEOUT = 60 * 15
+# Запись в основную базу не сбрасывает кэш запросов к реплике
+CACHALOT_DATABASES = ['default']
+# TimedRedisCache — подкласс RedisCache, но cachalot проверяет бэкенд по имени
+SILENCED_SYSTEM_CHECKS = ['cachalot.W001']
+
+# Асинхронные представления
+# Имена маршрутов, обслуживаемых асинхронными вариантами (product-list, cart, order-list),
+# например ASYNC_VIEWS=product-list,order-list при запуске через retail_service.asgi
+ASYNC_VIEWS = [name for name in os.environ.get('ASYNC_VIEWS', '').split(',') if name]
+
+# Логирование
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'retail_service': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
@@ -0,0 +1,7 @@
+"""
+Профиль админки и документации API: полный набор приложений (jet, admin,
+drf_spectacular, silk при SILK_ENABLED) и все маршруты retail_service.urls.
+
+    DJANGO_SETTINGS_MODULE=retail_service.settings_admin gunicorn retail_service.wsgi
+"""
+from .settings import *  # noqa: F401,F403
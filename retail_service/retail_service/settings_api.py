@@ -0,0 +1,37 @@
+"""
+Профиль API-воркеров (gunicorn/uvicorn): только то, что нужно REST API.
+
+Без админки (jet, admin), документации (drf_spectacular), silk, сообщений и статики;
+маршруты — retail_service.urls_api, ответы — только JSON и MessagePack.
+
+    DJANGO_SETTINGS_MODULE=retail_service.settings_api gunicorn retail_service.wsgi
+"""
+from .settings import *  # noqa: F401,F403
+
+API_EXCLUDED_APPS = {
+    'jet.dashboard',
+    'jet',
+    'django.contrib.admin',
+    'django.contrib.messages',
+    'django.contrib.sites',
+    'django.contrib.staticfiles',
+    'drf_spectacular',
+    'silk',
+}
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in API_EXCLUDED_APPS]
+
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE
+    if middleware not in {
+        'django.contrib.messages.middleware.MessageMiddleware',
+        'silk.middleware.SilkyMiddleware',
+    }
+]
+
+ROOT_URLCONF = 'retail_service.urls_api'
+
+REST_FRAMEWORK = {
+    **{name: value for name, value in REST_FRAMEWORK.items() if name != 'DEFAULT_SCHEMA_CLASS'},
+    # Browsable API не нужен клиентам и загружает шаблоны и формы
+    'DEFAULT_RENDERER_CLASSES': ['orders.renderers.ORJSONRenderer', 'orders.renderers.MessagePackRenderer'],
+}
@@ -0,0 +1,25 @@
+"""
+Профиль тестов: реплика для проверки маршрутизации чтения, корзины токенов
+и ответы по ключам идемпотентности — в памяти процесса.
+
+    python manage.py test --settings=retail_service.settings_test
+"""
+from .settings import *  # noqa: F401,F403
+
+DATABASES[REPLICA_DATABASE] = {
+    **DATABASES['default'],
+    'NAME': BASE_DIR / 'replica.sqlite3',
+    'TEST': {'NAME': os.path.join(tempfile.gettempdir(), 'test_retail_service_replica.sqlite3')},
+}
+
+CACHES = {
+    **CACHES,
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+    },
+    'idempotency': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'idempotency',
+    },
+}
@@ -0,0 +1,28 @@
+"""
+Профиль воркеров Celery: модели и кэш без HTTP-слоя.
+
+Middleware не загружаются, из приложений остаются модели заказов, токенов,
+миниатюр imagekit и cachalot (записи воркера сбрасывают кэш запросов API).
+
+    DJANGO_SETTINGS_MODULE=retail_service.settings_worker python -m retail_service.celery orders
+
+Профили воркеров по очередям (orders, notifications, media) — retail_service.celery.WORKER_PROFILES.
+"""
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django_rest_passwordreset',
+    'rest_framework',
+    'rest_framework.authtoken',
+    'imagekit',
+    'cachalot',
+    'orders',
+    'shop',
+]
+
+MIDDLEWARE = []
+
+# Нужен только для reverse() в письмах
+ROOT_URLCONF = 'retail_service.urls_api'
@@ -0,0 +1,69 @@
+"""
+Метрики задач Celery по сигналам: ожидание в очереди, время выполнения, повторы и ошибки.
+
+При публикации задачи в заголовок published_at записывается время отправки; воркер
+перед запуском считает по нему ожидание в очереди. Значения пишутся в task_registry
+(хеш Redis), поэтому их видно в /metrics веб-процесса независимо от того, в каком
+дочернем процессе воркера выполнялась задача.
+"""
+import logging
+import time
+from datetime import datetime
+
+from celery import signals
+
+from .metrics import task_registry
+
+logger = logging.getLogger('retail_service.task_metrics')
+
+PUBLISHED_HEADER = 'published_at'
+
+# Время старта выполняющихся задач текущего процесса
+started = {}
+
+
+def task_labels(task):
+    delivery_info = getattr(task.request, 'delivery_info', None) or {}
+    return {'task': task.name, 'queue': delivery_info.get('routing_key') or 'unknown'}
+
+
+def record(method, *args, **labels):
+    # Недоступный Redis не должен ронять задачу
+    try:
+        getattr(task_registry, method)(*args, **labels)
+    except Exception:
+        logger.warning('Failed to record task metric %s', args[0], exc_info=True)
+
+
+@signals.before_task_publish.connect
+def mark_published(headers=None, **kwargs):
+    if headers is not None:
+        headers[PUBLISHED_HEADER] = time.time()
+
+
+@signals.task_prerun.connect
+def task_started(task_id=None, task=None, **kwargs):
+    started[task_id] = time.perf_counter()
+    published_at = getattr(task.request, PUBLISHED_HEADER, None)
+    if published_at is None:
+        return
+    # Отложенная задача (eta, countdown) ждёт в очереди с назначенного времени
+    eta = task.request.eta
+    if eta:
+        eta = datetime.fromisoformat(eta) if isinstance(eta, str) else eta
+        published_at = max(published_at, eta.timestamp())
+    record('observe', 'celery_task_queue_lag_seconds', max(time.time() - published_at, 0), **task_labels(task))
+
+
+@signals.task_postrun.connect
+def task_finished(task_id=None, task=None, state=None, **kwargs):
+    start = started.pop(task_id, None)
+    labels = task_labels(task)
+    if start is not None:
+        record('observe', 'celery_task_runtime_seconds', time.perf_counter() - start, **labels)
+    record('inc', 'celery_tasks_total', state=state or 'UNKNOWN', **labels)
+
+
+@signals.task_failure.connect
+def task_failed(sender=None, exception=None, **kwargs):
+    record('inc', 'celery_task_failures_total', exception=type(exception).__name__, **task_labels(sender))
@@ -16,13 +16,12 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView,
-)
+from drf_spectacular.views import SpectacularSwaggerView
 from rest_framework.authtoken import views as drf_views
 from django.conf import settings
 from django.conf.urls.static import static
+from .metrics import metrics_view
+from .openapi import CachedSchemaView
 
 
 urlpatterns = [
@@ -30,12 +29,15 @@ urlpatterns = [
     path('api-token-auth/', drf_views.obtain_auth_token, name='api-token-auth'),
     path('', include('orders.urls')),
     path('shop/', include('shop.urls')),
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('api/schema/', CachedSchemaView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path(r'jet/', include('jet.urls', 'jet')),
     path(r'jet/dashboard/', include('jet.dashboard.urls', 'jet-dashboard')),
-    path('silk/', include('silk.urls', namespace='silk')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
+if settings.SILK_ENABLED:
+    urlpatterns += [path('silk/', include('silk.urls', namespace='silk'))]
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -0,0 +1,14 @@
+"""
+Маршруты профиля API (settings_api): без админки, jet и документации.
+"""
+from django.urls import path, include
+from rest_framework.authtoken import views as drf_views
+from .metrics import metrics_view
+
+
+urlpatterns = [
+    path('api-token-auth/', drf_views.obtain_auth_token, name='api-token-auth'),
+    path('', include('orders.urls')),
+    path('shop/', include('shop.urls')),
+    path('metrics', metrics_view, name='metrics'),
+]
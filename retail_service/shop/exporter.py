@@ -0,0 +1,136 @@
+import csv
+
+import yaml
+from cachalot.api import cachalot_disabled
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.authentication import TokenAuthentication
+from orders.models import Shop, Category, ProductInfo, Parameter
+
+
+def number(value):
+    # Цены в прайсе — числа: целые без дробной части, как в исходном YAML
+    return int(value) if value == value.to_integral_value() else float(value)
+
+
+def iter_product_infos(shop, chunk_size):
+    """
+    Предложения магазина порциями по chunk_size: память не зависит от размера каталога.
+    """
+    queryset = (
+        ProductInfo.objects.filter(shop=shop)
+        .select_related('product__category')
+        .prefetch_related('product_parameters__parameter')
+        .order_by('id')
+    )
+    # Выгрузка всего прайса не должна попадать в кэш запросов
+    with cachalot_disabled():
+        yield from queryset.iterator(chunk_size=chunk_size)
+
+
+def export_item(product_info):
+    """
+    Товар в формате раздела goods прайса для shop.importer.
+    """
+    return {
+        'id': product_info.external_id,
+        'category': product_info.product.category_id,
+        'model': product_info.name,
+        'name': product_info.product.name,
+        'price': number(product_info.price),
+        'price_rrc': number(product_info.price_rrc),
+        'quantity': product_info.quantity,
+        'parameters': {
+            product_parameter.parameter.name: product_parameter.value
+            for product_parameter in product_info.product_parameters.all()
+        },
+    }
+
+
+def dump_yaml(data):
+    return yaml.safe_dump(data, allow_unicode=True, sort_keys=False)
+
+
+def iter_price_list_yaml(shop, chunk_size):
+    """
+    Прайс магазина в YAML по частям: заголовок со списком категорий, затем товар за товаром.
+    """
+    categories = [{'id': category.id, 'name': category.name} for category in Category.objects.filter(shops=shop)]
+    yield dump_yaml({'shop': shop.name, 'categories': categories})
+
+    empty = True
+    for product_info in iter_product_infos(shop, chunk_size):
+        if empty:
+            yield 'goods:\n'
+            empty = False
+        # Элемент списка верхнего уровня: «- id: ...», продолжение YAML-последовательности goods
+        yield dump_yaml([export_item(product_info)])
+    if empty:
+        yield dump_yaml({'goods': []})
+
+
+class Echo:
+    """
+    Псевдобуфер для csv.writer: возвращает строку вместо записи.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_price_list_csv(shop, chunk_size):
+    """
+    Прайс магазина в CSV по частям: по столбцу на каждый параметр товаров магазина.
+    """
+    parameters = list(
+        Parameter.objects.filter(product_parameters__product_info__shop=shop).distinct()
+        .order_by('name').values_list('name', flat=True)
+    )
+    writer = csv.writer(Echo())
+    yield writer.writerow(
+        ['id', 'category', 'category_name', 'model', 'name', 'price', 'price_rrc', 'quantity', *parameters]
+    )
+    for product_info in iter_product_infos(shop, chunk_size):
+        item = export_item(product_info)
+        yield writer.writerow([
+            item['id'], item['category'], product_info.product.category.name, item['model'], item['name'],
+            item['price'], item['price_rrc'], item['quantity'],
+            *(item['parameters'].get(name, '') for name in parameters),
+        ])
+
+
+EXPORT_FORMATS = {
+    'yaml': (iter_price_list_yaml, 'application/x-yaml; charset=utf-8'),
+    'csv': (iter_price_list_csv, 'text/csv; charset=utf-8'),
+}
+
+
+class PartnerExport(APIView):
+    """
+    Класс для выгрузки текущего прайса магазина в формате загрузки (YAML) или CSV
+    """
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [TokenAuthentication]
+
+    def get(self, request, export_format, *args, **kwargs):
+        # Проверка, что пользователь является магазином
+        if request.user.type != 'shop':
+            return Response({'Status': False, 'Error': 'Только для магазинов'}, status=403)
+
+        if export_format not in EXPORT_FORMATS:
+            return Response({'Status': False, 'Error': 'Поддерживаются форматы yaml и csv'}, status=400)
+
+        shop = Shop.objects.filter(user=request.user).first()
+        if shop is None:
+            return Response({'Status': False, 'Error': 'Прайс магазина ещё не загружен'}, status=404)
+
+        # Ответ собирается по мере чтения: товары выбираются из базы порциями
+        iterator, content_type = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            iterator(shop, settings.PARTNER_EXPORT_CHUNK_SIZE), content_type=content_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename="price-list.{export_format}"'
+        return response
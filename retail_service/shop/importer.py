@@ -2,10 +2,158 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import TokenAuthentication
+from django.db import transaction
 import yaml
 from yaml import Loader
-from orders.models import Shop, Category, Product, ProductInfo, ProductParameter, Parameter
-import requests
+from orders.tasks import build_catalog_snapshot
+from orders.models import Shop, Category, Product, ProductInfo, ProductInfoChange, ProductParameter, Parameter
+from retail_service.instrumentation import timed_section
+
+
+def load_price_list(content):
+    """
+    Разбор YAML-прайса поставщика
+    """
+    with timed_section('import.parse'):
+        return yaml.load(content, Loader=Loader)
+
+
+# Размер пачки для условий IN (лимит параметров SQLite); вставки bulk_create и bulk_update
+# Django сам делит на пачки под этот лимит
+CHUNK_SIZE = 500
+
+
+def chunks(values):
+    values = list(values)
+    for start in range(0, len(values), CHUNK_SIZE):
+        yield values[start:start + CHUNK_SIZE]
+
+
+def get_or_create_products(goods):
+    """
+    Товары прайса по (название, категория): существующие одним запросом на пачку, новые — bulk_create.
+    """
+    keys = {(item['name'], item['category']) for item in goods}
+    products = {}
+    for names in chunks({name for name, _ in keys}):
+        for product in Product.objects.filter(name__in=names).order_by('id'):
+            products.setdefault((product.name, product.category_id), product)
+    missing = [
+        Product(name=name, category_id=category_id) for name, category_id in keys if (name, category_id) not in products
+    ]
+    for product in Product.objects.bulk_create(missing):
+        products[product.name, product.category_id] = product
+    return products
+
+
+def get_or_create_parameters(names):
+    parameters = {}
+    for chunk in chunks(names):
+        parameters.update(Parameter.objects.filter(name__in=chunk).values_list('name', 'id'))
+    missing = [Parameter(name=name) for name in names if name not in parameters]
+    parameters.update((parameter.name, parameter.id) for parameter in Parameter.objects.bulk_create(missing))
+    return parameters
+
+
+def import_price_list(data, user_id, phase=timed_section):
+    """
+    Загрузка разобранного прайса в каталог магазина пользователя.
+
+    Предложения сопоставляются с прайсом по external_id: новые создаются, у существующих
+    сохраняются только изменённые поля и параметры, пропавшие из прайса удаляются.
+    Так журнал ProductInfoChange получает запись только о реальных изменениях, а позиции
+    заказов не теряют ссылки на предложения при каждой загрузке. Товары, параметры и
+    предложения читаются и пишутся пачками: число запросов не зависит от размера прайса.
+
+    Этапы (shop, categories, goods, cleanup) выполняются внутри контекстного менеджера
+    `phase` с именем вида 'import.<этап>': по умолчанию их время попадает в Server-Timing,
+    бенчмарк импорта подставляет свой счётчик времени, запросов и памяти.
+    """
+    # Создание или получение магазина
+    with phase('import.shop'):
+        shop, _ = Shop.objects.get_or_create(name=data['shop'], user_id=user_id)
+
+    # Добавление категорий
+    with phase('import.categories'):
+        for category in data['categories']:
+            category_object, _ = Category.objects.get_or_create(id=category['id'], name=category['name'])
+            category_object.shops.add(shop.id)
+
+    # Добавление новых и обновление существующих товаров
+    with phase('import.goods'):
+        existing = {
+            product_info.external_id: product_info
+            for product_info in ProductInfo.objects.filter(shop_id=shop.id).prefetch_related(
+                'product_parameters__parameter',
+            )
+        }
+        products = get_or_create_products(data['goods'])
+        created, updated, parameters_only = [], [], []
+        # Предложения с новым набором параметров и id предложений, чьи старые параметры удаляются
+        new_parameters, replaced = [], []
+        for item in data['goods']:
+            values = {
+                'product': products[item['name'], item['category']],
+                'name': item['model'],
+                # Цены из YAML — float: приводятся к Decimal, как их вернёт база
+                'price': ProductInfo.normalize_value('price', item['price']),
+                'price_rrc': ProductInfo.normalize_value('price_rrc', item['price_rrc']),
+                'quantity': item['quantity'],
+            }
+            parameters = {name: str(value) for name, value in item['parameters'].items()}
+
+            product_info = existing.get(item['id'])
+            if product_info is None:
+                product_info = ProductInfo(external_id=item['id'], shop=shop, **values)
+                created.append(product_info)
+            else:
+                current = {
+                    product_parameter.parameter.name: product_parameter.value
+                    for product_parameter in product_info.product_parameters.all()
+                }
+                # Прежние значения уже загружены: журнал сравнивает с ними без повторного чтения
+                product_info.remember_values()
+                for field, value in values.items():
+                    setattr(product_info, field, value)
+                if current == parameters:
+                    parameters = None
+                else:
+                    product_info.extra_changed_fields = ['parameters']
+                    replaced.append(product_info.pk)
+                if product_info.changed_fields():
+                    updated.append(product_info)
+                elif parameters is not None:
+                    parameters_only.append(product_info)
+            if parameters is not None:
+                new_parameters.append((product_info, parameters))
+
+        # Изменённые предложения: журнал пишет ProductInfoQuerySet.bulk_update по каждому объекту
+        ProductInfo.objects.bulk_update(updated, ['product', 'name', 'price', 'price_rrc', 'quantity'])
+        ProductInfoChange.record_updates(
+            ((product_info.pk, product_info.shop_id), ['parameters']) for product_info in parameters_only
+        )
+        ProductInfo.objects.bulk_create(created)
+
+        # Параметры новых предложений и предложений, у которых они изменились. В журнал они уже
+        # записаны как изменение предложения ('parameters'), поэтому старые удаляются одним DELETE,
+        # без выборки строк для сигналов post_delete
+        for pks in chunks(replaced):
+            ProductParameter.objects.filter(product_info_id__in=pks)._raw_delete(ProductParameter.objects.db)
+        parameter_ids = get_or_create_parameters({name for _, values in new_parameters for name in values})
+        ProductParameter.objects.bulk_create(
+            ProductParameter(product_info=product_info, parameter_id=parameter_ids[name], value=value)
+            for product_info, values in new_parameters
+            for name, value in values.items()
+        )
+
+    # Удаление предложений, которых больше нет в прайсе
+    with phase('import.cleanup'):
+        imported = {item['id'] for item in data['goods']}
+        removed = [product_info.pk for external_id, product_info in existing.items() if external_id not in imported]
+        for pks in chunks(removed):
+            ProductInfo.objects.filter(pk__in=pks).delete()
+    return shop
+
 
 class PartnerUpdate(APIView):
     """
@@ -29,15 +177,18 @@ class PartnerUpdate(APIView):
         if file:
             try:
                 # Парсинг YAML-файла из загруженного файла
-                data = yaml.load(file.read(), Loader=Loader)
+                data = load_price_list(file.read())
             except yaml.YAMLError as e:
                 return Response({'Status': False, 'Error': f'Ошибка в YAML файле: {str(e)}'}, status=400)
         elif url:
+            # requests нужен только для загрузки по URL
+            import requests
+
             try:
                 # Загрузка файла по URL
                 response = requests.get(url)
                 response.raise_for_status()
-                data = yaml.load(response.content, Loader=Loader)
+                data = load_price_list(response.content)
             except requests.exceptions.RequestException as e:
                 return Response({'Status': False, 'Error': f'Ошибка при загрузке файла по URL: {str(e)}'}, status=400)
             except yaml.YAMLError as e:
@@ -48,39 +199,8 @@ class PartnerUpdate(APIView):
         if not required_keys.issubset(data.keys()):
             return Response({'Status': False, 'Error': 'Отсутствуют необходимые ключи в YAML-файле'}, status=400)
 
-        # Создание или получение магазина
-        shop, _ = Shop.objects.get_or_create(name=data['shop'], user_id=request.user.id)
-
-        # Добавление категорий
-        for category in data['categories']:
-            category_object, _ = Category.objects.get_or_create(id=category['id'], name=category['name'])
-            category_object.shops.add(shop.id)
-            category_object.save()
-
-        # Удаление старой информации о продуктах для данного магазина
-        ProductInfo.objects.filter(shop_id=shop.id).delete()
-
-        # Добавление новых товаров
-        for item in data['goods']:
-            product, _ = Product.objects.get_or_create(name=item['name'], category_id=item['category'])
-
-            product_info = ProductInfo.objects.create(
-                product=product,
-                external_id=item['id'],
-                name=item['model'],
-                price=item['price'],
-                price_rrc=item['price_rrc'],
-                quantity=item['quantity'],
-                shop=shop
-            )
+        import_price_list(data, request.user.id)
+        # Снимок всего каталога пересобирается воркером после фиксации изменений
+        transaction.on_commit(build_catalog_snapshot.delay)
 
-            # Добавление параметров продукта
-            for name, value in item['parameters'].items():
-                parameter_object, _ = Parameter.objects.get_or_create(name=name)
-                ProductParameter.objects.create(
-                    product_info=product_info,
-                    parameter=parameter_object,
-                    value=value
-                )
-                
         return Response({'Status': True})
@@ -0,0 +1,169 @@
+from django.conf import settings
+from django.db.models import Count, DecimalField, F, Sum
+from django.utils.dateparse import parse_date
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.authentication import TokenAuthentication
+from orders.models import Shop, OrderItem
+from orders.offers import parse_ids
+from orders.serializers import PartnerOrderSerializer
+from orders.statuses import STATUSES, transition_orders
+
+# Статусы оформленных заказов: корзины покупателей магазину не показываются
+ORDER_STATUSES = [code for code in STATUSES if code != 'basket']
+
+
+def parse_day(value):
+    # Пустое значение — фильтр не задан
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(value)
+    return day
+
+
+def shop_orders(shop, statuses, date_from=None, date_to=None, before=None):
+    """
+    Заказы с товарами магазина одним агрегированным запросом, от новых к старым.
+
+    Строка — заказ с числом позиций, количеством и суммой только по товарам магазина.
+    """
+    items = OrderItem.objects.filter(product__shop=shop, order__status__in=statuses)
+    if date_from:
+        items = items.filter(order__dt__date__gte=date_from)
+    if date_to:
+        items = items.filter(order__dt__date__lte=date_to)
+    if before:
+        items = items.filter(order_id__lt=before)
+    return (
+        items.values('order_id')
+        .annotate(
+            dt=F('order__dt'),
+            status=F('order__status'),
+            items=Count('id'),
+            total_quantity=Sum('quantity'),
+            # Сумма по розничной цене, как total_sum в заказе покупателя
+            subtotal=Sum(F('quantity') * F('product__price_rrc'),
+                         output_field=DecimalField(max_digits=12, decimal_places=2)),
+        )
+        .order_by('-order_id')
+    )
+
+
+class PartnerOrders(APIView):
+    """
+    Класс для ленты заказов магазина
+    """
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [TokenAuthentication]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Страница заказов с товарами магазина и суммами по ним.
+
+        Страницы строятся по ключу (id < before), а не по смещению: стоимость запроса
+        не растёт с номером страницы, новые заказы не сдвигают уже полученные.
+
+        **Параметры запроса:**
+        - `status` (str): Статусы через запятую, по умолчанию все, кроме корзины.
+        - `date_from`, `date_to` (date): Даты оформления в формате YYYY-MM-DD, включительно.
+        - `before` (int): `next_before` предыдущей страницы.
+        - `limit` (int): Размер страницы, не больше PARTNER_ORDERS_MAX_PAGE_SIZE.
+
+        **Ответы:**
+        - `200 OK`: Заказы по убыванию id, `next_before` для следующей страницы и признак `has_more`.
+        - `400 Bad Request`: Некорректные параметры.
+        - `403 Forbidden`: Пользователь не является магазином.
+        """
+        # Проверка, что пользователь является магазином
+        if request.user.type != 'shop':
+            return Response({'Status': False, 'Error': 'Только для магазинов'}, status=403)
+
+        params = request.query_params
+        statuses = params['status'].split(',') if params.get('status') else ORDER_STATUSES
+        if not set(statuses) <= set(ORDER_STATUSES):
+            return Response({'Status': False, 'Error': 'Неизвестный статус'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            date_from = parse_day(params.get('date_from'))
+            date_to = parse_day(params.get('date_to'))
+        except ValueError:
+            return Response({'Status': False, 'Error': 'Даты должны быть в формате YYYY-MM-DD'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            before = int(params.get('before', 0))
+            limit = int(params.get('limit', settings.PARTNER_ORDERS_PAGE_SIZE))
+        except ValueError:
+            return Response({'Status': False, 'Error': 'before и limit должны быть целыми числами'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if before < 0 or limit < 1:
+            return Response({'Status': False, 'Error': 'before и limit должны быть положительными'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, settings.PARTNER_ORDERS_MAX_PAGE_SIZE)
+
+        shop = Shop.objects.filter(user=request.user).first()
+        if shop is None:
+            return Response({'Status': False, 'Error': 'Прайс магазина ещё не загружен'}, status=404)
+
+        # Лишняя запись показывает, есть ли следующая страница, без отдельного COUNT
+        orders = list(shop_orders(shop, statuses, date_from, date_to, before)[:limit + 1])
+        has_more = len(orders) > limit
+        orders = orders[:limit]
+        return Response({
+            'orders': PartnerOrderSerializer(orders, many=True).data,
+            'next_before': orders[-1]['order_id'] if orders else before,
+            'has_more': has_more,
+        })
+
+
+class PartnerOrderStatus(APIView):
+    """
+    Класс для массовой смены статуса заказов магазина
+    """
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [TokenAuthentication]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Перевод заказов в новый статус одним запросом.
+
+        Магазин переводит только заказы, все позиции которых — его товары. Заказы с товарами
+        нескольких магазинов переводит сотрудник (`is_staff`): для него проверка магазина не выполняется.
+
+        **Параметры запроса:**
+        - `order_ids` (list[int]): Заказы, не больше ORDER_STATUS_BATCH_MAX_IDS.
+        - `status` (str): Новый статус: confirmed, assembled, sent, delivered или canceled.
+
+        **Ответы:**
+        - `200 OK`: `updated` — переведённые заказы, `rejected` — остальные с причиной отказа.
+        - `400 Bad Request`: Некорректные `order_ids` или `status`.
+        - `403 Forbidden`: Пользователь не является магазином или сотрудником.
+        """
+        # Проверка, что пользователь является магазином или сотрудником
+        if request.user.type != 'shop' and not request.user.is_staff:
+            return Response({'Status': False, 'Error': 'Только для магазинов'}, status=403)
+
+        target = request.data.get('status')
+        if target not in STATUSES or target == 'basket':
+            return Response({'Status': False, 'Error': 'Неизвестный статус'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            order_ids = parse_ids(request.data.get('order_ids') or [])
+        except (TypeError, ValueError):
+            return Response({'Status': False, 'Error': 'order_ids должны быть положительными целыми числами'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not order_ids or len(order_ids) > settings.ORDER_STATUS_BATCH_MAX_IDS:
+            return Response(
+                {'Status': False, 'Error': f'Укажите от 1 до {settings.ORDER_STATUS_BATCH_MAX_IDS} заказов'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        shop = None
+        if not request.user.is_staff:
+            shop = Shop.objects.filter(user=request.user).first()
+            if shop is None:
+                return Response({'Status': False, 'Error': 'Прайс магазина ещё не загружен'}, status=404)
+
+        updated, rejected = transition_orders(order_ids, target, shop=shop)
+        return Response({'Status': True, 'updated': updated, 'rejected': rejected})
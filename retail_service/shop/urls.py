@@ -1,6 +1,11 @@
 from django.urls import path
 from .importer import PartnerUpdate
+from .exporter import PartnerExport
+from .orders import PartnerOrders, PartnerOrderStatus
 
 urlpatterns = [
     path('update-partner/', PartnerUpdate.as_view(), name='update-partner'),
+    path('export/<str:export_format>/', PartnerExport.as_view(), name='partner-export'),
+    path('orders/', PartnerOrders.as_view(), name='partner-orders'),
+    path('orders/status/', PartnerOrderStatus.as_view(), name='partner-order-status'),
 ]
\ No newline at end of file